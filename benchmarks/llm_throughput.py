@@ -0,0 +1,33 @@
+"""Fire concurrent job analyses through the shared LLM client.
+
+    uvicorn src.llm.fake_server:app --port 8090
+    OPENAI_BASE_URL=http://localhost:8090/v1 OPENAI_API_KEY=fake LLM_CACHE_ENABLED=false \
+        python -m benchmarks.llm_throughput --requests 200
+"""
+import argparse
+import asyncio
+import time
+
+from src.job import services
+from src.job.schemas import JobSchema
+from src.llm.client import llm_client
+
+
+async def run(requests):
+    jobs = [
+        JobSchema(job_name=f"Job {i}", job_description=f"Python developer #{i}, 3 years of FastAPI.")
+        for i in range(requests)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*(services.analyse_job(job_data=job) for job in jobs))
+    elapsed = time.perf_counter() - start
+    await llm_client.aclose()
+
+    print(f"{requests} completions in {elapsed:.2f}s ({requests / elapsed:.1f} req/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
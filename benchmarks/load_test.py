@@ -0,0 +1,301 @@
+"""End-to-end load test against the fake LLM and the SQLite stand-in, no network or SQL Server needed.
+
+    python -m benchmarks.load_test                                  # 1, 4, 16, 64 concurrent clients
+    python -m benchmarks.load_test --concurrency 8 32 --requests 200
+    python -m benchmarks.load_test --save-baseline                  # store the numbers as the reference
+    python -m benchmarks.load_test --baseline benchmarks/baseline.json --tolerance 0.2
+
+Starts src.llm.fake_server (deterministic function-call output, fixed latency)
+and the API on a throwaway SQLite database, then drives every scenario at
+each concurrency level. Reports throughput, p50/p95/p99 latency and the peak
+RSS of the API process tree per scenario. With a baseline, a scenario whose
+p95 grew or whose throughput dropped by more than the tolerance is reported
+as a regression and the exit status is 1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CV_DIR = os.path.join(ROOT, "candidate_cv")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+JOB_DESCRIPTION = (
+    "We are hiring a {level} backend engineer (#{i}). Requirements: {years} years of Python, FastAPI, "
+    "SQL Server, Docker; a degree in Computer Science; AWS certification is a plus. Responsibilities: "
+    "design REST APIs, review code, mentor juniors. Good communication and teamwork."
+)
+
+
+def process_rss(pid):
+    """Resident memory in bytes of a process and its children (Linux /proc), None elsewhere"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        children = []
+    return rss + sum(process_rss(child) or 0 for child in children)
+
+
+def percentile_ms(latencies, q):
+    return round(float(np.percentile(latencies, q)) * 1000, 2) if latencies else None
+
+
+async def drive(client, make_request, concurrency, total, pid):
+    """Send `total` requests from `concurrency` clients; latency of successful requests only"""
+    counter = itertools.count()
+    latencies = []
+    errors = []
+    peak_rss = process_rss(pid) or 0
+    done = asyncio.Event()
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, process_rss(pid) or 0)
+            await asyncio.sleep(0.1)
+
+    async def worker():
+        while (index := next(counter)) < total:
+            method, url, kwargs = make_request(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                await response.aread()
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+                continue
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            else:
+                latencies.append(elapsed)
+
+    sampler = asyncio.create_task(sample_memory())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    done.set()
+    await sampler
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": len(errors),
+        "error_samples": sorted({str(error) for error in errors})[:5],
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1) if peak_rss else None,
+    }
+
+
+def load_cvs():
+    cvs = []
+    for name in sorted(os.listdir(CV_DIR)):
+        if name.lower().endswith((".pdf", ".docx")):
+            with open(os.path.join(CV_DIR, name), "rb") as f:
+                cvs.append((name, f.read()))
+    if not cvs:
+        raise SystemExit(f"No sample CVs in {CV_DIR}")
+    return cvs
+
+
+def write_scenarios(cvs):
+    def job_analyse(i):
+        level = ("junior", "mid-level", "senior")[i % 3]
+        body = {"job_name": f"Backend engineer {i}", "job_description": JOB_DESCRIPTION.format(level=level, i=i, years=2 + i % 5)}
+        return "POST", "/job/analyse", {"json": body}
+
+    def candidate_analyse(i):
+        name, contents = cvs[i % len(cvs)]
+        return "POST", "/candidate/analyse", {"files": {"file": (name, contents)}}
+
+    return [("job_analyse", job_analyse), ("candidate_analyse", candidate_analyse)]
+
+
+def read_scenarios(candidates, jobs):
+    def matching_analyse(i):
+        body = {"candidate": candidates[i % len(candidates)], "job": jobs[i % len(jobs)]}
+        return "POST", "/matching/analyse", {"json": body}
+
+    job_id = jobs[0]["job_id"]
+    return [
+        ("matching_analyse", matching_analyse),
+        ("get_all_candidates", lambda i: ("GET", "/candidate/get_all_candidates", {"params": {"limit": 100}})),
+        ("get_all_jobs", lambda i: ("GET", "/job/get_all_jobs", {"params": {"limit": 100}})),
+        ("get_matchings", lambda i: ("GET", f"/matching/get_matchings/{job_id}", {"params": {"order": "score", "limit": 100}})),
+    ]
+
+
+def start_server(app, port, env, log_path):
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    process.log_path = log_path
+    return process
+
+
+async def wait_until_up(url, process, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                with open(process.log_path, errors="replace") as log:
+                    raise SystemExit(f"{url} exited: {log.read()[-2000:]}")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout}s")
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="cv-ranking-bench-")
+    upload_dir = os.path.join(workdir, "cv") + os.sep
+    os.makedirs(upload_dir)
+    env = {
+        **os.environ,
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_LATENCY_JITTER": "0",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        "OPENAI_API_KEY": "fake",
+        "DB_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "bench.sqlite3"),
+        "CV_UPLOAD_DIR": upload_dir,
+        "PARSED_TEXT_CACHE_DIR": os.path.join(workdir, "parsed") + os.sep,
+        # Every request must reach the (fake) model and write a row
+        "LLM_CACHE_ENABLED": "false",
+        "DEDUPLICATE_UPLOADS": "false",
+        "TASK_QUEUE_BACKEND": "memory",
+        "TASK_WORKERS": "0",
+        "LOG_DIR": os.path.join(workdir, "api.log"),
+    }
+
+    llm = start_server("src.llm.fake_server:app", args.llm_port, env, os.path.join(workdir, "fake_llm.out"))
+    api = start_server("main:app", args.api_port, env, os.path.join(workdir, "api.out"))
+    results = {}
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs", llm)
+        await wait_until_up(f"http://127.0.0.1:{args.api_port}/healthz", api)
+
+        limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.api_port}", timeout=300, limits=limits) as client:
+            scenarios = write_scenarios(load_cvs())
+            for name, make_request in scenarios:
+                results[name] = await run_levels(client, name, make_request, args, api.pid)
+
+            candidates = (await client.get("/candidate/get_all_candidates", params={"limit": 50})).json()
+            jobs = (await client.get("/job/get_all_jobs", params={"limit": 10})).json()
+            for name, make_request in read_scenarios(candidates, jobs):
+                results[name] = await run_levels(client, name, make_request, args, api.pid)
+    finally:
+        for process in (api, llm):
+            process.terminate()
+            process.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "settings": {"llm_latency": args.llm_latency, "requests": args.requests, "concurrency": args.concurrency},
+        "scenarios": results,
+    }
+
+
+async def run_levels(client, name, make_request, args, pid):
+    levels = []
+    for concurrency in args.concurrency:
+        total = max(args.requests, concurrency)
+        level = await drive(client, make_request, concurrency, total, pid)
+        print_level(name, level)
+        levels.append(level)
+    return levels
+
+
+def print_level(name, level):
+    print(
+        f"{name:<20} c={level['concurrency']:<4} {level['throughput_rps']:>8} req/s  "
+        f"p50 {level['p50_ms']} ms  p95 {level['p95_ms']} ms  p99 {level['p99_ms']} ms  "
+        f"rss {level['peak_rss_mb']} MB  errors {level['errors']} {' '.join(level['error_samples'])}"
+    )
+
+
+def compare(report, baseline, tolerance):
+    """Human-readable regressions of report against baseline (same scenario and concurrency)"""
+    regressions = []
+    for name, levels in report["scenarios"].items():
+        reference = {level["concurrency"]: level for level in baseline.get("scenarios", {}).get(name, [])}
+        for level in levels:
+            before = reference.get(level["concurrency"])
+            if before is None:
+                continue
+            label = f"{name} c={level['concurrency']}"
+            if before["p95_ms"] and level["p95_ms"] and level["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{label}: p95 {before['p95_ms']} -> {level['p95_ms']} ms")
+            if before["throughput_rps"] and (level["throughput_rps"] or 0) < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{label}: throughput {before['throughput_rps']} -> {level['throughput_rps']} req/s")
+            if level["errors"] > before["errors"]:
+                regressions.append(f"{label}: errors {before['errors']} -> {level['errors']}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API against the fake LLM and SQLite")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=50, help="requests per scenario and level (at least the concurrency)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake completion")
+    parser.add_argument("--api-port", type=int, default=8181)
+    parser.add_argument("--llm-port", type=int, default=8190)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help=f"reference report to compare against (default {os.path.relpath(DEFAULT_BASELINE, ROOT)})")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95/throughput change")
+    args = parser.parse_args()
+    explicit_baseline = args.baseline is not None
+    args.baseline = args.baseline or DEFAULT_BASELINE
+    # Fail before the run rather than after it when the requested baseline isn't there
+    if explicit_baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        sys.exit(f"Baseline {args.baseline} not found, record one with --save-baseline")
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("settings", {}).get("llm_latency") != args.llm_latency:
+            print(f"Warning: the baseline was recorded with --llm-latency {baseline.get('settings', {}).get('llm_latency')}")
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    else:
+        print(f"Warning: no baseline at {args.baseline}, regressions were not checked (record one with --save-baseline)")
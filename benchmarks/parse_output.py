@@ -0,0 +1,60 @@
+"""Per-call cost of turning function-call arguments into a dict.
+
+    python -m benchmarks.parse_output --number 2000
+
+Compares the previous jsbeautifier + json.loads round trip (if jsbeautifier is
+still installed) with the orjson path, with and without schema validation,
+and the repair path for a truncated payload.
+"""
+import argparse
+import json
+import random
+import timeit
+
+from src.candidate.prompts import fn_candidate_analysis
+from src.llm.fake_server import fake_value
+from src.llm.parsing import function_schema, loads_tolerant, parse_arguments
+from src.matching.prompts import fn_matching_analysis
+
+
+def sample_arguments(functions, seed=0):
+    return json.dumps(fake_value(function_schema(functions), random.Random(seed)))
+
+
+def report(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<32} {seconds * 1e6:9.1f} us/call")
+    return seconds
+
+
+def run(number):
+    try:
+        import jsbeautifier
+    except ImportError:
+        jsbeautifier = None
+
+    for name, functions in (("candidate", fn_candidate_analysis), ("matching", fn_matching_analysis)):
+        arguments = sample_arguments(functions)
+        truncated = arguments[: int(len(arguments) * 0.8)]
+        print(f"{name} arguments, {len(arguments)} chars")
+
+        if jsbeautifier is not None:
+            opts = jsbeautifier.default_options()
+            baseline = report("jsbeautifier + json.loads", lambda: json.loads(jsbeautifier.beautify(arguments, opts)), number)
+        else:
+            baseline = None
+            print("  jsbeautifier not installed, skipping the old path")
+
+        fast = report("orjson", lambda: loads_tolerant(arguments), number)
+        validated = report("orjson + schema validation", lambda: parse_arguments(arguments, functions), number)
+        report("repair truncated payload", lambda: loads_tolerant(truncated), max(number // 10, 1))
+
+        if baseline:
+            print(f"  speedup: {baseline / fast:.0f}x parse only, {baseline / validated:.0f}x with validation")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.number)
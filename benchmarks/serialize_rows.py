@@ -0,0 +1,80 @@
+"""Cost of turning candidate_profiles rows into a get_all_candidates response body.
+
+    python -m benchmarks.serialize_rows --rows 1000
+
+"before" is the previous path: json.loads every JSON column, FastAPI's
+jsonable_encoder, then JSONResponse's json.dumps. The "after" paths serialize
+with orjson, the last one passing the JSON columns through as raw fragments.
+"""
+import argparse
+import json
+import random
+import timeit
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from src.candidate.prompts import fn_candidate_analysis
+from src.candidate.repository import CANDIDATE_COLUMNS, CANDIDATE_JSON_COLUMNS, candidate_to_params
+from src.candidate.schemas import CandidateProfile
+from src.database.pagination import row_to_dict
+from src.llm.fake_server import fake_value
+
+
+def sample_rows(count):
+    rng = random.Random(0)
+    schema = fn_candidate_analysis[0]["parameters"]
+    # Same column layout and JSON text as rows read back from the database
+    return [(i + 1, *candidate_to_params(fake_value(schema, rng))) for i in range(count)]
+
+
+def before(rows):
+    content = [row_to_dict(CANDIDATE_COLUMNS, row, CANDIDATE_JSON_COLUMNS) for row in rows]
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def response_model(rows):
+    adapter = TypeAdapter(List[CandidateProfile])
+    content = [row_to_dict(CANDIDATE_COLUMNS, row, CANDIDATE_JSON_COLUMNS) for row in rows]
+    return adapter.dump_json(adapter.validate_python(content), exclude_unset=True)
+
+
+def orjson_parsed(rows):
+    content = [row_to_dict(CANDIDATE_COLUMNS, row, CANDIDATE_JSON_COLUMNS) for row in rows]
+    return ORJSONResponse(content).body
+
+
+def orjson_raw(rows):
+    content = [row_to_dict(CANDIDATE_COLUMNS, row, CANDIDATE_JSON_COLUMNS, raw=True) for row in rows]
+    return ORJSONResponse(content).body
+
+
+def run(count, number):
+    rows = sample_rows(count)
+    # Every path must produce the same document
+    expected = json.loads(before(rows))
+    for fn in (response_model, orjson_parsed, orjson_raw):
+        assert orjson.loads(fn(rows)) == expected, fn.__name__
+
+    print(f"{count} candidate rows, {len(before(rows)) / 1024:.0f} KiB of JSON")
+    baseline = None
+    for label, fn in (
+        ("before: jsonable_encoder + json", before),
+        ("pydantic response_model", response_model),
+        ("orjson, parsed columns", orjson_parsed),
+        ("orjson, raw JSON columns", orjson_raw),
+    ):
+        seconds = min(timeit.repeat(lambda: fn(rows), number=number, repeat=5)) / number
+        baseline = baseline or seconds
+        print(f"  {label:<34} {seconds * 1e3:8.2f} ms   {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.number)
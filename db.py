@@ -1,4 +1,3 @@
-import pyodbc
 import os
 from dotenv import load_dotenv
 from info import SERVER, DATABASE, USER, PASSWORD
@@ -21,6 +20,9 @@ connectionString = f"""
 """
 
 def connectToDB():
+    # Imported lazily so the SQLite stand-in works on hosts without the ODBC driver
+    import pyodbc
+
     try:
         connection = pyodbc.connect(connectionString)
         print("Connection established")
@@ -1,11 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
+from src.cache.store import llm_cache
+from src.database.pool import db_pool
 from src.candidate.routers import router as candidate_router
 from src.job.routers import router as job_router
 from src.matching.routers import router as matching_router
+from src.server.lifecycle import drain, warm_up
+from src.tasks.routers import router as tasks_router
+from src.telemetry.config import telemetry_config
+from src.telemetry.instrument import MetricsMiddleware, TimedORJSONResponse, configure_logging
+from src.telemetry.metrics import registry
+
+configure_logging(settings.LOG_DIR, settings.DATE_FMT)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One shared connection pool per worker process, opened before the first request
+    await warm_up()
+    yield
+    await drain()
+
 
-app = FastAPI(title=settings.APP_NAME)
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan, default_response_class=TimedORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +36,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, per-stage timings (Server-Timing header) and LLM usage, scraped at /metrics
+if telemetry_config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 def read_root():
     return {"Message": "Welcome to Cybersoft"}
@@ -23,6 +48,20 @@ def read_root():
 async def healthcheck() -> bool:
     return True
 
+@app.get("/healthz/db")
+async def database_pool_metrics():
+    return db_pool.metrics()
+
+@app.get("/healthz/cache")
+async def llm_cache_metrics():
+    return llm_cache.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(candidate_router, prefix="/candidate", tags=["Candidate"])
 app.include_router(job_router, prefix="/job", tags=["Job"])
-app.include_router(matching_router, prefix="/matching", tags=["Matching"])
\ No newline at end of file
+app.include_router(matching_router, prefix="/matching", tags=["Matching"])
+app.include_router(tasks_router, prefix="/tasks", tags=["Tasks"])
+
@@ -0,0 +1,16 @@
+from pydantic_settings import BaseSettings
+
+
+class CacheConfig(BaseSettings):
+    LLM_CACHE_ENABLED: bool = True
+    # In-memory LRU tier
+    LLM_CACHE_MEMORY_MAX_ITEMS: int = 1024
+    # Persistent tier: "disk" (SQLite file shared by all workers on the host) or "none"
+    LLM_CACHE_BACKEND: str = "disk"
+    LLM_CACHE_PATH: str = "./cache/llm_cache.sqlite3"
+    LLM_CACHE_DISK_MAX_ITEMS: int = 100_000
+    # Entries older than this are treated as misses and evicted
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+
+
+cache_config = CacheConfig()
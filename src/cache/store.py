@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import orjson
+
+from src.cache.config import cache_config
+from src.telemetry.metrics import registry
+
+LOGGER = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Canonical form of an LLM input so cosmetic differences share a cache entry"""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def prompt_fingerprint(system_prompt, functions):
+    """Short hash of a prompt and its function schema, changes whenever either is edited"""
+    payload = orjson.dumps([system_prompt, functions], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def make_cache_key(namespace, model, prompt_version, text):
+    digest = hashlib.sha256()
+    for part in (namespace, model, prompt_version, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class MemoryLRUCache:
+    """Bounded in-process tier; values are stored serialized so callers can't mutate them"""
+
+    def __init__(self, max_items, ttl_seconds):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at < time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return payload
+
+    def set(self, key, payload, expires_at=None):
+        if expires_at is None:
+            expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._items[key] = (expires_at, payload)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteCacheTier:
+    """Persistent tier in a local SQLite file, safe to share between worker processes.
+
+    Calls block; TieredCache runs them in a thread. Reads don't write: the
+    access times they record are flushed in one statement with the next write,
+    or once TOUCH_BATCH of them are pending, and only steer eviction.
+    """
+
+    TOUCH_BATCH = 256
+
+    def __init__(self, path, ttl_seconds, max_items):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self.evictions = 0
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+        # A SQLite connection must not be used on both sides of a fork (preloading launcher)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent without an fsync per commit, a crash can only lose the last few entries
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            # Expired rows are left to _evict
+            if row is None or row[1] < now:
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+            return row[0], row[1]
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE cache_key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched = {}
+
+    def set(self, key, payload):
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, payload, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, now + self.ttl_seconds, now),
+            )
+            self._writes += 1
+            # Trim every so often rather than on each write
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        cursor = self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+        self.evictions += cursor.rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_items:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE cache_key IN ("
+                "SELECT cache_key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_items,),
+            )
+            self.evictions += cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class TieredCache:
+    """LRU memory tier in front of an optional persistent tier, with hit/miss counters.
+
+    get and set are coroutines: the memory tier answers inline, the persistent
+    tier's blocking SQLite calls run in a thread off the event loop.
+    """
+
+    def __init__(self, memory, persistent=None, enabled=True):
+        self.memory = memory
+        self.persistent = persistent
+        self.enabled = enabled
+        self.counters = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "errors": 0,
+        }
+
+    async def get(self, key):
+        if not self.enabled:
+            return None
+
+        payload = self.memory.get(key)
+        if payload is not None:
+            self.counters["memory_hits"] += 1
+            return orjson.loads(payload)
+
+        if self.persistent is not None:
+            try:
+                found = await asyncio.to_thread(self.persistent.get, key)
+            except Exception as e:
+                self.counters["errors"] += 1
+                LOGGER.warning(f"LLM cache read failed: {e}")
+                found = None
+            if found is not None:
+                payload, expires_at = found
+                self.counters["persistent_hits"] += 1
+                self.memory.set(key, payload, expires_at=expires_at)
+                return orjson.loads(payload)
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key, value):
+        if not self.enabled:
+            return
+        payload = orjson.dumps(value)
+        self.memory.set(key, payload)
+        self.counters["sets"] += 1
+        if self.persistent is not None:
+            try:
+                await asyncio.to_thread(self.persistent.set, key, payload)
+            except Exception as e:
+                self.counters["errors"] += 1
+                LOGGER.warning(f"LLM cache write failed: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self):
+        hits = self.counters["memory_hits"] + self.counters["persistent_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_items": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "persistent_evictions": self.persistent.evictions if self.persistent else 0,
+        }
+
+
+def build_llm_cache():
+    memory = MemoryLRUCache(
+        max_items=cache_config.LLM_CACHE_MEMORY_MAX_ITEMS,
+        ttl_seconds=cache_config.LLM_CACHE_TTL_SECONDS,
+    )
+    persistent = None
+    if cache_config.LLM_CACHE_ENABLED and cache_config.LLM_CACHE_BACKEND == "disk":
+        persistent = SQLiteCacheTier(
+            path=cache_config.LLM_CACHE_PATH,
+            ttl_seconds=cache_config.LLM_CACHE_TTL_SECONDS,
+            max_items=cache_config.LLM_CACHE_DISK_MAX_ITEMS,
+        )
+    return TieredCache(memory=memory, persistent=persistent, enabled=cache_config.LLM_CACHE_ENABLED)
+
+
+llm_cache = build_llm_cache()
+registry.register_stats("cv_ranking_llm_cache", "LLM response cache counters and hit rate", llm_cache.stats)
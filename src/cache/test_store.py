@@ -0,0 +1,59 @@
+import asyncio
+
+from src.cache.store import MemoryLRUCache, SQLiteCacheTier, TieredCache, make_cache_key
+
+
+def build(tmp_path, max_items=100):
+    persistent = SQLiteCacheTier(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_items=max_items)
+    return TieredCache(MemoryLRUCache(max_items=10, ttl_seconds=60), persistent)
+
+
+def test_cache_key_ignores_whitespace():
+    assert make_cache_key("job", "m", "v1", "Senior  dev\n") == make_cache_key("job", "m", "v1", "Senior dev")
+    assert make_cache_key("job", "m", "v1", "dev") != make_cache_key("job", "m", "v2", "dev")
+
+
+def test_tiers(tmp_path):
+    cache = build(tmp_path)
+    assert asyncio.run(cache.get("k")) is None
+    asyncio.run(cache.set("k", {"a": 1}))
+    assert asyncio.run(cache.get("k")) == {"a": 1}
+    assert cache.counters["memory_hits"] == 1
+
+    cache.memory.clear()
+    assert asyncio.run(cache.get("k")) == {"a": 1}
+    assert cache.counters["persistent_hits"] == 1
+    assert cache.counters["misses"] == 1
+
+
+def test_reads_are_recorded_without_writing(tmp_path):
+    tier = build(tmp_path).persistent
+    tier.set("k", b"1")
+    accessed_at = tier._conn.execute("SELECT accessed_at FROM llm_cache").fetchone()[0]
+
+    assert tier.get("k") == (b"1", tier._conn.execute("SELECT expires_at FROM llm_cache").fetchone()[0])
+    assert tier._conn.execute("SELECT accessed_at FROM llm_cache").fetchone()[0] == accessed_at
+    assert "k" in tier._touched
+
+    tier.set("other", b"2")
+    assert tier._touched == {}
+    assert tier._conn.execute("SELECT accessed_at FROM llm_cache WHERE cache_key = 'k'").fetchone()[0] > accessed_at
+
+
+def test_expired_entries_are_misses(tmp_path):
+    tier = build(tmp_path).persistent
+    tier.ttl_seconds = -1
+    tier.set("k", b"1")
+    assert tier.get("k") is None
+
+
+def test_eviction_drops_least_recently_read(tmp_path):
+    tier = build(tmp_path, max_items=50).persistent
+    for index in range(99):
+        tier.set(f"k{index}", b"1")
+    tier.get("k0")
+    # The 100th write flushes the read of k0 and trims to max_items
+    tier.set("k99", b"1")
+    keys = {row[0] for row in tier._conn.execute("SELECT cache_key FROM llm_cache")}
+    assert len(keys) == 50
+    assert "k0" in keys
@@ -0,0 +1,74 @@
+import re
+from collections import Counter
+
+from src.llm.tokens import get_token_counter
+
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(/|of)\s*\d+)?$", re.IGNORECASE)
+
+# Lines longer than this are content, never a running header or footer
+MAX_HEADER_LENGTH = 120
+TRUNCATION_MARKER = "\n[...]\n"
+
+
+def clean_line(line):
+    return _SPACES.sub(" ", line).strip()
+
+
+def remove_repeated_lines(pages):
+    """Drop running headers/footers: short lines found on at least half the pages, and page numbers"""
+    page_lines = [[clean_line(line) for line in page.splitlines()] for page in pages]
+
+    repeated = set()
+    if len(pages) > 1:
+        seen_on = Counter(line for lines in page_lines for line in set(lines) if line)
+        threshold = max(2, len(pages) / 2)
+        repeated = {
+            line for line, count in seen_on.items()
+            if count >= threshold and len(line) <= MAX_HEADER_LENGTH
+        }
+
+    kept_pages = []
+    emitted = set()
+    for lines in page_lines:
+        kept = []
+        for line in lines:
+            if _PAGE_NUMBER.match(line):
+                continue
+            if line in repeated:
+                # Keep the first occurrence, it may be the candidate's name or contact line
+                if line in emitted:
+                    continue
+                emitted.add(line)
+            kept.append(line)
+        kept_pages.append("\n".join(kept))
+    return kept_pages
+
+
+def collapse_whitespace(text):
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def fit_to_budget(text, budget, counter):
+    """Keep the start (contact, summary, recent roles) and the end (education, certificates) of an over-long CV"""
+    if budget <= 0 or counter.count(text) <= budget:
+        return text
+    head_tokens = int(budget * 0.7)
+    tail_tokens = budget - head_tokens - counter.count(TRUNCATION_MARKER)
+    return counter.head(text, head_tokens) + TRUNCATION_MARKER + counter.tail(text, tail_tokens)
+
+
+def compact_cv(pages, budget, model):
+    """Page texts >>> (prompt-ready CV text, token statistics)"""
+    counter = get_token_counter(model)
+    raw = "\n".join(pages)
+    compacted = fit_to_budget(collapse_whitespace("\n".join(remove_repeated_lines(pages))), budget, counter)
+
+    tokens_before = counter.count(raw)
+    tokens_after = counter.count(compacted)
+    return compacted, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
@@ -1,8 +1,36 @@
+import os
+
 from pydantic_settings import BaseSettings
 
 class CandidateConfig(BaseSettings):
     MODEL_NAME: str = "gpt-3.5-turbo-16k"
+    # (model, largest prompt in tokens it is tried on; 0 for any), cheapest first. Short CVs
+    # start on the small model, the next tier takes over when an answer is invalid or below
+    # CANDIDATE_MIN_COMPLETENESS (share of top-level fields filled in)
+    CANDIDATE_MODEL_TIERS: tuple = (("gpt-4o-mini", 3000), ("gpt-4o", 0))
+    CANDIDATE_MIN_COMPLETENESS: float = 0.5
     CV_UPLOAD_DIR: str = "./candidate_cv/"
+    CV_EXTENSIONS: tuple = (".pdf", ".docx")
+    # Extracted text keyed by the file's SHA-256, re-uploads skip parsing
+    PARSED_TEXT_CACHE_DIR: str = "./cache/parsed_text/"
+
+    # CV text sent to the model is compacted to at most this many tokens (0 disables truncation)
+    CV_TOKEN_BUDGET: int = 6000
+
+    # Uploads are copied to disk in chunks of this size; larger files are rejected with 413
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    CV_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    ARCHIVE_MAX_UPLOAD_BYTES: int = 500 * 1024 * 1024
+
+    # Content-hash uploads: an identical CV returns the stored profile without re-analysis,
+    # near-duplicates are flagged via duplicate_of; run `python -m src.database.migrations` first
+    DEDUPLICATE_UPLOADS: bool = False
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8  # estimated Jaccard similarity of the CV text
+
+    # Batch ingestion
+    BATCH_MAX_FILES: int = 1000
+    BATCH_PARSE_WORKERS: int = os.cpu_count() or 2  # processes parsing PDF/DOCX
+    BATCH_LLM_CONCURRENCY: int = 8  # analyses in flight per batch
 
 
-candidate_config = CandidateConfig()
\ No newline at end of file
+candidate_config = CandidateConfig()
@@ -0,0 +1,93 @@
+"""Duplicate detection for uploaded CVs.
+
+Exact duplicates share the SHA-256 of the file bytes. Near-duplicates (the
+same resume exported again, or lightly edited) are found through the
+contact details and a MinHash signature of the extracted text: the signature
+is cut into bands, each band hashed to a key stored in candidate_minhash_bands,
+so only candidates sharing at least one band key are compared.
+"""
+import re
+import zlib
+
+import numpy as np
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16  # 4 rows per band: pairs above ~0.5 Jaccard share a band key
+SHINGLE_SIZE = 5  # words
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.default_rng(1)
+# Fixed seed: signatures stored in the database must stay comparable across processes
+_PERMUTATION_A = _rng.integers(1, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERMUTATION_B = _rng.integers(0, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_email(email):
+    email = (email or "").strip().lower()
+    return email if "@" in email else None
+
+
+def normalize_phone(phone):
+    """Digits only, the last 9 so "+84 912 345 678" and "0912345678" match"""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-9:] if len(digits) >= 7 else None
+
+
+def shingles(text):
+    words = _WORD.findall((text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text):
+    """MINHASH_PERMUTATIONS minimum hashes of the word shingles, all permutations at once.
+
+    None when the text has no words (image-only/scanned PDFs): an empty set has no
+    meaningful signature and would otherwise match every other textless CV.
+    """
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)), dtype=np.uint64
+    )
+    if not len(hashes):
+        return None
+    # (a * x + b) mod p for every (permutation, shingle); a, x < 2^32 so nothing overflows
+    permuted = (np.outer(_PERMUTATION_A, hashes) + _PERMUTATION_B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=1)
+
+
+def encode_signature(signature):
+    return signature.astype("<u4").tobytes().hex()
+
+
+def decode_signature(text):
+    return np.frombuffer(bytes.fromhex(text), dtype="<u4").astype(np.uint64)
+
+
+def band_keys(signature):
+    """One "band:hash" key per band, equal only when every row of the band is equal"""
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [
+        f"{band}:{zlib.crc32(signature[band * rows:(band + 1) * rows].astype('<u4').tobytes()):08x}"
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return float(np.mean(signature == other))
+
+
+def fingerprint(content_hash, cv_content, result):
+    """What insert_candidate stores to recognise this CV again; no MinHash or bands without text"""
+    signature = minhash_signature(cv_content)
+    return {
+        "content_hash": content_hash,
+        "minhash": encode_signature(signature) if signature is not None else None,
+        "band_keys": band_keys(signature) if signature is not None else [],
+        "email_norm": normalize_email(result.get("email")),
+        "phone_norm": normalize_phone(result.get("phone_number")),
+    }
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import docx2txt
+from pypdf import PdfReader
+
+from src.candidate.config import candidate_config
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_pages(file_path):
+    """Yield the raw text of each page; PDFs are read one page at a time"""
+    lower = file_path.lower()
+    if lower.endswith(".pdf"):
+        reader = PdfReader(file_path)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+    elif lower.endswith(".docx"):
+        # DOCX has no fixed pagination, the whole body is one page
+        yield docx2txt.process(file_path) or ""
+    else:
+        raise ValueError(f"Unsupported CV format: {os.path.basename(file_path)}")
+
+
+def _cache_path(sha256):
+    return os.path.join(candidate_config.PARSED_TEXT_CACHE_DIR, sha256[:2], f"{sha256}.json")
+
+
+def _read_cache(sha256):
+    try:
+        with open(_cache_path(sha256), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(sha256, pages):
+    path = _cache_path(sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temp file and rename so concurrent workers never see half a file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(pages, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def cached_pages(sha256):
+    """Page texts parsed earlier from the file with this hash, or None"""
+    return _read_cache(sha256)
+
+
+def extract_pages(file_path, sha256=None):
+    """Page texts of a CV, served from the parsed-text cache when the same file was seen before.
+
+    Pass sha256 when it is already known (hashed during upload) to skip re-reading the file.
+    """
+    sha256 = sha256 or file_sha256(file_path)
+    pages = _read_cache(sha256)
+    if pages is None:
+        pages = list(iter_pages(file_path))
+        _write_cache(sha256, pages)
+    return pages
+
+
+def extract_text(file_path):
+    return "\n".join(extract_pages(file_path))
+
+
+_parse_executor = None
+
+
+def get_parse_executor():
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ProcessPoolExecutor(max_workers=candidate_config.BATCH_PARSE_WORKERS)
+    return _parse_executor
+
+
+def shutdown_parse_executor():
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+async def run_in_parse_pool(fn, *args):
+    """Run a CPU-heavy parsing function in a worker process so the event loop never blocks"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_executor(), fn, *args)
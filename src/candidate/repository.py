@@ -0,0 +1,328 @@
+import json
+
+from src.candidate import dedup
+from src.candidate.config import candidate_config
+from src.database.config import database_config
+from src.database.pagination import row_to_dict
+
+# SQL query to insert candidate profile
+INSERT_CANDIDATE_QUERY = '''
+    INSERT INTO candidate_profiles (
+        candidate_name, 
+        phone_number, 
+        email, 
+        degree, 
+        experience,
+        technical_skill,
+        responsibility,
+        certificate,
+        soft_skill,
+        comment,
+        job_recommended
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def candidate_to_params(result):
+    """Analysis result >>> INSERT parameters, lists are stored as JSON strings"""
+    return (
+        result["candidate_name"],
+        result["phone_number"],
+        result["email"],
+        json.dumps(result["degree"]),
+        json.dumps(result["experience"]),
+        json.dumps(result["technical_skill"]),
+        json.dumps(result["responsibility"]),
+        json.dumps(result["certificate"]),
+        json.dumps(result["soft_skill"]),
+        result["comment"],
+        json.dumps(result["job_recommended"]),
+    )
+
+
+# Profile list fields mirrored into indexed child tables: field -> (table, value column)
+CHILD_TABLES = {
+    "technical_skill": ("candidate_skills", "skill"),
+    "degree": ("candidate_degrees", "degree"),
+    "certificate": ("candidate_certificates", "certificate"),
+}
+
+# Longest normalized value that still fits an index key on SQL Server
+MAX_NORMALIZED_LENGTH = 450
+
+
+def normalize_value(value):
+    return " ".join(str(value).lower().split())[:MAX_NORMALIZED_LENGTH]
+
+
+def child_rows(candidate_id, values):
+    """[(candidate_id, value, value_norm)] with one row per distinct normalized value"""
+    distinct = {}
+    for value in values or []:
+        distinct.setdefault(normalize_value(value), str(value))
+    return [(candidate_id, value, norm) for norm, value in distinct.items() if norm]
+
+
+async def insert_child_rows(conn, candidate_id, result):
+    for field, (table, column) in CHILD_TABLES.items():
+        rows = child_rows(candidate_id, result.get(field))
+        if rows:
+            await conn.executemany(
+                f"INSERT INTO {table} (candidate_id, {column}, {column}_norm) VALUES (?, ?, ?)", rows
+            )
+
+
+async def delete_child_rows(conn, candidate_ids):
+    for table, _ in CHILD_TABLES.values():
+        await conn.executemany(f"DELETE FROM {table} WHERE candidate_id = ?", [(i,) for i in candidate_ids])
+
+
+# Deduplication columns of candidate_profiles: column -> (SQL Server type, SQLite type)
+DEDUP_COLUMNS = {
+    "content_hash": ("CHAR(64)", "TEXT"),
+    "cv_blob": ("VARCHAR(100)", "TEXT"),
+    "cv_minhash": ("VARCHAR(512)", "TEXT"),
+    "email_norm": ("NVARCHAR(320)", "TEXT"),
+    "phone_norm": ("VARCHAR(32)", "TEXT"),
+    "duplicate_of": ("INT", "INTEGER"),
+}
+
+# INSERT_CANDIDATE_QUERY plus the deduplication keys
+INSERT_FINGERPRINTED_CANDIDATE_QUERY = '''
+    INSERT INTO candidate_profiles (
+        candidate_name,
+        phone_number,
+        email,
+        degree,
+        experience,
+        technical_skill,
+        responsibility,
+        certificate,
+        soft_skill,
+        comment,
+        job_recommended,
+        content_hash,
+        cv_blob,
+        cv_minhash,
+        email_norm,
+        phone_norm,
+        duplicate_of
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+async def insert_candidate(conn, result, fingerprint=None, duplicate_of=None):
+    """Insert one profile and return its candidate_id.
+
+    With a dedup.fingerprint the hash, MinHash and contact keys are stored too,
+    so later uploads of the same CV can be recognised.
+    """
+    if fingerprint is None:
+        query = conn.backend.returning(INSERT_CANDIDATE_QUERY, "candidate_id")
+        row = await conn.fetchone(query, candidate_to_params(result))
+    else:
+        query = conn.backend.returning(INSERT_FINGERPRINTED_CANDIDATE_QUERY, "candidate_id")
+        row = await conn.fetchone(query, candidate_to_params(result) + (
+            fingerprint["content_hash"],
+            fingerprint.get("cv_blob"),
+            fingerprint["minhash"],
+            fingerprint["email_norm"],
+            fingerprint["phone_norm"],
+            duplicate_of,
+        ))
+    candidate_id = int(row[0])
+    if fingerprint is not None and fingerprint["band_keys"]:
+        await conn.executemany(
+            "INSERT INTO candidate_minhash_bands (candidate_id, band_key) VALUES (?, ?)",
+            [(candidate_id, key) for key in fingerprint["band_keys"]],
+        )
+    if database_config.NORMALIZED_SCHEMA:
+        await insert_child_rows(conn, candidate_id, result)
+    return candidate_id
+
+
+async def find_by_content_hash(conn, content_hash):
+    """The profile stored for these exact file bytes, or None"""
+    row = await conn.fetchone(SELECT_CANDIDATES_QUERY + " WHERE content_hash = ?", (content_hash,))
+    return row_to_candidate(row) if row is not None else None
+
+
+async def fetch_cv_blob(conn, candidate_id):
+    """Blob key of the CV a profile was analysed from; None when unknown, False when no such profile"""
+    row = await conn.fetchone("SELECT cv_blob FROM candidate_profiles WHERE candidate_id = ?", (candidate_id,))
+    return False if row is None else row[0]
+
+
+async def find_near_duplicates(conn, fingerprint, threshold):
+    """[{"candidate_id", "reason", "similarity"}] best first, for profiles that are probably the same person/CV.
+
+    Same normalized email or phone counts on its own; otherwise the candidates
+    sharing a MinHash band key are compared on their full signature. A CV
+    without extracted text has no signature and is only matched on contacts.
+    """
+    signature = dedup.decode_signature(fingerprint["minhash"]) if fingerprint["minhash"] else None
+    matches = {}
+
+    clauses, params = [], []
+    for column in ("email_norm", "phone_norm"):
+        if fingerprint[column]:
+            clauses.append(f"{column} = ?")
+            params.append(fingerprint[column])
+    if clauses:
+        rows = await conn.fetchall(
+            f"SELECT candidate_id, cv_minhash FROM candidate_profiles WHERE {' OR '.join(clauses)}", tuple(params)
+        )
+        for candidate_id, minhash in rows:
+            score = dedup.similarity(signature, dedup.decode_signature(minhash)) if minhash and signature is not None else None
+            matches[candidate_id] = {"candidate_id": candidate_id, "reason": "contact", "similarity": score}
+
+    keys = fingerprint["band_keys"]
+    if keys:
+        rows = await conn.fetchall(
+            f"SELECT p.candidate_id, p.cv_minhash FROM candidate_profiles p WHERE p.candidate_id IN ("
+            f"SELECT DISTINCT b.candidate_id FROM candidate_minhash_bands b "
+            f"WHERE b.band_key IN ({', '.join('?' for _ in keys)}))",
+            tuple(keys),
+        )
+        for candidate_id, minhash in rows:
+            if not minhash or candidate_id in matches:
+                continue
+            score = dedup.similarity(signature, dedup.decode_signature(minhash))
+            if score >= threshold:
+                matches[candidate_id] = {"candidate_id": candidate_id, "reason": "text", "similarity": score}
+
+    return sorted(matches.values(), key=lambda match: (-(match["similarity"] or 0), match["candidate_id"]))
+
+
+async def store_candidate(conn, result, fingerprint=None, threshold=None):
+    """insert_candidate, deduplicated when a fingerprint is given.
+
+    Returns (candidate_id, existing_profile, near_duplicates). existing_profile
+    is set, and nothing inserted, when the same file is already stored (e.g. a
+    concurrent upload finished first). The new row's duplicate_of points at the
+    closest near-duplicate.
+    """
+    if fingerprint is None:
+        return await insert_candidate(conn, result), None, []
+
+    existing = await find_by_content_hash(conn, fingerprint["content_hash"])
+    if existing is not None:
+        return existing["candidate_id"], existing, []
+    if threshold is None:
+        threshold = candidate_config.NEAR_DUPLICATE_THRESHOLD
+    near_duplicates = await find_near_duplicates(conn, fingerprint, threshold)
+    duplicate_of = near_duplicates[0]["candidate_id"] if near_duplicates else None
+    try:
+        candidate_id = await insert_candidate(conn, result, fingerprint, duplicate_of)
+    except Exception as e:
+        # A concurrent upload of the same bytes committed between the lookup and the insert;
+        # the failed INSERT is the first statement that writes, so the transaction stays usable
+        if not conn.backend.is_unique_violation(e):
+            raise
+        existing = await find_by_content_hash(conn, fingerprint["content_hash"])
+        if existing is None:
+            raise
+        return existing["candidate_id"], existing, []
+    return candidate_id, None, near_duplicates
+
+
+async def delete_minhash_bands(conn, candidate_ids):
+    await conn.executemany("DELETE FROM candidate_minhash_bands WHERE candidate_id = ?", [(i,) for i in candidate_ids])
+
+
+CANDIDATE_COLUMNS = [
+    "candidate_id",
+    "candidate_name",
+    "phone_number",
+    "email",
+    "degree",
+    "experience",
+    "technical_skill",
+    "responsibility",
+    "certificate",
+    "soft_skill",
+    "comment",
+    "job_recommended",
+]
+
+# JSON text columns and the value returned when they are NULL or empty
+CANDIDATE_JSON_COLUMNS = {
+    "degree": list,
+    "experience": list,
+    "technical_skill": list,
+    "responsibility": list,
+    "certificate": list,
+    "soft_skill": list,
+    "job_recommended": list,
+}
+
+SELECT_CANDIDATES_QUERY = f"SELECT {', '.join(CANDIDATE_COLUMNS)} FROM candidate_profiles"
+
+
+def row_to_candidate(row):
+    """candidate_profiles row >>> the dict returned by /candidate/get_all_candidates"""
+    return row_to_dict(CANDIDATE_COLUMNS, row, CANDIDATE_JSON_COLUMNS)
+
+
+async def fetch_candidates(conn, candidate_ids=None):
+    """All candidate profiles, or only the given ids"""
+    if not candidate_ids:
+        rows = await conn.fetchall(SELECT_CANDIDATES_QUERY)
+        return [row_to_candidate(row) for row in rows]
+
+    # SQL Server caps a statement at 2100 parameters
+    candidates = []
+    for start in range(0, len(candidate_ids), 1000):
+        chunk = tuple(candidate_ids[start:start + 1000])
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = await conn.fetchall(
+            SELECT_CANDIDATES_QUERY + f" WHERE candidate_id IN ({placeholders})", chunk
+        )
+        candidates.extend(row_to_candidate(row) for row in rows)
+    return candidates
+
+
+async def search_candidates(conn, skills=(), certificates=(), job_id=None, min_score=None, limit=100):
+    """Indexed lookup on the normalized child tables, e.g. candidates with Python and a score >= 70.
+
+    With job_id the results carry that job's score and come back best first.
+    """
+    select = "SELECT p.candidate_id, p.candidate_name, p.email"
+    source = " FROM candidate_profiles p"
+    clauses, params = [], []
+
+    if job_id is not None:
+        select += ", a.score"
+        source += " JOIN candidate_job_analysis a ON a.candidate_id = p.candidate_id AND a.job_id = ?"
+        params.append(job_id)
+        if min_score is not None:
+            clauses.append("a.score >= ?")
+            params.append(min_score)
+        order = " ORDER BY a.score DESC, p.candidate_id"
+    else:
+        if min_score is not None:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM candidate_job_analysis a WHERE a.candidate_id = p.candidate_id AND a.score >= ?)"
+            )
+            params.append(min_score)
+        order = " ORDER BY p.candidate_id"
+
+    for field, values in (("technical_skill", skills), ("certificate", certificates)):
+        table, column = CHILD_TABLES[field]
+        for value in values:
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM {table} c WHERE c.candidate_id = p.candidate_id AND c.{column}_norm = ?)"
+            )
+            params.append(normalize_value(value))
+
+    query = select + source
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += order + " " + conn.backend.limit_clause
+    params.append(limit)
+
+    rows = await conn.fetchall(query, tuple(params))
+    columns = ["candidate_id", "candidate_name", "email"] + (["score"] if job_id is not None else [])
+    return [dict(zip(columns, row)) for row in rows]
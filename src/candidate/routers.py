@@ -1,249 +1,504 @@
-from fastapi import APIRouter, Body, HTTPException, status, UploadFile, File
-from src.candidate import services
-from db import connectToDB
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from src.candidate import repository, services
+from src.candidate.config import candidate_config
+from src.database.config import database_config
+from src.candidate.schemas import CandidateProfile
+from src.candidate.uploads import UploadRejected, UploadTooLarge
+from src.database.pagination import build_keyset_query, json_response, parse_fields, row_to_dict, stream_ndjson
+from src.database.pool import db_pool, PoolError
+from src.llm.streaming import sse_event, sse_response
+from src.matching import repository as matching_repository
+from src.matching import services as matching_services
+from src.matching.config import matching_config
+from src.storage.blobs import blob_store
+from src.tasks.schemas import TaskOptions
+from src.tasks.services import submit_task, task_options
+import asyncio
 import json
+import os
 
 router = APIRouter()
 
 
+async def save_upload(save, file, **kwargs):
+    """Run services.save_cv_candidate/save_cv_archive, rejecting oversized or non-CV files before any parsing"""
+    try:
+        return await save(file=file, **kwargs)
+
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    except UploadRejected as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+
+
+async def find_duplicate(file_name):
+    """Stored profile of a byte-identical upload, None when new or DEDUPLICATE_UPLOADS is off"""
+    if not candidate_config.DEDUPLICATE_UPLOADS:
+        return None
+
+    try:
+        async with db_pool.connection() as conn:
+            return await repository.find_by_content_hash(conn, services.content_hash(file_name))
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching data: {str(e)}"
+        )
+
+
+def duplicate_headers(response, existing=None, near_duplicates=()):
+    if existing is not None:
+        response.headers["X-Duplicate-Of"] = str(existing["candidate_id"])
+    if near_duplicates:
+        response.headers["X-Near-Duplicate-Of"] = ",".join(str(match["candidate_id"]) for match in near_duplicates)
+
+
 # @router.post("/analyse", response_model=ResponseSchema)
 @router.post("/analyse")
-async def analyse_candidate_router(file: UploadFile = File(...)):
+async def analyse_candidate_router(
+    response: Response,
+    file: UploadFile = File(...),
+    options: TaskOptions = Depends(task_options),
+):
     # Save the uploaded file
-    file_name = await services.save_cv_candidate(file=file)
+    file_name = await save_upload(services.save_cv_candidate, file)
 
-    # Read the CV content
-    cv_content = services.read_cv_candidate(file_name=file_name)
+    # The exact same file was analysed before: answer with that profile, no parsing or LLM call
+    existing = await find_duplicate(file_name)
+    if existing is not None:
+        duplicate_headers(response, existing)
+        return existing
+
+    # ?background=true answers 202 right away, poll /tasks/{task_id} for the profile
+    if options.background:
+        return await submit_task(response, "candidate.analyse", {"file_name": file_name}, options)
+
+    # Read and compact the CV content in the parser process pool
+    cv_content, token_stats = await services.prepare_cv_candidate_async(file_name=file_name)
+    response.headers["X-CV-Tokens-Saved"] = str(token_stats["tokens_saved"])
 
     # Analyse the candidate's CV
-    result = services.analyse_candidate(cv_content=cv_content)
+    result = await services.analyse_candidate(cv_content=cv_content)
+
+    # Execute the query with the actual data; the transaction commits on success
+    # and rolls back on error before the connection goes back to the pool
+    try:
+        async with db_pool.transaction() as conn:
+            _, existing, near_duplicates = await repository.store_candidate(
+                conn, result, services.fingerprint_cv(file_name, cv_content, result)
+            )
 
-    # Connect to the database
-    cursor = connectToDB()
-    
-    if cursor is None:
+    except PoolError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
+            detail=f"Error connecting to the Database {e}"
         )
 
-    # SQL query to insert candidate profile
-    insert_query = '''
-        INSERT INTO candidate_profiles (
-            candidate_name, 
-            phone_number, 
-            email, 
-            degree, 
-            experience,
-            technical_skill,
-            responsibility,
-            certificate,
-            soft_skill,
-            comment,
-            job_recommended
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while inserting data into the database: {str(e)}"
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    '''
-    
-    # Extract values from the result dictionary
-    candidate_name = result["candidate_name"]
-    phone_number = result["phone_number"]
-    email = result["email"]
-    degree = json.dumps(result["degree"])  # Stringify the list
-    experience = json.dumps(result["experience"])  # Stringify the list
-    technical_skill = json.dumps(result["technical_skill"])  # Stringify the list
-    responsibility = json.dumps(result["responsibility"])  # Stringify the list
-    certificate = json.dumps(result["certificate"])  # Stringify the list
-    soft_skill = json.dumps(result["soft_skill"])  # Stringify the list
-    comment = result["comment"]
-    job_recommended = json.dumps(result["job_recommended"])  # Stringify the list
-
-    # Execute the query with the actual data
+
+    duplicate_headers(response, existing, near_duplicates)
+    return existing if existing is not None else result
+
+
+async def analyse_stream_events(file_name):
+    """SSE: "prepared" with token stats, one "field" per completed section, then "result" once persisted.
+
+    A byte-identical upload gets its stored profile as the only "result"; near-duplicates
+    are listed in the result's "near_duplicates".
+    """
+    try:
+        if candidate_config.DEDUPLICATE_UPLOADS:
+            async with db_pool.connection() as conn:
+                existing = await repository.find_by_content_hash(conn, services.content_hash(file_name))
+            if existing is not None:
+                yield sse_event("result", {"duplicate_of": existing["candidate_id"], **existing})
+                return
+
+        cv_content, token_stats = await services.prepare_cv_candidate_async(file_name=file_name)
+        yield sse_event("prepared", token_stats)
+
+        async for event, data in services.analyse_candidate_stream(cv_content=cv_content):
+            if event == "result":
+                result = data
+            else:
+                yield sse_event(event, data)
+
+        async with db_pool.transaction() as conn:
+            candidate_id, existing, near_duplicates = await repository.store_candidate(
+                conn, result, services.fingerprint_cv(file_name, cv_content, result)
+            )
+        if existing is not None:
+            yield sse_event("result", {"duplicate_of": candidate_id, **existing})
+        else:
+            yield sse_event("result", {"candidate_id": candidate_id, "near_duplicates": near_duplicates, **result})
+
+    except Exception as e:
+        yield sse_event("error", {"detail": f"An error occurred while analysing the candidate: {str(e)}"})
+
+
+@router.post("/analyse_stream")
+async def analyse_candidate_stream_router(file: UploadFile = File(...)):
+    # Same analysis as /analyse, but each section is pushed as soon as the model has written it
+    file_name = await save_upload(services.save_cv_candidate, file)
+    return sse_response(analyse_stream_events(file_name))
+
+
+@router.post("/analyse_match")
+async def analyse_match_router(
+    response: Response,
+    file: UploadFile = File(...),
+    job_ids: List[int] = Query([]),
+    options: TaskOptions = Depends(task_options),
+):
+    # Profile plus matching against the given jobs (default: the newest COMBINED_MAX_JOBS)
+    # in about one LLM call instead of one for the CV and one per job
+    if len(job_ids) > matching_config.COMBINED_MAX_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A CV can be matched against at most {matching_config.COMBINED_MAX_JOBS} jobs at once"
+        )
+
+    file_name = await save_upload(services.save_cv_candidate, file)
+
+    existing = await find_duplicate(file_name)
+    if existing is not None:
+        duplicate_headers(response, existing)
+        return existing
+
     try:
-        cursor.execute(insert_query, (
-            candidate_name, 
-            phone_number, 
-            email, 
-            degree, 
-            experience, 
-            technical_skill, 
-            responsibility, 
-            certificate, 
-            soft_skill, 
-            comment, 
-            job_recommended
-        ))
-        
-        # Commit the transaction
-        cursor.connection.commit()
-    
+        jobs = await matching_services.load_jobs(job_ids)
+        weights = await matching_services.load_weights_for_jobs([job["job_id"] for job in jobs], options.tenant)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
     except Exception as e:
-        # Rollback in case of error
-        cursor.connection.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred while inserting data into the database: {str(e)}"
+            detail=f"An error occurred while fetching data: {str(e)}"
         )
-    
-    finally:
-        # Close the cursor/connection to prevent connection leakage
-        cursor.close()
 
-    return result
+    missing = sorted(set(job_ids) - {job["job_id"] for job in jobs})
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job descriptions with ids {missing} not found"
+        )
 
+    if options.background:
+        payload = {"file_name": file_name, "job_ids": [job["job_id"] for job in jobs], "tenant": options.tenant}
+        return await submit_task(response, "candidate.analyse_match", payload, options)
 
-@router.get("/get_candidate/{candidate_id}")
-async def get_candidate_profile(candidate_id: int):
-    # Connect to the database
-    cursor = connectToDB()
-    
-    if cursor is None:
+    cv_content, token_stats = await services.prepare_cv_candidate_async(file_name=file_name)
+    response.headers["X-CV-Tokens-Saved"] = str(token_stats["tokens_saved"])
+
+    result, matches = await matching_services.analyse_candidate_jobs(cv_content, jobs, weights)
+
+    # The profile and every analysis commit together
+    try:
+        async with db_pool.transaction() as conn:
+            candidate_id, existing, near_duplicates = await repository.store_candidate(
+                conn, result, services.fingerprint_cv(file_name, cv_content, result)
+            )
+            await matching_repository.replace_candidate_analyses(conn, candidate_id, matches)
+
+    except PoolError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
+            detail=f"Error connecting to the Database {e}"
         )
 
-    # SQL query to fetch candidate profile by ID
-    select_query = '''
-        SELECT 
-            candidate_name, 
-            phone_number, 
-            email, 
-            degree, 
-            experience,
-            technical_skill,
-            responsibility,
-            certificate,
-            soft_skill,
-            comment,
-            job_recommended
-        FROM candidate_profiles
-        WHERE candidate_id = ?
-    '''
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while inserting data into the database: {str(e)}"
+        )
 
+    duplicate_headers(response, existing, near_duplicates)
+    profile = existing if existing is not None else result
+    return {
+        "candidate_id": candidate_id,
+        **profile,
+        "matches": [{"job_id": job_id, **analysis} for job_id, analysis in matches],
+    }
+
+
+async def analyse_batch_events(file_names):
+    """Yield one NDJSON line per file as it finishes, then a summary.
+
+    Each profile is committed as soon as its analysis is done, so a client
+    that disconnects mid-batch loses none of the analyses already paid for.
+    """
+    semaphore = asyncio.Semaphore(candidate_config.BATCH_LLM_CONCURRENCY)
+
+    async def process(file_name):
+        try:
+            if candidate_config.DEDUPLICATE_UPLOADS:
+                async with db_pool.connection() as conn:
+                    existing = await repository.find_by_content_hash(conn, services.content_hash(file_name))
+                if existing is not None:
+                    return file_name, existing, None, None, None
+            cv_content, token_stats = await services.prepare_cv_candidate_async(file_name=file_name)
+            async with semaphore:
+                result = await services.analyse_candidate(cv_content=cv_content)
+        except Exception as e:
+            return file_name, None, None, None, str(e)
+
+        try:
+            async with db_pool.transaction() as conn:
+                candidate_id, existing, _ = await repository.store_candidate(
+                    conn, result, services.fingerprint_cv(file_name, cv_content, result)
+                )
+        except Exception as e:
+            return file_name, None, None, None, f"An error occurred while inserting data into the database: {str(e)}"
+        if existing is not None:
+            # A concurrent upload of the same file was stored first
+            return file_name, existing, None, None, None
+        return file_name, result, token_stats, candidate_id, None
+
+    tasks = [asyncio.create_task(process(file_name)) for file_name in file_names]
+    inserted = 0
     try:
-        # Execute the query
-        cursor.execute(select_query, (candidate_id,))
-        
-        # Fetch the data from the database
-        candidate_data = cursor.fetchone()
-        
-        # If no data found, raise an error
-        if candidate_data is None:
+        for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+            file_name, result, token_stats, candidate_id, error = await task
+            event = {"file_name": file_name, "done": done, "total": len(tasks)}
+            if error is not None:
+                event.update(status="failed", error=error)
+            elif token_stats is None:
+                # Already stored, nothing to analyse or insert
+                event.update(status="duplicate", candidate_id=result["candidate_id"], candidate_name=result["candidate_name"])
+            else:
+                inserted += 1
+                event.update(
+                    status="analysed",
+                    candidate_id=candidate_id,
+                    candidate_name=result["candidate_name"],
+                    tokens_saved=token_stats["tokens_saved"],
+                )
+            yield json.dumps(event) + "\n"
+    finally:
+        # Stop outstanding work if the client goes away mid-stream
+        for task in tasks:
+            task.cancel()
+
+    yield json.dumps({"status": "committed", "inserted": inserted}) + "\n"
+
+
+@router.post("/analyse_batch")
+async def analyse_candidate_batch_router(files: List[UploadFile] = File(...)):
+    # Save every upload (zip archives are expanded) before the response starts streaming.
+    # The file limit is enforced before each save, archives by their entry count
+    file_names = []
+    for file in files:
+        remaining = candidate_config.BATCH_MAX_FILES - len(file_names)
+        if file.filename.lower().endswith(".zip"):
+            file_names.extend(await save_upload(services.save_cv_archive, file, max_files=remaining))
+        elif remaining > 0:
+            file_names.append(await save_upload(services.save_cv_candidate, file))
+        else:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Candidate with id {candidate_id} not found"
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"A batch can contain at most {candidate_config.BATCH_MAX_FILES} CVs"
             )
-        
-        # Map the result into a structured dictionary
-        candidate_profile = {
-            "candidate_name": candidate_data[0],
-            "phone_number": candidate_data[1],
-            "email": candidate_data[2],
-            "degree": json.loads(candidate_data[3]) if candidate_data[3] else [],  # Parse only if not NULL or empty
-            "experience": json.loads(candidate_data[4]) if candidate_data[4] else [],  # Parse only if not NULL or empty
-            "technical_skill": json.loads(candidate_data[5]) if candidate_data[5] else [],  # Parse only if not NULL or empty
-            "responsibility": json.loads(candidate_data[6]) if candidate_data[6] else [],  # Parse only if not NULL or empty
-            "certificate": json.loads(candidate_data[7]) if candidate_data[7] else [],  # Parse only if not NULL or empty
-            "soft_skill": json.loads(candidate_data[8]) if candidate_data[8] else [],  # Parse only if not NULL or empty
-            "comment": candidate_data[9],
-            "job_recommended": json.loads(candidate_data[10]) if candidate_data[10] else []  # Part JSON string back to list
-        }
-
-        # Return the structured data as JSON response
-        return candidate_profile
-    
+
+    if not file_names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No PDF or DOCX files found in the upload"
+        )
+
+    return StreamingResponse(analyse_batch_events(file_names), media_type="application/x-ndjson")
+
+
+@router.get("/get_candidate/{candidate_id}", response_model=CandidateProfile, response_model_exclude_unset=True)
+async def get_candidate_profile(candidate_id: int):
+    # Every column except the id, which the caller already has
+    columns = repository.CANDIDATE_COLUMNS[1:]
+    select_query = f"SELECT {', '.join(columns)} FROM candidate_profiles WHERE candidate_id = ?"
+
+    try:
+        # Execute the query and fetch the data from the database
+        async with db_pool.connection() as conn:
+            candidate_data = await conn.fetchone(select_query, (candidate_id,))
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while fetching data: {str(e)}"
         )
-    
-    finally:
-        # Close cursor and connection to avoid leaks
-        cursor.close()
-
-@router.get("/get_all_candidates")
-async def get_all_candidate_profiles():
-    # Connect to the database
-    cursor = connectToDB()
-    if cursor["status"] is None:
+
+    # If no data found, raise an error
+    if candidate_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Candidate with id {candidate_id} not found"
+        )
+
+    # JSON columns are copied into the response without being parsed
+    return json_response(row_to_dict(columns, candidate_data, repository.CANDIDATE_JSON_COLUMNS, raw=True))
+
+CV_MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+@router.get("/get_cv/{candidate_id}")
+async def get_candidate_cv(candidate_id: int):
+    # Profiles reference their CV by blob key (DEDUPLICATE_UPLOADS schema)
+    if not candidate_config.DEDUPLICATE_UPLOADS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error connecting to the Database {cursor['error']}"
+            detail="Stored CVs are linked to profiles once `python -m src.database.migrations` has run and DEDUPLICATE_UPLOADS=true"
         )
-    # SQL query to fetch all candidate profiles
-    select_query = '''
-        SELECT 
-            candidate_id,
-            candidate_name, 
-            phone_number, 
-            email, 
-            degree, 
-            experience,
-            technical_skill,
-            responsibility,
-            certificate,
-            soft_skill,
-            comment,
-            job_recommended
-        FROM candidate_profiles
-    '''
 
     try:
-        # Execute the query
-        cursor.execute(select_query)
-        
-        # Fetch all the data from the database
-        candidate_data = cursor.fetchall()
-
-        # If no data is found, return an empty list
-        if not candidate_data:
-            return []
-
-        # Map the result into a structured list of dictionaries
-        candidates = []
-        for row in candidate_data:
-            candidate_profile = {
-                "candidate_id": row[0],
-                "candidate_name": row[1],
-                "phone_number": row[2],
-                "email": row[3],
-                "degree": json.loads(row[4]),  # Convert JSON string back to list
-                "experience": json.loads(row[5]),  # Convert JSON string back to list
-                "technical_skill": json.loads(row[6]),  # Convert JSON string back to list
-                "responsibility": json.loads(row[7]),  # Convert JSON string back to list
-                "certificate": json.loads(row[8]),  # Convert JSON string back to list
-                "soft_skill": json.loads(row[9]),  # Convert JSON string back to list
-                "comment": row[10],
-                "job_recommended": json.loads(row[11])  # Convert JSON string back to list
-            }
-            candidates.append(candidate_profile)
-
-        # Return the structured data as a list of JSON objects
-        return candidates
-    
+        async with db_pool.connection() as conn:
+            cv_blob = await repository.fetch_cv_blob(conn, candidate_id)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while fetching data: {str(e)}"
         )
-    
-    finally:
-        # Close cursor and connection to avoid leaks
-        cursor.close()
 
+    if cv_blob is False:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Candidate with id {candidate_id} not found"
+        )
+    if not cv_blob or not await asyncio.to_thread(blob_store.exists, cv_blob):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No stored CV for candidate {candidate_id}"
+        )
 
-@router.delete("/delete_candidate/{candidate_id}")
-async def delete_candidate(candidate_id: int):
-    # Connect to the database
-    cursor = connectToDB()
-    if cursor is None:
+    # Streamed in STORAGE_CHUNK_SIZE pieces (decompressed on the fly), Starlette iterates it in a thread
+    extension = os.path.splitext(cv_blob)[1]
+    return StreamingResponse(
+        blob_store.iter_chunks(cv_blob),
+        media_type=CV_MEDIA_TYPES.get(extension, "application/octet-stream"),
+        headers={"Content-Disposition": f'attachment; filename="candidate-{candidate_id}{extension}"'},
+    )
+
+
+@router.get("/get_all_candidates", response_model=List[CandidateProfile], response_model_exclude_unset=True)
+async def get_all_candidate_profiles(
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=database_config.MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    stream: bool = False,
+):
+    # Keyset pagination: pass the X-Next-Cursor header back as after_id for the next page
+    try:
+        columns = parse_fields(fields, repository.CANDIDATE_COLUMNS, "candidate_id")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    select_query, params = build_keyset_query(
+        "candidate_profiles", columns, "candidate_id", after=after_id, limit=limit
+    )
+
+    # NDJSON streamed in fetchmany batches, memory stays flat regardless of table size
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(select_query, params, columns, repository.CANDIDATE_JSON_COLUMNS),
+            media_type="application/x-ndjson",
+        )
+
+    try:
+        # Execute the query and fetch the page from the database
+        async with db_pool.connection() as conn:
+            candidate_data = await conn.fetchall(select_query, params)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching data: {str(e)}"
+        )
+
+    # Map the result into a list of dictionaries, JSON columns passed through unparsed
+    candidates = [row_to_dict(columns, row, repository.CANDIDATE_JSON_COLUMNS, raw=True) for row in candidate_data]
+
+    headers = {}
+    if limit is not None and len(candidates) == limit:
+        headers["X-Next-Cursor"] = str(candidates[-1]["candidate_id"])
+
+    return json_response(candidates, headers=headers)
+
+
+@router.get("/search")
+async def search_candidate_profiles(
+    skill: List[str] = Query([]),
+    certificate: List[str] = Query([]),
+    job_id: Optional[int] = None,
+    min_score: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=database_config.MAX_PAGE_SIZE),
+):
+    # e.g. /candidate/search?skill=Python&job_id=3&min_score=70
+    if not database_config.NORMALIZED_SCHEMA:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search needs the normalized schema: run `python -m src.database.migrations` and set NORMALIZED_SCHEMA=true"
+        )
+
+    try:
+        async with db_pool.connection() as conn:
+            return await repository.search_candidates(
+                conn, skills=skill, certificates=certificate, job_id=job_id, min_score=min_score, limit=limit
+            )
+
+    except PoolError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
+            detail=f"Error connecting to the Database {e}"
         )
 
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching data: {str(e)}"
+        )
+
+
+@router.delete("/delete_candidate/{candidate_id}")
+async def delete_candidate(candidate_id: int):
     # SQL query to delete the candidate profile by ID
     delete_query = '''
         DELETE FROM candidate_profiles
@@ -251,29 +506,31 @@ async def delete_candidate(candidate_id: int):
     '''
 
     try:
-        # Execute the deletion query
-        cursor.execute(delete_query, (candidate_id,))
-        
-        # Check if any row was deleted
-        if cursor.rowcount == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Candidate not found"
-            )
-
-        # Commit the transaction to reflect changes
-        cursor.commit()
+        # Execute the deletion query; committed when the block succeeds
+        async with db_pool.transaction() as conn:
+            deleted = await conn.execute(delete_query, (candidate_id,))
+            if database_config.NORMALIZED_SCHEMA:
+                await repository.delete_child_rows(conn, [candidate_id])
+            if candidate_config.DEDUPLICATE_UPLOADS:
+                await repository.delete_minhash_bands(conn, [candidate_id])
 
-        return {"detail": "Candidate deleted successfully"}
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
 
     except Exception as e:
-        # Rollback in case of error
-        cursor.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while deleting the candidate: {str(e)}"
         )
 
-    finally:
-        # Close cursor and connection to avoid leaks
-        cursor.close()
+    # Check if any row was deleted
+    if deleted == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Candidate not found"
+        )
+
+    return {"detail": "Candidate deleted successfully"}
@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class CandidateProfile(BaseModel):
+    # Every field is optional because ?fields= can project any subset
+    candidate_id: Optional[int] = None
+    candidate_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    email: Optional[str] = None
+    degree: Optional[List[str]] = None
+    experience: Optional[List[str]] = None
+    technical_skill: Optional[List[str]] = None
+    responsibility: Optional[List[str]] = None
+    certificate: Optional[List[str]] = None
+    soft_skill: Optional[List[str]] = None
+    comment: Optional[str] = None
+    job_recommended: Optional[List[str]] = None
@@ -1,79 +1,145 @@
-import json
-import os
+import asyncio
+import logging
 import time
-import jsbeautifier
 from langchain.schema import HumanMessage, SystemMessage
-from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
-from langchain_openai import ChatOpenAI
+from src.cache.store import llm_cache, make_cache_key, prompt_fingerprint
+from src.candidate.compaction import compact_cv
 from src.candidate.config import candidate_config
+from src.candidate.dedup import fingerprint
+from src.candidate.extraction import cached_pages, extract_pages, run_in_parse_pool
 from src.candidate.prompts import fn_candidate_analysis, system_prompt_candidate
+from src.candidate.uploads import UploadTooLarge, store_cv_archive, store_cv_stream
+from src.llm.routing import build_route
+from src.llm.streaming import field_event
+from src.storage.blobs import blob_store, content_hash
+from src.telemetry.instrument import record_cache_lookup, stage
 import datetime
 
+LOGGER = logging.getLogger(__name__)
 
-async def save_cv_candidate(file):
-    # Prepend the current datetime to the filename
-    file_name = file.filename
+# Bumps automatically whenever the prompt or function schema is edited
+PROMPT_VERSION = prompt_fingerprint(system_prompt_candidate, fn_candidate_analysis)
 
-    # Construct the full image path based on the settings
-    image_path = candidate_config.CV_UPLOAD_DIR + file_name
+ROUTE = build_route(
+    "candidate",
+    candidate_config.CANDIDATE_MODEL_TIERS,
+    candidate_config.MODEL_NAME,
+    candidate_config.CANDIDATE_MIN_COMPLETENESS,
+)
 
-    # Read the contents of the uploaded file asynchronously
-    contents = await file.read()
 
-    # Write the uploaded contents to the specified image path
-    with open(image_path, "wb") as f:
-        f.write(contents)
+def check_upload_size(file, max_bytes):
+    # Starlette knows the spooled size already, reject before copying anything
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"{file.filename} is larger than {max_bytes} bytes")
 
-    return file_name
 
+async def save_cv_candidate(file):
+    """Stream the upload into blob_store under its content hash, see uploads.store_cv_stream"""
+    check_upload_size(file, candidate_config.CV_MAX_UPLOAD_BYTES)
+    # The copy runs in a thread: the spooled upload may be on disk and the write is blocking
+    with stage("upload"):
+        return await asyncio.to_thread(store_cv_stream, file.file, file.filename)
 
-def output2json(output):
-    """GPT Output Object >>> json"""
-    opts = jsbeautifier.default_options()
-    return json.loads(jsbeautifier.beautify(output["function_call"]["arguments"], opts))
 
-def load_pdf_docx(file_path):
-    # Determine the file type and choose the appropriate loader
-    if os.path.basename(file_path).lower().endswith((".pdf", ".docx")):
-        loader = (
-            PyPDFLoader(file_path)
-            if file_path.lower().endswith(".pdf")
-            else Docx2txtLoader(file_path)
-        )
+async def save_cv_archive(file, max_files=None):
+    """Extract every PDF/DOCX from an uploaded zip into the upload dir, at most max_files of them"""
+    check_upload_size(file, candidate_config.ARCHIVE_MAX_UPLOAD_BYTES)
+    # The spooled upload is seekable, so the zip is read in place instead of into memory
+    with stage("upload"):
+        return await asyncio.to_thread(store_cv_archive, file.file, None, max_files)
 
-    # Load and split the document using the selected loader
-    documents = loader.load_and_split()
 
-    return documents
+def load_cv_pages(file_name):
+    """(page texts, parsed-text cache hit) of a stored CV; the blob is only fetched on a miss"""
+    sha256 = content_hash(file_name)
+    pages = cached_pages(sha256) if sha256 else None
+    if pages is not None:
+        return pages, True
+    with blob_store.local_path(file_name) as file_path:
+        return extract_pages(file_path=file_path, sha256=sha256), False
 
 
 def read_cv_candidate(file_name):
-    file_path = candidate_config.CV_UPLOAD_DIR + file_name
+    pages, _ = load_cv_pages(file_name)
+    return "\n".join(pages)
+
+
+async def read_cv_candidate_async(file_name):
+    """read_cv_candidate in a worker process so PDF parsing never blocks the event loop"""
+    return await run_in_parse_pool(read_cv_candidate, file_name)
+
+
+def prepare_cv_candidate(file_name):
+    """Extracted CV text with repeated headers/footers and whitespace removed, fitted to CV_TOKEN_BUDGET"""
+    pages, cache_hit = load_cv_pages(file_name)
+    cv_content, stats = compact_cv(pages, budget=candidate_config.CV_TOKEN_BUDGET, model=ROUTE.models[0])
+    # Counters live in the API process, so the hit travels back with the stats
+    return cv_content, {**stats, "parse_cache_hit": cache_hit}
+
+
+async def prepare_cv_candidate_async(file_name):
+    """prepare_cv_candidate in a worker process; returns (cv_content, token stats)"""
+    with stage("parse"):
+        cv_content, stats = await run_in_parse_pool(prepare_cv_candidate, file_name)
+    record_cache_lookup("parsed_text", stats["parse_cache_hit"])
+    LOGGER.info(
+        f"CV {file_name}: {stats['tokens_before']} -> {stats['tokens_after']} tokens ({stats['tokens_saved']} saved)"
+    )
+    return cv_content, stats
 
-    documents = load_pdf_docx(file_path=file_path)
-    content = ""
-    for page in documents:
-        content += page.page_content
-    return content
 
+def fingerprint_cv(file_name, cv_content, result):
+    """dedup.fingerprint of an analysed CV to store with its profile, None unless DEDUPLICATE_UPLOADS"""
+    if not candidate_config.DEDUPLICATE_UPLOADS:
+        return None
+    # The profile keeps the blob key, so its CV can be fetched from blob_store later
+    return {**fingerprint(content_hash(file_name), cv_content, result), "cv_blob": file_name}
 
-def analyse_candidate(cv_content):
-    # start = time.time()
-    # LOGGER.info("Start analyse candidate")
 
-    llm = ChatOpenAI(model=candidate_config.MODEL_NAME, temperature=0.5, openai_api_key=os.getenv(key="OPENAI_API_KEY"))
-    completion = llm.predict_messages(
-        [
+async def analyse_candidate(cv_content):
+    start = time.time()
+    LOGGER.info("Start analyse candidate")
+
+    # The same CV re-uploaded is answered from the cache without an LLM call
+    cache_key = make_cache_key("candidate", ROUTE.cache_id, PROMPT_VERSION, cv_content)
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    json_output = await ROUTE.complete(
+        messages=[
             SystemMessage(content=system_prompt_candidate),
             HumanMessage(content=cv_content),
         ],
         functions=fn_candidate_analysis,
     )
+    await llm_cache.set(cache_key, json_output)
+
+    LOGGER.info("Done analyse candidate")
+    LOGGER.info(f"Time analyse candidate: {time.time() - start}")
 
-    output_analysis = completion.additional_kwargs
-    json_output = output2json(output=output_analysis)
+    return json_output
 
-    # LOGGER.info("Done analyse candidate")
-    # LOGGER.info(f"Time analyse candidate: {time.time() - start}")
 
-    return json_output
\ No newline at end of file
+async def analyse_candidate_stream(cv_content):
+    """analyse_candidate as ("field", {"name", "value"}) events while the model streams, then ("result", json_output)"""
+    cache_key = make_cache_key("candidate", ROUTE.cache_id, PROMPT_VERSION, cv_content)
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        for name, value in cached.items():
+            yield field_event(name, value)
+        yield "result", cached
+        return
+
+    events = ROUTE.stream(
+        messages=[
+            SystemMessage(content=system_prompt_candidate),
+            HumanMessage(content=cv_content),
+        ],
+        functions=fn_candidate_analysis,
+    )
+    async for event, data in events:
+        if event == "result":
+            await llm_cache.set(cache_key, data)
+        yield event, data
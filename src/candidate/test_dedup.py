@@ -0,0 +1,111 @@
+import asyncio
+
+from src.candidate import dedup, repository
+from src.database.backends import SQLiteBackend
+from src.database.migrations import apply_schema
+from src.database.pool import ConnectionPool
+
+CV = (
+    "Senior backend engineer with eight years of Python, FastAPI and SQL Server experience. "
+    "Designed event driven pipelines, led a team of five and migrated billing to Kubernetes. "
+    "Holds an AWS Solutions Architect certificate and a BSc in Computer Science."
+)
+
+PROFILE = {
+    "candidate_name": "Jane Doe",
+    "phone_number": "+84 912 345 678",
+    "email": "Jane.Doe@Example.com",
+    "degree": ["BSc Computer Science"],
+    "experience": ["8 years backend"],
+    "technical_skill": ["Python", "SQL"],
+    "responsibility": ["Led a team"],
+    "certificate": ["AWS SA"],
+    "soft_skill": ["Teamwork"],
+    "comment": "",
+    "job_recommended": [],
+}
+
+
+def run(tmp_path, scenario):
+    async def main():
+        pool = ConnectionPool(backend=SQLiteBackend(str(tmp_path / "db.sqlite3")), min_size=0)
+        try:
+            async with pool.connection() as conn:
+                await apply_schema(conn, "sqlite")
+                return await scenario(conn)
+        finally:
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+def test_signature_is_stable_and_close_for_edited_text():
+    signature = dedup.minhash_signature(CV)
+    assert dedup.similarity(signature, dedup.minhash_signature(CV)) == 1.0
+    assert dedup.similarity(signature, dedup.decode_signature(dedup.encode_signature(signature))) == 1.0
+
+    edited = dedup.minhash_signature(CV.replace("team of five", "team of six"))
+    unrelated = dedup.minhash_signature("Pastry chef trained in Lyon, specialised in laminated doughs and sugar work.")
+    assert dedup.similarity(signature, edited) > 0.5
+    assert dedup.similarity(signature, unrelated) < 0.2
+    assert set(dedup.band_keys(signature)) & set(dedup.band_keys(edited))
+
+
+def test_textless_cv_has_no_signature():
+    assert dedup.minhash_signature("") is None
+    assert dedup.minhash_signature("  -- \n ") is None
+    fingerprint = dedup.fingerprint("0" * 64, "", {})
+    assert fingerprint["minhash"] is None
+    assert fingerprint["band_keys"] == []
+
+
+def test_contact_normalization():
+    assert dedup.normalize_phone("+84 912 345 678") == dedup.normalize_phone("0912345678")
+    assert dedup.normalize_phone("12") is None
+    assert dedup.normalize_email(" Jane.Doe@Example.com ") == "jane.doe@example.com"
+    assert dedup.normalize_email("n/a") is None
+
+
+def test_store_candidate_links_near_duplicates(tmp_path):
+    async def scenario(conn):
+        first = dedup.fingerprint("a" * 64, CV, PROFILE)
+        first_id, _, _ = await repository.store_candidate(conn, PROFILE, first)
+        again_id, existing, _ = await repository.store_candidate(conn, PROFILE, dict(first))
+
+        other = {**PROFILE, "email": "someone@else.com", "phone_number": ""}
+        edited = dedup.fingerprint("b" * 64, CV.replace("team of five", "team of six"), other)
+        edited_id, _, near = await repository.store_candidate(conn, other, edited, threshold=0.5)
+        duplicate_of = await conn.fetchone("SELECT duplicate_of FROM candidate_profiles WHERE candidate_id = ?", (edited_id,))
+        await conn.commit()
+        return first_id, again_id, existing, edited_id, near, duplicate_of[0]
+
+    first_id, again_id, existing, edited_id, near, duplicate_of = run(tmp_path, scenario)
+    assert again_id == first_id and existing["candidate_id"] == first_id
+    assert edited_id != first_id
+    assert [(match["candidate_id"], match["reason"]) for match in near] == [(first_id, "text")]
+    assert duplicate_of == first_id
+
+
+def test_store_candidate_returns_the_winner_of_a_concurrent_insert(tmp_path, monkeypatch):
+    fingerprint = dedup.fingerprint("c" * 64, CV, PROFILE)
+    lookup = repository.find_by_content_hash
+    calls = []
+
+    async def racing_lookup(conn, content_hash):
+        # The first lookup runs before the other upload commits
+        calls.append(content_hash)
+        return None if len(calls) == 1 else await lookup(conn, content_hash)
+
+    async def scenario(conn):
+        winner_id = await repository.insert_candidate(conn, PROFILE, fingerprint)
+        await conn.commit()
+        monkeypatch.setattr(repository, "find_by_content_hash", racing_lookup)
+        candidate_id, existing, near = await repository.store_candidate(conn, PROFILE, dict(fingerprint))
+        count = await conn.fetchone("SELECT COUNT(*) FROM candidate_profiles")
+        return winner_id, candidate_id, existing, near, count[0]
+
+    winner_id, candidate_id, existing, near, count = run(tmp_path, scenario)
+    assert len(calls) == 2
+    assert candidate_id == winner_id and existing["candidate_id"] == winner_id
+    assert near == []
+    assert count == 1
@@ -0,0 +1,97 @@
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from src.candidate import uploads
+from src.candidate.uploads import (
+    UnsupportedUpload,
+    UploadTooLarge,
+    sniff_extension,
+    store_cv_archive,
+    store_cv_stream,
+)
+from src.storage.blobs import LocalBlobStore
+
+PDF = b"%PDF-1.4\n" + b"x" * 100
+
+
+@pytest.fixture
+def blob_store(tmp_path, monkeypatch):
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(uploads, "blob_store", store)
+    return store
+
+
+def archive(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("head, name, expected", [
+    (PDF, "cv.docx", ".pdf"),
+    (b"junk" * 10 + PDF, "cv", ".pdf"),
+    (b"PK\x03\x04rest", "cv.docx", ".docx"),
+])
+def test_sniff_extension(head, name, expected):
+    assert sniff_extension(head, name) == expected
+
+
+@pytest.mark.parametrize("head, name", [
+    (b"PK\x03\x04rest", "cv.zip"),
+    (b"MZ\x90\x00", "cv.pdf"),
+])
+def test_sniff_rejects(head, name):
+    with pytest.raises(UnsupportedUpload):
+        sniff_extension(head, name)
+
+
+def test_stream_is_stored_under_its_hash(blob_store):
+    first = store_cv_stream(io.BytesIO(PDF), "a.pdf")
+    second = store_cv_stream(io.BytesIO(PDF), "b.pdf")
+    assert first == second
+    assert first.endswith(".pdf") and len(first) == 64 + 4
+    assert blob_store.exists(first)
+
+
+def test_stream_size_limit(blob_store):
+    with pytest.raises(UploadTooLarge):
+        store_cv_stream(io.BytesIO(PDF), "a.pdf", max_bytes=50)
+    with pytest.raises(UnsupportedUpload):
+        store_cv_stream(io.BytesIO(b""), "a.pdf")
+    # Nothing half-written is left in staging
+    assert list(Path(blob_store.staging_dir).glob("*.part")) == []
+
+
+def test_archive_skips_non_cvs_and_duplicates(blob_store):
+    source = archive([
+        ("folder/a.pdf", PDF),
+        ("b.pdf", PDF),
+        ("notes.txt", b"hello"),
+        ("fake.pdf", b"not a pdf"),
+        ("big.pdf", PDF + b"y" * 100),
+    ])
+    assert len(store_cv_archive(source, max_bytes=150)) == 1
+
+
+def test_archive_over_the_file_limit_is_rejected_before_extraction(blob_store, monkeypatch):
+    stored = []
+    monkeypatch.setattr(uploads, "store_cv_stream", lambda *args: stored.append(args))
+    source = archive([(f"{i}.pdf", PDF) for i in range(3)] + [("readme.txt", b"x")])
+    with pytest.raises(UploadTooLarge):
+        store_cv_archive(source, max_files=2)
+    assert stored == []
+
+    source.seek(0)
+    store_cv_archive(source, max_files=3)
+    assert len(stored) == 3
+
+
+def test_invalid_archive(blob_store):
+    with pytest.raises(UnsupportedUpload):
+        store_cv_archive(io.BytesIO(b"not a zip"))
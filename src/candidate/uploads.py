@@ -0,0 +1,115 @@
+"""Blocking upload copy, run in a thread by services.save_cv_candidate/save_cv_archive.
+
+The upload is copied in UPLOAD_CHUNK_SIZE pieces, hashed on the way and
+written to a temp file in the blob store's staging directory, which is
+handed to blob_store under <sha256><extension> once complete. Memory per
+upload is one chunk, and a reader never sees a half-written CV.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import zipfile
+
+from src.candidate.config import candidate_config
+from src.storage.blobs import blob_store
+
+LOGGER = logging.getLogger(__name__)
+
+# Leading bytes >>> stored extension
+_PDF_MAGIC = b"%PDF-"
+_ZIP_MAGIC = b"PK\x03\x04"
+
+
+class UploadRejected(ValueError):
+    pass
+
+
+class UploadTooLarge(UploadRejected):
+    pass
+
+
+class UnsupportedUpload(UploadRejected):
+    pass
+
+
+def sniff_extension(head, file_name):
+    """Extension from the file's own bytes, whatever the client named or labelled it"""
+    # PDF readers accept junk before the header, so look at the first KB
+    if _PDF_MAGIC in head[:1024]:
+        return ".pdf"
+    # DOCX is a zip; only trust it when the name agrees, a bare zip is not a CV
+    if head.startswith(_ZIP_MAGIC) and (file_name or "").lower().endswith(".docx"):
+        return ".docx"
+    raise UnsupportedUpload(f"{file_name} is not a PDF or DOCX file")
+
+
+def store_cv_stream(source, file_name, max_bytes=None):
+    """Copy a binary file object into blob_store, returning its <sha256><extension> key"""
+    max_bytes = max_bytes or candidate_config.CV_MAX_UPLOAD_BYTES
+    chunk_size = candidate_config.UPLOAD_CHUNK_SIZE
+    digest = hashlib.sha256()
+    size = 0
+    extension = None
+
+    fd, tmp_path = tempfile.mkstemp(dir=blob_store.staging_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                if extension is None:
+                    extension = sniff_extension(chunk, file_name)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"{file_name} is larger than {max_bytes} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+        if extension is None:
+            raise UnsupportedUpload(f"{file_name} is empty")
+
+        stored_name = digest.hexdigest() + extension
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    # Same key means same bytes: a CV stored before is not written (or uploaded) again
+    if blob_store.exists(stored_name):
+        os.unlink(tmp_path)
+    else:
+        blob_store.put_file(stored_name, tmp_path)
+    return stored_name
+
+
+def store_cv_archive(source, max_bytes=None, max_files=None):
+    """Store every PDF/DOCX of a zip file object; entries that are not CVs or too large are skipped.
+
+    An archive with more than max_files CVs is rejected from its directory
+    alone, before anything is extracted.
+    """
+    max_bytes = max_bytes or candidate_config.CV_MAX_UPLOAD_BYTES
+    file_names = []
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise UnsupportedUpload("The archive is not a valid zip file") from None
+    with archive:
+        # Flatten folders and ignore anything that isn't a CV
+        entries = [
+            (entry, os.path.basename(entry.filename))
+            for entry in archive.infolist()
+            if not entry.is_dir() and entry.filename.lower().endswith(candidate_config.CV_EXTENSIONS)
+        ]
+        if max_files is not None and len(entries) > max_files:
+            raise UploadTooLarge(f"A batch can contain at most {candidate_config.BATCH_MAX_FILES} CVs")
+        for entry, file_name in entries:
+            # The declared size is checked up front, the real one while streaming (zip bombs)
+            if entry.file_size > max_bytes:
+                LOGGER.warning(f"Skipped {file_name} from archive: larger than {max_bytes} bytes")
+                continue
+            try:
+                with archive.open(entry) as member:
+                    file_names.append(store_cv_stream(member, file_name, max_bytes))
+            except UploadRejected as e:
+                LOGGER.warning(f"Skipped {file_name} from archive: {e}")
+
+    # The same CV twice in one archive is analysed once
+    return list(dict.fromkeys(file_names))
@@ -0,0 +1,147 @@
+import sqlite3
+
+from src.database.config import database_config
+
+# Tables used by the routers, created on demand by the SQLite stand-in.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidate_profiles (
+    candidate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_name TEXT,
+    phone_number TEXT,
+    email TEXT,
+    degree TEXT,
+    experience TEXT,
+    technical_skill TEXT,
+    responsibility TEXT,
+    certificate TEXT,
+    soft_skill TEXT,
+    comment TEXT,
+    job_recommended TEXT,
+    content_hash TEXT,
+    cv_blob TEXT,
+    cv_minhash TEXT,
+    email_norm TEXT,
+    phone_norm TEXT,
+    duplicate_of INTEGER
+);
+
+-- Upload deduplication (src/candidate/dedup.py); the candidate_profiles
+-- hash/contact indexes are created by src.database.migrations, which also
+-- adds the columns to databases created before them
+CREATE TABLE IF NOT EXISTS candidate_minhash_bands (
+    candidate_id INTEGER NOT NULL,
+    band_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_candidate_minhash_bands_key ON candidate_minhash_bands (band_key, candidate_id);
+CREATE INDEX IF NOT EXISTS ix_candidate_minhash_bands_candidate ON candidate_minhash_bands (candidate_id);
+
+CREATE TABLE IF NOT EXISTS job_descriptions (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_name TEXT,
+    certificate TEXT,
+    degree TEXT,
+    experience TEXT,
+    responsibility TEXT,
+    soft_skill TEXT,
+    technical_skill TEXT
+);
+
+CREATE TABLE IF NOT EXISTS candidate_job_analysis (
+    candidate_id INTEGER,
+    job_id INTEGER,
+    certificate TEXT,
+    degree TEXT,
+    experience TEXT,
+    responsibility TEXT,
+    technical_skill TEXT,
+    soft_skill TEXT,
+    summary_comment TEXT,
+    score REAL
+);
+
+-- Score-ordered top-K per job, see build_ranked_query
+CREATE INDEX IF NOT EXISTS ix_candidate_job_analysis_job_score
+    ON candidate_job_analysis (job_id, score DESC, candidate_id);
+
+CREATE TABLE IF NOT EXISTS candidate_embeddings (
+    candidate_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (candidate_id, model)
+);
+
+CREATE TABLE IF NOT EXISTS scoring_weights (
+    scope TEXT NOT NULL,
+    scope_key TEXT NOT NULL,
+    weights TEXT NOT NULL,
+    PRIMARY KEY (scope, scope_key)
+);
+"""
+
+
+class MSSQLBackend:
+    """SQL Server through pyodbc, using the connection string from db.py"""
+
+    name = "mssql"
+    # Appended after ORDER BY, takes the row count as its parameter
+    limit_clause = "OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
+
+    def connect(self):
+        import pyodbc
+        from db import connectionString
+
+        return pyodbc.connect(connectionString)
+
+    def returning(self, insert_query, column):
+        """INSERT statement that also returns the generated key"""
+        return insert_query.replace("VALUES", f"OUTPUT INSERTED.{column} VALUES", 1)
+
+    def is_disconnect(self, error):
+        import pyodbc
+
+        return isinstance(error, (pyodbc.OperationalError, pyodbc.InterfaceError))
+
+    def is_unique_violation(self, error):
+        import pyodbc
+
+        # 2627: unique constraint, 2601: unique index
+        return isinstance(error, pyodbc.IntegrityError) and any(code in str(error) for code in ("2627", "2601"))
+
+
+class SQLiteBackend:
+    """Local stand-in so the API can run and be benchmarked without SQL Server"""
+
+    name = "sqlite"
+    limit_clause = "LIMIT ?"
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        # Connections are handed between executor threads, one borrower at a time. Worker
+        # processes started by the launcher share the file: WAL lets readers run during a
+        # write, and writers wait for the lock instead of failing straight away
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SQLITE_SCHEMA)
+        return connection
+
+    def returning(self, insert_query, column):
+        return insert_query.rstrip() + f" RETURNING {column}"
+
+    def is_disconnect(self, error):
+        # Only a closed connection is unusable; "database is locked", bad SQL or a closed
+        # cursor leave it fine for the next borrower
+        return isinstance(error, sqlite3.ProgrammingError) and "closed database" in str(error)
+
+    def is_unique_violation(self, error):
+        return isinstance(error, sqlite3.IntegrityError) and "UNIQUE" in str(error)
+
+
+def get_backend(name=None):
+    name = name or database_config.DB_BACKEND
+    if name == "mssql":
+        return MSSQLBackend()
+    if name == "sqlite":
+        return SQLiteBackend(path=database_config.SQLITE_PATH)
+    raise ValueError(f"Unknown database backend: {name}")
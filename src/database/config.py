@@ -0,0 +1,30 @@
+from pydantic_settings import BaseSettings
+
+
+class DatabaseConfig(BaseSettings):
+    # "mssql" talks to SQL Server through pyodbc, "sqlite" is the local stand-in
+    DB_BACKEND: str = "mssql"
+    SQLITE_PATH: str = "./cv_ranking.sqlite3"
+
+    # Connection pool
+    POOL_MIN_SIZE: int = 1
+    POOL_MAX_SIZE: int = 10
+    POOL_ACQUIRE_TIMEOUT: float = 10.0  # seconds to wait for a free connection
+    POOL_IDLE_TIMEOUT: float = 300.0  # idle connections older than this are closed
+    POOL_HEALTHCHECK_INTERVAL: float = 30.0  # re-check connections idle for longer than this
+    POOL_REAPER_INTERVAL: float = 30.0
+
+    # Threads that run blocking driver calls off the event loop
+    DB_EXECUTOR_WORKERS: int = 10
+
+    # Rows pulled per fetchmany when streaming large results
+    DB_FETCH_BATCH_SIZE: int = 500
+    # Upper bound for the limit query parameter of list endpoints
+    MAX_PAGE_SIZE: int = 1000
+
+    # Also write skills/degrees/certificates to indexed child tables and per-section
+    # score columns; run `python -m src.database.migrations` first
+    NORMALIZED_SCHEMA: bool = False
+
+
+database_config = DatabaseConfig()
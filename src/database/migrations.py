@@ -0,0 +1,251 @@
+"""Normalized schema migration and backfill.
+
+    python -m src.database.migrations               # create tables/columns/indexes, then backfill
+    python -m src.database.migrations --schema-only
+
+Every step is idempotent, so the tool can be re-run after a partial run.
+Set NORMALIZED_SCHEMA=true afterwards so new writes keep the tables in step.
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from src.candidate.repository import CHILD_TABLES, DEDUP_COLUMNS, child_rows
+from src.database.pool import db_pool
+from src.job.repository import CHILD_TABLES as JOB_CHILD_TABLES
+from src.matching.repository import SCORE_COLUMNS, SECTIONS, section_scores
+
+LOGGER = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _child_table_ddl(backend_name, table, column, key="candidate_id"):
+    owner = key[:-len("_id")]
+    if backend_name == "mssql":
+        return [
+            f"""
+            IF OBJECT_ID('{table}', 'U') IS NULL
+            CREATE TABLE {table} (
+                {key} INT NOT NULL,
+                {column} NVARCHAR(1000) NOT NULL,
+                {column}_norm NVARCHAR(450) NOT NULL
+            )
+            """,
+            f"""
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_{table}_norm')
+            CREATE INDEX ix_{table}_norm ON {table} ({column}_norm, {key})
+            """,
+            f"""
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_{table}_{owner}')
+            CREATE INDEX ix_{table}_{owner} ON {table} ({key})
+            """,
+        ]
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key} INTEGER NOT NULL,
+            {column} TEXT NOT NULL,
+            {column}_norm TEXT NOT NULL
+        )
+        """,
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_norm ON {table} ({column}_norm, {key})",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{owner} ON {table} ({key})",
+    ]
+
+
+async def _existing_columns(conn, backend_name, table):
+    if backend_name == "mssql":
+        rows = await conn.fetchall(
+            "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?", (table,)
+        )
+        return {row[0].lower() for row in rows}
+    rows = await conn.fetchall(f"PRAGMA table_info({table})")
+    return {row[1].lower() for row in rows}
+
+
+def _dedup_ddl(backend_name):
+    if backend_name == "mssql":
+        return [
+            """
+            IF OBJECT_ID('candidate_minhash_bands', 'U') IS NULL
+            CREATE TABLE candidate_minhash_bands (
+                candidate_id INT NOT NULL,
+                band_key VARCHAR(16) NOT NULL
+            )
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_candidate_minhash_bands_key')
+            CREATE INDEX ix_candidate_minhash_bands_key ON candidate_minhash_bands (band_key, candidate_id)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_candidate_minhash_bands_candidate')
+            CREATE INDEX ix_candidate_minhash_bands_candidate ON candidate_minhash_bands (candidate_id)
+            """,
+            # Filtered so profiles inserted before deduplication (NULL hash) don't collide
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ux_candidate_profiles_content_hash')
+            CREATE UNIQUE INDEX ux_candidate_profiles_content_hash ON candidate_profiles (content_hash)
+            WHERE content_hash IS NOT NULL
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_candidate_profiles_email_norm')
+            CREATE INDEX ix_candidate_profiles_email_norm ON candidate_profiles (email_norm)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_candidate_profiles_phone_norm')
+            CREATE INDEX ix_candidate_profiles_phone_norm ON candidate_profiles (phone_norm)
+            """,
+        ]
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS candidate_minhash_bands (
+            candidate_id INTEGER NOT NULL,
+            band_key TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_candidate_minhash_bands_key ON candidate_minhash_bands (band_key, candidate_id)",
+        "CREATE INDEX IF NOT EXISTS ix_candidate_minhash_bands_candidate ON candidate_minhash_bands (candidate_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_candidate_profiles_content_hash ON candidate_profiles (content_hash)",
+        "CREATE INDEX IF NOT EXISTS ix_candidate_profiles_email_norm ON candidate_profiles (email_norm)",
+        "CREATE INDEX IF NOT EXISTS ix_candidate_profiles_phone_norm ON candidate_profiles (phone_norm)",
+    ]
+
+
+async def apply_schema(conn, backend_name):
+    for table, column in CHILD_TABLES.values():
+        for statement in _child_table_ddl(backend_name, table, column):
+            await conn.execute(statement)
+    for table, column in JOB_CHILD_TABLES.values():
+        for statement in _child_table_ddl(backend_name, table, column, key="job_id"):
+            await conn.execute(statement)
+
+    # Upload deduplication (DEDUPLICATE_UPLOADS)
+    existing = await _existing_columns(conn, backend_name, "candidate_profiles")
+    for column, (mssql_type, sqlite_type) in DEDUP_COLUMNS.items():
+        if column not in existing:
+            column_type = mssql_type if backend_name == "mssql" else sqlite_type
+            await conn.execute(f"ALTER TABLE candidate_profiles ADD {column} {column_type} NULL")
+    for statement in _dedup_ddl(backend_name):
+        await conn.execute(statement)
+
+    existing = await _existing_columns(conn, backend_name, "candidate_job_analysis")
+    for column in SCORE_COLUMNS:
+        if column not in existing:
+            await conn.execute(f"ALTER TABLE candidate_job_analysis ADD {column} INT NULL")
+
+    # Score-ordered lookups per job (/matching/get_matchings/{job_id}?order=score)
+    if backend_name == "mssql":
+        await conn.execute(
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_candidate_job_analysis_job_score')
+            CREATE INDEX ix_candidate_job_analysis_job_score ON candidate_job_analysis (job_id, score DESC, candidate_id)
+            """
+        )
+    else:
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_candidate_job_analysis_job_score "
+            "ON candidate_job_analysis (job_id, score DESC, candidate_id)"
+        )
+    await conn.commit()
+
+
+async def _backfill_children(conn, source, key, child_tables, batch_size):
+    """Rebuild child-table rows from the JSON columns of every `source` row, returns the row count"""
+    fields = list(child_tables)
+    last_id = 0
+    total = 0
+    while True:
+        rows = await conn.fetchall(
+            f"SELECT {key}, {', '.join(fields)} FROM {source} "
+            f"WHERE {key} > ? ORDER BY {key} {conn.backend.limit_clause}",
+            (last_id, batch_size),
+        )
+        if not rows:
+            break
+
+        ids = [(row[0],) for row in rows]
+        for table, column in child_tables.values():
+            await conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", ids)
+
+        for index, (field, (table, column)) in enumerate(child_tables.items(), start=1):
+            inserts = []
+            for row in rows:
+                inserts.extend(child_rows(row[0], json.loads(row[index]) if row[index] else []))
+            if inserts:
+                await conn.executemany(
+                    f"INSERT INTO {table} ({key}, {column}, {column}_norm) VALUES (?, ?, ?)", inserts
+                )
+
+        await conn.commit()
+        last_id = rows[-1][0]
+        total += len(rows)
+        LOGGER.info(f"Backfilled child rows for {total} rows of {source}")
+    return total
+
+
+async def backfill_candidates(conn, batch_size=BACKFILL_BATCH_SIZE):
+    """Rebuild skill/degree/certificate rows from the JSON columns of every profile"""
+    return await _backfill_children(conn, "candidate_profiles", "candidate_id", CHILD_TABLES, batch_size)
+
+
+async def backfill_jobs(conn, batch_size=BACKFILL_BATCH_SIZE):
+    """Rebuild requirement rows from the JSON columns of every job description"""
+    return await _backfill_children(conn, "job_descriptions", "job_id", JOB_CHILD_TABLES, batch_size)
+
+
+async def backfill_scores(conn, batch_size=BACKFILL_BATCH_SIZE):
+    """Copy each section score out of the JSON columns into its numeric column"""
+    last_key = (0, 0)
+    total = 0
+    while True:
+        rows = await conn.fetchall(
+            f"SELECT job_id, candidate_id, {', '.join(SECTIONS)} FROM candidate_job_analysis "
+            f"WHERE job_id > ? OR (job_id = ? AND candidate_id > ?) "
+            f"ORDER BY job_id, candidate_id {conn.backend.limit_clause}",
+            (last_key[0], last_key[0], last_key[1], batch_size),
+        )
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            result = {
+                section: json.loads(value) if value else {}
+                for section, value in zip(SECTIONS, row[2:])
+            }
+            updates.append(tuple(section_scores(result)) + (row[0], row[1]))
+
+        await conn.executemany(
+            f"UPDATE candidate_job_analysis SET {', '.join(f'{column} = ?' for column in SCORE_COLUMNS)} "
+            f"WHERE job_id = ? AND candidate_id = ?",
+            updates,
+        )
+        await conn.commit()
+        last_key = (rows[-1][0], rows[-1][1])
+        total += len(rows)
+        LOGGER.info(f"Backfilled scores for {total} analyses")
+    return total
+
+
+async def migrate(schema_only=False):
+    await db_pool.open()
+    try:
+        async with db_pool.connection() as conn:
+            await apply_schema(conn, db_pool.backend.name)
+            if not schema_only:
+                candidates = await backfill_candidates(conn)
+                jobs = await backfill_jobs(conn)
+                analyses = await backfill_scores(conn)
+                LOGGER.info(f"Backfilled {candidates} candidates, {jobs} jobs and {analyses} analyses")
+    finally:
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and backfill the normalized schema")
+    parser.add_argument("--schema-only", action="store_true", help="create tables, columns and indexes only")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate(schema_only=args.schema_only))
@@ -0,0 +1,102 @@
+import json
+
+import orjson
+from src.telemetry.instrument import TimedORJSONResponse
+
+from src.database.pool import db_pool
+
+
+def parse_fields(fields, allowed, key):
+    """'a,b' query parameter >>> column list, always led by the keyset column"""
+    if not fields:
+        return list(allowed)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [key] + [field for field in requested if field != key]
+
+
+def build_keyset_query(table, columns, key, filters=(), after=None, limit=None, lower_bounds=()):
+    """SELECT columns ordered by key, starting strictly after the cursor value"""
+    clauses = [f"{column} = ?" for column, _ in filters] + [f"{column} >= ?" for column, _ in lower_bounds]
+    params = [value for _, value in filters] + [value for _, value in lower_bounds]
+    if after is not None:
+        clauses.append(f"{key} > ?")
+        params.append(after)
+
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY {key}"
+    if limit is not None:
+        query += " " + db_pool.backend.limit_clause
+        params.append(limit)
+    return query, tuple(params)
+
+
+def build_ranked_query(table, columns, score_column, key, filters=(), min_score=None, after=None, limit=None):
+    """SELECT columns best score first, ties broken by key.
+
+    after is the (score, key) of the last row already returned. Together with
+    an index on (filter columns, score DESC, key) each page is a short index
+    range scan instead of a sort over every row of the job.
+    """
+    clauses = [f"{column} = ?" for column, _ in filters] + [f"{score_column} IS NOT NULL"]
+    params = [value for _, value in filters]
+    if min_score is not None:
+        clauses.append(f"{score_column} >= ?")
+        params.append(min_score)
+    if after is not None:
+        clauses.append(f"({score_column} < ? OR ({score_column} = ? AND {key} > ?))")
+        params.extend([after[0], after[0], after[1]])
+
+    query = f"SELECT {', '.join(columns)} FROM {table} WHERE {' AND '.join(clauses)}"
+    query += f" ORDER BY {score_column} DESC, {key}"
+    if limit is not None:
+        query += " " + db_pool.backend.limit_clause
+        params.append(limit)
+    return query, tuple(params)
+
+
+def encode_score_cursor(score, key):
+    return f"{score!r}:{key}"
+
+
+def decode_score_cursor(cursor):
+    """'score:key' from X-Next-Cursor >>> (score, key); ValueError when malformed"""
+    score, _, key = cursor.rpartition(":")
+    return float(score), int(key)
+
+
+def row_to_dict(columns, row, json_columns, raw=False):
+    """Map a row by column name; json_columns maps JSON text columns to the type used when NULL.
+
+    With raw=True the JSON text is wrapped in orjson.Fragment and copied into the
+    response as-is instead of being parsed and re-serialized. The columns are
+    only ever written with json.dumps, so the text is known to be valid.
+    """
+    record = {}
+    for column, value in zip(columns, row):
+        if column in json_columns:
+            if not value:
+                record[column] = json_columns[column]()
+            elif raw:
+                record[column] = orjson.Fragment(value)
+            else:
+                record[column] = json.loads(value)
+        else:
+            record[column] = value
+    return record
+
+
+def json_response(content, headers=None):
+    """Serialize with orjson directly; returning a Response skips FastAPI's jsonable_encoder pass"""
+    return TimedORJSONResponse(content, headers=headers)
+
+
+async def stream_ndjson(query, params, columns, json_columns):
+    """One JSON object per line, read in fetchmany batches so memory stays flat"""
+    async with db_pool.connection() as conn:
+        async for rows in conn.iterate(query, params):
+            yield b"".join(orjson.dumps(row_to_dict(columns, row, json_columns, raw=True)) + b"\n" for row in rows)
@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from src.database.backends import get_backend
+from src.database.config import database_config
+from src.telemetry.instrument import stage
+from src.telemetry.metrics import registry
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PoolError(Exception):
+    """Base class for errors raised by the connection pool"""
+
+
+class PoolTimeoutError(PoolError):
+    """No connection became available within the acquire timeout"""
+
+
+class PoolClosedError(PoolError):
+    """The pool has been shut down"""
+
+
+class DatabaseConnectionError(PoolError):
+    """The backend refused or failed to open a new connection"""
+
+
+class _PooledConnection:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class AsyncConnection:
+    """A borrowed connection whose driver calls run on the pool's executor"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.backend = pool.backend
+        self.broken = False
+
+    async def _run(self, fn, *args):
+        try:
+            with stage("query", db=self.backend.name):
+                return await self._pool.run(fn, *args)
+        except Exception as e:
+            if self._pool.backend.is_disconnect(e):
+                self.broken = True
+            raise
+
+    async def execute(self, query, params=()):
+        """Run a statement and return the affected row count"""
+
+        def work():
+            cursor = self._raw.cursor()
+            try:
+                cursor.execute(query, params)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+        return await self._run(work)
+
+    async def executemany(self, query, seq_of_params):
+        def work():
+            cursor = self._raw.cursor()
+            # pyodbc sends the whole parameter array in one round trip
+            if hasattr(cursor, "fast_executemany"):
+                cursor.fast_executemany = True
+            try:
+                cursor.executemany(query, seq_of_params)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+        return await self._run(work)
+
+    async def fetchone(self, query, params=()):
+        def work():
+            cursor = self._raw.cursor()
+            try:
+                cursor.execute(query, params)
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+
+        return await self._run(work)
+
+    async def fetchall(self, query, params=()):
+        def work():
+            cursor = self._raw.cursor()
+            try:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+        return await self._run(work)
+
+    async def iterate(self, query, params=(), batch_size=database_config.DB_FETCH_BATCH_SIZE):
+        """Yield lists of at most batch_size rows so large results never sit in memory at once"""
+
+        def open_cursor():
+            cursor = self._raw.cursor()
+            try:
+                cursor.execute(query, params)
+            except Exception:
+                cursor.close()
+                raise
+            return cursor
+
+        cursor = await self._run(open_cursor)
+        try:
+            while True:
+                rows = await self._run(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await self._pool.run(cursor.close)
+
+    async def commit(self):
+        await self._run(self._raw.commit)
+
+    async def rollback(self):
+        await self._run(self._raw.rollback)
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections shared by all requests.
+
+    Connections are opened lazily up to max_size, checked with a cheap query
+    when they have been idle for a while and closed by a background reaper once
+    idle for longer than idle_timeout. All blocking driver calls run on a
+    dedicated thread pool so the event loop never waits on the network.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        min_size=database_config.POOL_MIN_SIZE,
+        max_size=database_config.POOL_MAX_SIZE,
+        acquire_timeout=database_config.POOL_ACQUIRE_TIMEOUT,
+        idle_timeout=database_config.POOL_IDLE_TIMEOUT,
+        healthcheck_interval=database_config.POOL_HEALTHCHECK_INTERVAL,
+        reaper_interval=database_config.POOL_REAPER_INTERVAL,
+        executor_workers=database_config.DB_EXECUTOR_WORKERS,
+    ):
+        self.backend = backend or get_backend()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.reaper_interval = reaper_interval
+        self.executor_workers = executor_workers
+
+        self._idle = deque()
+        self._slots = None
+        self._executor = None
+        self._reaper = None
+        self._opened = False
+        self._closed = False
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "acquires": 0,
+            "acquire_timeouts": 0,
+            "connect_errors": 0,
+            "healthcheck_failures": 0,
+            "acquire_wait_seconds": 0.0,
+        }
+
+    async def open(self):
+        if self._opened:
+            return
+        self._opened = True
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.executor_workers, thread_name_prefix="db"
+        )
+        self._slots = asyncio.Semaphore(self.max_size)
+
+        # Warm the pool, but let the app start even if the database is down
+        for _ in range(self.min_size):
+            try:
+                self._idle.append(await self._create())
+            except DatabaseConnectionError as e:
+                LOGGER.warning(f"Could not pre-open database connection: {e}")
+                break
+
+        self._reaper = asyncio.create_task(self._reap())
+
+    async def close(self):
+        if not self._opened:
+            return
+        self._closed = True
+        self._opened = False
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        while self._idle:
+            await self._discard(self._idle.pop())
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def run(self, fn, *args):
+        """Run a blocking callable on the database executor"""
+        if self._executor is None:
+            if self._closed:
+                raise PoolClosedError("Connection pool is closed")
+            await self.open()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def acquire(self):
+        if self._closed:
+            raise PoolClosedError("Connection pool is closed")
+        if not self._opened:
+            await self.open()
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._stats["acquire_timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No database connection available within {self.acquire_timeout}s"
+            )
+        finally:
+            self._waiting -= 1
+
+        try:
+            pooled = await self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._in_use += 1
+        self._stats["acquires"] += 1
+        self._stats["acquire_wait_seconds"] += time.monotonic() - started
+        return pooled
+
+    async def release(self, pooled, discard=False):
+        self._in_use -= 1
+        try:
+            if discard or self._closed:
+                await self._discard(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection; it is rolled back if the block raises"""
+        with stage("db_connect"):
+            pooled = await self.acquire()
+        conn = AsyncConnection(self, pooled.raw)
+        try:
+            yield conn
+        except BaseException:
+            try:
+                await self.run(pooled.raw.rollback)
+            except Exception:
+                conn.broken = True
+            raise
+        finally:
+            await self.release(pooled, discard=conn.broken)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Borrow a connection and commit when the block succeeds"""
+        async with self.connection() as conn:
+            yield conn
+            await conn.commit()
+
+    def metrics(self):
+        acquires = self._stats["acquires"]
+        return {
+            "backend": self.backend.name,
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "max_size": self.max_size,
+            "created": self._stats["created"],
+            "closed": self._stats["closed"],
+            "acquires": acquires,
+            "acquire_timeouts": self._stats["acquire_timeouts"],
+            "connect_errors": self._stats["connect_errors"],
+            "healthcheck_failures": self._stats["healthcheck_failures"],
+            "avg_acquire_wait_ms": (
+                self._stats["acquire_wait_seconds"] / acquires * 1000 if acquires else 0.0
+            ),
+        }
+
+    async def _checkout(self):
+        while self._idle:
+            # LIFO keeps a few connections hot and lets the rest age out
+            pooled = self._idle.pop()
+            if time.monotonic() - pooled.last_used > self.healthcheck_interval:
+                if not await self.run(self._ping, pooled.raw):
+                    self._stats["healthcheck_failures"] += 1
+                    await self._discard(pooled)
+                    continue
+            return pooled
+        return await self._create()
+
+    async def _create(self):
+        try:
+            raw = await self.run(self.backend.connect)
+        except Exception as e:
+            self._stats["connect_errors"] += 1
+            raise DatabaseConnectionError(str(e)) from e
+        self._size += 1
+        self._stats["created"] += 1
+        return _PooledConnection(raw)
+
+    async def _discard(self, pooled):
+        self._size -= 1
+        self._stats["closed"] += 1
+        try:
+            await self.run(pooled.raw.close)
+        except Exception as e:
+            LOGGER.debug(f"Error closing database connection: {e}")
+
+    @staticmethod
+    def _ping(raw):
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(self.reaper_interval)
+            now = time.monotonic()
+            # Oldest idle connections sit at the left end of the deque
+            while (
+                self._idle
+                and self._size > self.min_size
+                and now - self._idle[0].last_used > self.idle_timeout
+            ):
+                await self._discard(self._idle.popleft())
+
+
+db_pool = ConnectionPool()
+registry.register_stats("cv_ranking_db_pool", "Connection pool state, see /healthz/db", db_pool.metrics)
@@ -0,0 +1,75 @@
+import asyncio
+
+from src.database.backends import SQLiteBackend
+from src.database.config import database_config
+from src.database.migrations import apply_schema, backfill_candidates, backfill_jobs, backfill_scores
+from src.database.pool import ConnectionPool
+from src.job import repository as job_repository
+
+JOB = {
+    "certificate": ["AWS SA"],
+    "degree": ["BSc Computer Science"],
+    "experience": ["3 years"],
+    "responsibility": ["Build APIs"],
+    "soft_skill": ["Teamwork"],
+    "technical_skill": ["Python", " python ", "SQL"],
+}
+
+SECTION = {"score": 80, "comment": "ok"}
+
+
+def run(tmp_path, scenario):
+    async def main():
+        pool = ConnectionPool(backend=SQLiteBackend(str(tmp_path / "db.sqlite3")), min_size=0)
+        try:
+            async with pool.connection() as conn:
+                return await scenario(conn)
+        finally:
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+def test_migration_backfills_jobs_and_scores(tmp_path):
+    async def scenario(conn):
+        job_id = await job_repository.insert_job(conn, "Backend", JOB)
+        await conn.execute(
+            "INSERT INTO candidate_job_analysis (candidate_id, job_id, certificate, degree, experience, "
+            "responsibility, technical_skill, soft_skill, summary_comment, score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (1, job_id, '{"score": 10}', '{"score": 20}', '{"score": 30}', '{"score": 40}', '{"score": 50}', "{}", "s", 33),
+        )
+        await conn.commit()
+
+        await apply_schema(conn, "sqlite")
+        # Idempotent
+        await apply_schema(conn, "sqlite")
+        assert await backfill_candidates(conn) == 0
+        assert await backfill_jobs(conn, batch_size=1) == 1
+        assert await backfill_scores(conn) == 1
+
+        skills = await conn.fetchall("SELECT skill_norm FROM job_skills WHERE job_id = ? ORDER BY skill_norm", (job_id,))
+        scores = await conn.fetchone(
+            "SELECT degree_score, experience_score, technical_skill_score, soft_skill_score FROM candidate_job_analysis"
+        )
+        return job_id, [row[0] for row in skills], scores
+
+    job_id, skills, scores = run(tmp_path, scenario)
+    assert skills == ["python", "sql"]
+    assert tuple(scores) == (20, 30, 50, None)
+
+
+def test_normalized_job_writes_and_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_config, "NORMALIZED_SCHEMA", True)
+
+    async def scenario(conn):
+        await apply_schema(conn, "sqlite")
+        python_job = await job_repository.insert_job(conn, "Backend", JOB)
+        await job_repository.insert_job(conn, "Frontend", {**JOB, "technical_skill": ["TypeScript"]})
+        found = await job_repository.search_jobs(conn, skills=["PYTHON"], certificates=["aws  sa"])
+        await job_repository.delete_child_rows(conn, [python_job])
+        after_delete = await job_repository.search_jobs(conn, skills=["python"])
+        return python_job, found, after_delete
+
+    python_job, found, after_delete = run(tmp_path, scenario)
+    assert found == [{"job_id": python_job, "job_name": "Backend"}]
+    assert after_delete == []
@@ -0,0 +1,121 @@
+import asyncio
+
+import orjson
+import pytest
+
+from src.database import pagination
+from src.database.backends import SQLiteBackend
+from src.database.pagination import (
+    build_keyset_query,
+    build_ranked_query,
+    decode_score_cursor,
+    encode_score_cursor,
+    parse_fields,
+    row_to_dict,
+)
+from src.database.pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = ConnectionPool(backend=SQLiteBackend(str(tmp_path / "db.sqlite3")), min_size=0)
+    monkeypatch.setattr(pagination, "db_pool", pool)
+    yield pool
+    asyncio.run(pool.close())
+
+
+def seed(pool, rows):
+    async def main():
+        async with pool.transaction() as conn:
+            await conn.execute("CREATE TABLE items (item_id INTEGER PRIMARY KEY, tenant TEXT, score REAL)")
+            await conn.executemany("INSERT INTO items VALUES (?, ?, ?)", rows)
+
+    asyncio.run(main())
+
+
+def query(pool, sql, params):
+    async def main():
+        async with pool.connection() as conn:
+            return await conn.fetchall(sql, params)
+
+    return asyncio.run(main())
+
+
+ITEMS = [(i, "a" if i % 2 else "b", None) for i in range(1, 11)]
+
+
+def test_parse_fields_leads_with_the_key():
+    allowed = ["candidate_id", "name", "email"]
+    assert parse_fields(None, allowed, "candidate_id") == allowed
+    assert parse_fields("email, candidate_id,name", allowed, "candidate_id") == ["candidate_id", "email", "name"]
+    with pytest.raises(ValueError, match="password"):
+        parse_fields("name,password", allowed, "candidate_id")
+
+
+def test_keyset_pages_cover_every_row_once(pool):
+    seed(pool, ITEMS)
+    seen, after = [], None
+    while True:
+        sql, params = build_keyset_query("items", ["item_id"], "item_id", after=after, limit=3)
+        page = [row[0] for row in query(pool, sql, params)]
+        if not page:
+            break
+        seen += page
+        after = page[-1]
+    assert seen == list(range(1, 11))
+
+
+def test_keyset_filters_and_lower_bounds(pool):
+    seed(pool, ITEMS)
+    sql, params = build_keyset_query(
+        "items", ["item_id"], "item_id", filters=[("tenant", "a")], lower_bounds=[("item_id", 4)], after=5, limit=2
+    )
+    assert [row[0] for row in query(pool, sql, params)] == [7, 9]
+
+
+SCORED = [(1, "j", 0.5), (2, "j", 0.9), (3, "j", 0.5), (4, "j", None), (5, "j", 0.7), (6, "k", 1.0), (7, "j", 0.5)]
+
+
+def test_ranked_top_k_is_best_first_with_ties_by_key(pool):
+    seed(pool, SCORED)
+    sql, params = build_ranked_query("items", ["item_id"], "score", "item_id", filters=[("tenant", "j")], limit=4)
+    assert [row[0] for row in query(pool, sql, params)] == [2, 5, 1, 3]
+
+
+def test_ranked_min_score_and_unscored_rows(pool):
+    seed(pool, SCORED)
+    sql, params = build_ranked_query("items", ["item_id"], "score", "item_id", filters=[("tenant", "j")], min_score=0.6)
+    assert [row[0] for row in query(pool, sql, params)] == [2, 5]
+    sql, params = build_ranked_query("items", ["item_id"], "score", "item_id", filters=[("tenant", "j")])
+    assert 4 not in [row[0] for row in query(pool, sql, params)]
+
+
+def test_ranked_cursor_pages_through_ties(pool):
+    seed(pool, SCORED)
+    seen, after = [], None
+    while True:
+        sql, params = build_ranked_query(
+            "items", ["item_id", "score"], "score", "item_id", filters=[("tenant", "j")], after=after, limit=2
+        )
+        page = query(pool, sql, params)
+        if not page:
+            break
+        seen += [row[0] for row in page]
+        after = decode_score_cursor(encode_score_cursor(page[-1][1], page[-1][0]))
+    assert seen == [2, 5, 1, 3, 7]
+
+
+def test_score_cursor_round_trips():
+    assert decode_score_cursor(encode_score_cursor(0.1 + 0.2, 42)) == (0.1 + 0.2, 42)
+    assert decode_score_cursor(encode_score_cursor(-1.5, 7)) == (-1.5, 7)
+    with pytest.raises(ValueError):
+        decode_score_cursor("nope")
+
+
+def test_row_to_dict_parses_or_passes_through_json():
+    columns = ["candidate_id", "skills", "notes"]
+    row = (1, '["python"]', None)
+    json_columns = {"skills": list, "notes": dict}
+    assert row_to_dict(columns, row, json_columns) == {"candidate_id": 1, "skills": ["python"], "notes": {}}
+    raw = row_to_dict(columns, row, json_columns, raw=True)
+    assert orjson.loads(orjson.dumps(raw)) == {"candidate_id": 1, "skills": ["python"], "notes": {}}
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.database.backends import SQLiteBackend
+from src.database.pool import ConnectionPool, PoolClosedError, PoolTimeoutError
+
+
+def make_pool(tmp_path, **kwargs):
+    return ConnectionPool(backend=SQLiteBackend(str(tmp_path / "db.sqlite3")), **kwargs)
+
+
+def run(tmp_path, scenario, **kwargs):
+    async def main():
+        pool = make_pool(tmp_path, **kwargs)
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+def test_connections_are_reused(tmp_path):
+    async def scenario(pool):
+        async with pool.connection() as conn:
+            first = conn._raw
+        async with pool.connection() as conn:
+            second = conn._raw
+        return first is second, pool.metrics()
+
+    reused, metrics = run(tmp_path, scenario, min_size=0)
+    assert reused
+    assert metrics["created"] == 1
+    assert metrics["acquires"] == 2
+    assert metrics["in_use"] == 0
+
+
+def test_transaction_commits_and_rolls_back(tmp_path):
+    async def scenario(pool):
+        async with pool.transaction() as conn:
+            await conn.execute("INSERT INTO scoring_weights (scope, scope_key, weights) VALUES ('job', '1', '{}')")
+        with pytest.raises(RuntimeError):
+            async with pool.transaction() as conn:
+                await conn.execute("INSERT INTO scoring_weights (scope, scope_key, weights) VALUES ('job', '2', '{}')")
+                raise RuntimeError("abort")
+        async with pool.connection() as conn:
+            return await conn.fetchall("SELECT scope_key FROM scoring_weights")
+
+    assert run(tmp_path, scenario) == [("1",)]
+
+
+def test_iterate_in_batches(tmp_path):
+    async def scenario(pool):
+        async with pool.transaction() as conn:
+            await conn.executemany(
+                "INSERT INTO scoring_weights (scope, scope_key, weights) VALUES ('job', ?, '{}')",
+                [(str(i),) for i in range(5)],
+            )
+        async with pool.connection() as conn:
+            return [len(rows) async for rows in conn.iterate("SELECT scope_key FROM scoring_weights", batch_size=2)]
+
+    assert run(tmp_path, scenario) == [2, 2, 1]
+
+
+def test_acquire_times_out_when_exhausted(tmp_path):
+    async def scenario(pool):
+        async with pool.connection():
+            with pytest.raises(PoolTimeoutError):
+                await pool.acquire()
+        return pool.metrics()["acquire_timeouts"]
+
+    assert run(tmp_path, scenario, max_size=1, acquire_timeout=0.05) == 1
+
+
+def test_only_closed_connections_are_discarded(tmp_path):
+    async def scenario(pool):
+        with pytest.raises(sqlite3.OperationalError):
+            async with pool.connection() as conn:
+                await conn.execute("SELECT * FROM no_such_table")
+        assert pool.metrics()["closed"] == 0
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            async with pool.connection() as conn:
+                conn._raw.close()
+                await conn.execute("SELECT 1")
+        return pool.metrics()
+
+    metrics = run(tmp_path, scenario, min_size=0)
+    assert metrics["created"] == 1
+    assert metrics["closed"] == 1
+    assert metrics["size"] == 0
+
+
+def test_is_disconnect():
+    backend = SQLiteBackend(":memory:")
+    assert backend.is_disconnect(sqlite3.ProgrammingError("Cannot operate on a closed database."))
+    assert not backend.is_disconnect(sqlite3.ProgrammingError("Cannot operate on a closed cursor."))
+    assert not backend.is_disconnect(sqlite3.OperationalError("database is locked"))
+    assert not backend.is_disconnect(sqlite3.OperationalError('near "SELEC": syntax error'))
+
+
+def test_closed_pool_refuses(tmp_path):
+    async def scenario():
+        pool = make_pool(tmp_path)
+        await pool.open()
+        await pool.close()
+        with pytest.raises(PoolClosedError):
+            await pool.acquire()
+
+    asyncio.run(scenario())
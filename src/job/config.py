@@ -2,5 +2,10 @@ from pydantic_settings import BaseSettings
 
 class JobConfig(BaseSettings):
     MODEL_NAME: str = "gpt-3.5-turbo-16k"
+    # (model, largest prompt in tokens it is tried on; 0 for any), cheapest first. Short job descriptions
+    # start on the small model, the next tier takes over when an answer is invalid or below
+    # JOB_MIN_COMPLETENESS (share of top-level fields filled in)
+    JOB_MODEL_TIERS: tuple = (("gpt-4o-mini", 2000), ("gpt-4o", 0))
+    JOB_MIN_COMPLETENESS: float = 0.5
 
 job_config = JobConfig()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import json
+
+from src.candidate.repository import child_rows, normalize_value
+from src.database.config import database_config
+from src.database.pagination import row_to_dict
+
+JOB_COLUMNS = [
+    "job_id",
+    "job_name",
+    "certificate",
+    "degree",
+    "experience",
+    "responsibility",
+    "soft_skill",
+    "technical_skill",
+]
+
+# JSON text columns and the value returned when they are NULL or empty
+JOB_JSON_COLUMNS = {
+    "certificate": list,
+    "degree": list,
+    "experience": list,
+    "responsibility": list,
+    "soft_skill": list,
+    "technical_skill": list,
+}
+
+# Requirement list fields mirrored into indexed child tables: field -> (table, value column)
+CHILD_TABLES = {
+    "technical_skill": ("job_skills", "skill"),
+    "degree": ("job_degrees", "degree"),
+    "certificate": ("job_certificates", "certificate"),
+}
+
+SELECT_JOBS_QUERY = f"SELECT {', '.join(JOB_COLUMNS)} FROM job_descriptions"
+
+
+def row_to_job(row):
+    """job_descriptions row >>> the dict returned by /job/get_all_jobs"""
+    return row_to_dict(JOB_COLUMNS, row, JOB_JSON_COLUMNS)
+
+
+async def fetch_job(conn, job_id):
+    row = await conn.fetchone(SELECT_JOBS_QUERY + " WHERE job_id = ?", (job_id,))
+    return row_to_job(row) if row is not None else None
+
+
+async def fetch_jobs(conn, job_ids=None, limit=None):
+    """Jobs by id, or the newest `limit` jobs (all of them without a limit)"""
+    if job_ids:
+        # SQL Server caps a statement at 2100 parameters
+        jobs = []
+        for start in range(0, len(job_ids), 1000):
+            chunk = tuple(job_ids[start:start + 1000])
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = await conn.fetchall(SELECT_JOBS_QUERY + f" WHERE job_id IN ({placeholders})", chunk)
+            jobs.extend(row_to_job(row) for row in rows)
+        return jobs
+
+    if limit is None:
+        rows = await conn.fetchall(SELECT_JOBS_QUERY + " ORDER BY job_id DESC")
+    else:
+        rows = await conn.fetchall(SELECT_JOBS_QUERY + " ORDER BY job_id DESC " + conn.backend.limit_clause, (limit,))
+    return [row_to_job(row) for row in rows]
+
+
+INSERT_JOB_QUERY = '''
+    INSERT INTO job_descriptions (
+        job_name, 
+        certificate,
+        degree, 
+        experience,
+        responsibility,
+        soft_skill,
+        technical_skill
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+async def insert_job(conn, job_name, result):
+    """Insert one analysed job description and return its job_id"""
+    query = conn.backend.returning(INSERT_JOB_QUERY, "job_id")
+    row = await conn.fetchone(query, (
+        job_name,
+        json.dumps(result["certificate"]),  # Stringify the list
+        json.dumps(result["degree"]),
+        json.dumps(result["experience"]),
+        json.dumps(result["responsibility"]),
+        json.dumps(result["soft_skill"]),
+        json.dumps(result["technical_skill"]),
+    ))
+    job_id = int(row[0])
+    if database_config.NORMALIZED_SCHEMA:
+        await insert_child_rows(conn, job_id, result)
+    return job_id
+
+
+async def insert_child_rows(conn, job_id, result):
+    for field, (table, column) in CHILD_TABLES.items():
+        rows = child_rows(job_id, result.get(field))
+        if rows:
+            await conn.executemany(f"INSERT INTO {table} (job_id, {column}, {column}_norm) VALUES (?, ?, ?)", rows)
+
+
+async def delete_child_rows(conn, job_ids):
+    for table, _ in CHILD_TABLES.values():
+        await conn.executemany(f"DELETE FROM {table} WHERE job_id = ?", [(i,) for i in job_ids])
+
+
+async def search_jobs(conn, skills=(), degrees=(), certificates=(), limit=100):
+    """Indexed lookup on the normalized child tables, e.g. jobs asking for Python, newest first"""
+    clauses, params = [], []
+    for field, values in (("technical_skill", skills), ("degree", degrees), ("certificate", certificates)):
+        table, column = CHILD_TABLES[field]
+        for value in values:
+            clauses.append(f"EXISTS (SELECT 1 FROM {table} c WHERE c.job_id = j.job_id AND c.{column}_norm = ?)")
+            params.append(normalize_value(value))
+
+    query = "SELECT j.job_id, j.job_name FROM job_descriptions j"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY j.job_id DESC " + conn.backend.limit_clause
+    params.append(limit)
+
+    rows = await conn.fetchall(query, tuple(params))
+    return [{"job_id": row[0], "job_name": row[1]} for row in rows]
@@ -1,210 +1,189 @@
-from fastapi import APIRouter, HTTPException, status
-from src.job import services
-from src.job.schemas import JobSchema
-from db import connectToDB
-import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from src.job import repository, services
+from src.job.schemas import JobDescription, JobSchema
+from src.database.config import database_config
+from src.database.pagination import build_keyset_query, json_response, parse_fields, row_to_dict, stream_ndjson
+from src.database.pool import db_pool, PoolError
+from src.llm.streaming import sse_event, sse_response
+from src.tasks.schemas import TaskOptions
+from src.tasks.services import submit_task, task_options
 
 router = APIRouter()
 
 @router.post("/analyse")
-async def analyse_job(job_data: JobSchema):
-    result = services.analyse_job(job_data=job_data)
+async def analyse_job(job_data: JobSchema, response: Response, options: TaskOptions = Depends(task_options)):
+    # ?background=true answers 202 right away, poll /tasks/{task_id} for the result
+    if options.background:
+        return await submit_task(response, "job.analyse", job_data.model_dump(), options)
 
-    cursor = connectToDB()
-    if cursor is None:
+    result = await services.analyse_job(job_data=job_data)
+
+    try:
+        # Commits on success, rolls back on error
+        async with db_pool.transaction() as conn:
+            await repository.insert_job(conn, job_data.job_name, result)
+
+    except PoolError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
-        )
-    
-    insert_query = '''
-        INSERT INTO job_descriptions (
-            job_name, 
-            certificate,
-            degree, 
-            experience,
-            responsibility,
-            soft_skill,
-            technical_skill
+            detail=f"Error connecting to the Database {e}"
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    '''
-    
-    job_name = job_data.job_name
-    certificate = json.dumps(result["certificate"])  # Stringify the list
-    degree = json.dumps(result["degree"])  # Stringify the list
-    experience = json.dumps(result["experience"])  # Stringify the list
-    responsibility = json.dumps(result["responsibility"])  # Stringify the list
-    soft_skill = json.dumps(result["soft_skill"])  # Stringify the list
-    technical_skill = json.dumps(result["technical_skill"])  # Stringify the list
-    
-    try:
-        cursor.execute(insert_query, (
-            job_name, 
-            certificate,
-            degree, 
-            experience, 
-            responsibility, 
-            soft_skill, 
-            technical_skill
-        ))
-        
-        # Commit the transaction
-        cursor.connection.commit()
-    
+
     except Exception as e:
-        # Rollback in case of error
-        cursor.connection.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while inserting data into the database: {str(e)}"
         )
-    
-    finally:
-        # Close the cursor/connection to prevent connection leakage
-        cursor.close()
 
-        
     return result
 
 
-@router.get("/get_job/{job_id}")
+async def analyse_stream_events(job_data):
+    """SSE: one "field" per completed section, then "result" once persisted"""
+    try:
+        async for event, data in services.analyse_job_stream(job_data=job_data):
+            if event == "result":
+                result = data
+            else:
+                yield sse_event(event, data)
+
+        async with db_pool.transaction() as conn:
+            job_id = await repository.insert_job(conn, job_data.job_name, result)
+        yield sse_event("result", {"job_id": job_id, **result})
+
+    except Exception as e:
+        yield sse_event("error", {"detail": f"An error occurred while analysing the job: {str(e)}"})
+
+
+@router.post("/analyse_stream")
+async def analyse_job_stream(job_data: JobSchema):
+    # Same analysis as /analyse, but each section is pushed as soon as the model has written it
+    return sse_response(analyse_stream_events(job_data))
+
+
+@router.get("/get_job/{job_id}", response_model=JobDescription, response_model_exclude_unset=True)
 async def get_job_description(job_id: int):
-    # Connect to the database
-    cursor = connectToDB()
-    
-    if cursor is None:
+    # Every column except the id, which the caller already has
+    columns = repository.JOB_COLUMNS[1:]
+    select_query = f"SELECT {', '.join(columns)} FROM job_descriptions WHERE job_id = ?"
+
+    try:
+        # Execute the query and fetch the data from the database
+        async with db_pool.connection() as conn:
+            job_data = await conn.fetchone(select_query, (job_id,))
+
+    except PoolError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
+            detail=f"Error connecting to the Database {e}"
         )
 
-    # SQL query to fetch candidate profile by ID
-    select_query = '''
-        SELECT 
-            job_name, 
-            certificate,
-            degree, 
-            experience,
-            responsibility,
-            soft_skill,
-            technical_skill
-        FROM job_descriptions
-        WHERE job_id = ?
-    '''
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching data: {str(e)}"
+        )
+
+    # If no data found, raise an error
+    if job_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job description with id {job_id} not found"
+        )
 
+    # JSON columns are copied into the response without being parsed
+    return json_response(row_to_dict(columns, job_data, repository.JOB_JSON_COLUMNS, raw=True))
+
+
+@router.get("/get_all_jobs", response_model=List[JobDescription], response_model_exclude_unset=True)
+async def get_all_jobs(
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=database_config.MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    stream: bool = False,
+):
+    # Keyset pagination: pass the X-Next-Cursor header back as after_id for the next page
     try:
-        # Execute the query
-        cursor.execute(select_query, (job_id,))
-        
-        # Fetch the data from the database
-        job_data = cursor.fetchone()
-        
-        # If no data found, raise an error
-        if job_data is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Job description with id {job_id} not found"
-            )
-        
-        # Map the result into a structured dictionary
-        job_description = {
-            "job_name": job_data[0],
-            "certificate": json.loads(job_data[1]) if job_data[1] else [],  # Parse only if not NULL or empty
-            "degree": json.loads(job_data[2]) if job_data[2] else [],  # Parse only if not NULL or empty
-            "experience": json.loads(job_data[3]) if job_data[3] else [],  # Parse only if not NULL or empty
-            "responsibility": json.loads(job_data[4]) if job_data[4] else [],  # Parse only if not NULL or empty
-            "soft_skill": json.loads(job_data[5]) if job_data[5] else [],  # Parse only if not NULL or empty
-            "technical_skill": json.loads(job_data[6]) if job_data[6] else [],  # Parse only if not NULL or empty
-        }
-
-        # Return the structured data as JSON response
-        return job_description
-    
+        columns = parse_fields(fields, repository.JOB_COLUMNS, "job_id")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    select_query, params = build_keyset_query(
+        "job_descriptions", columns, "job_id", after=after_id, limit=limit
+    )
+
+    # NDJSON streamed in fetchmany batches, memory stays flat regardless of table size
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(select_query, params, columns, repository.JOB_JSON_COLUMNS),
+            media_type="application/x-ndjson",
+        )
+
+    try:
+        # Execute the query and fetch the page from the database
+        async with db_pool.connection() as conn:
+            job_data = await conn.fetchall(select_query, params)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while fetching data: {str(e)}"
         )
-    
-    finally:
-        # Close cursor and connection to avoid leaks
-        cursor.close()
-        
-        
-@router.get("/get_all_jobs")
-async def get_all_jobs():
-    # Connect to the database
-    cursor = connectToDB()
-    if cursor is None:
+
+    # Map the result into a list of dictionaries, JSON columns passed through unparsed
+    jobs = [row_to_dict(columns, row, repository.JOB_JSON_COLUMNS, raw=True) for row in job_data]
+
+    headers = {}
+    if limit is not None and len(jobs) == limit:
+        headers["X-Next-Cursor"] = str(jobs[-1]["job_id"])
+
+    return json_response(jobs, headers=headers)
+
+
+@router.get("/search")
+async def search_job_descriptions(
+    skill: List[str] = Query([]),
+    degree: List[str] = Query([]),
+    certificate: List[str] = Query([]),
+    limit: int = Query(100, ge=1, le=database_config.MAX_PAGE_SIZE),
+):
+    # e.g. /job/search?skill=Python&skill=SQL
+    if not database_config.NORMALIZED_SCHEMA:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
+            detail="Search needs the normalized schema: run `python -m src.database.migrations` and set NORMALIZED_SCHEMA=true"
         )
-    # SQL query to fetch all candidate profiles
-    select_query = '''
-        SELECT 
-            job_id,
-            job_name, 
-            certificate,
-            degree, 
-            experience,
-            responsibility,
-            soft_skill,
-            technical_skill
-        FROM job_descriptions
-    '''
 
     try:
-        # Execute the query
-        cursor.execute(select_query)
-        
-        # Fetch all the data from the database
-        job_data = cursor.fetchall()
-
-        # If no data is found, return an empty list
-        if not job_data:
-            return []
-
-        # Map the result into a structured list of dictionaries
-        jobs = []
-        for row in job_data:
-            job_description = {
-                "job_id": row[0],
-                "job_name": row[1],
-                "certificate": json.loads(row[2]) if row[2] else [],  # Parse only if not NULL or empty
-                "degree": json.loads(row[3]) if row[3] else [],  # Parse only if not NULL or empty
-                "experience": json.loads(row[4]) if row[4] else [],  # Parse only if not NULL or empty
-                "responsibility": json.loads(row[5]) if row[5] else [],  # Parse only if not NULL or empty
-                "soft_skill": json.loads(row[6]) if row[6] else [],  # Parse only if not NULL or empty
-                "technical_skill": json.loads(row[7]) if row[7] else [],  # Parse only if not NULL or empty
-            }
-            jobs.append(job_description)
-
-        # Return the structured data as a list of JSON objects
-        return jobs
-    
+        async with db_pool.connection() as conn:
+            return await repository.search_jobs(
+                conn, skills=skill, degrees=degree, certificates=certificate, limit=limit
+            )
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while fetching data: {str(e)}"
         )
-    
-    finally:
-        # Close cursor and connection to avoid leaks
-        cursor.close()
 
 
 @router.delete("/delete_job/{job_id}")
 async def delete_job(job_id: int):
-    # Connect to the database
-    cursor = connectToDB()
-    if cursor is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
-        )
-
     # SQL query to delete the candidate profile by ID
     delete_query = '''
         DELETE FROM job_descriptions
@@ -212,29 +191,29 @@ async def delete_job(job_id: int):
     '''
 
     try:
-        # Execute the deletion query
-        cursor.execute(delete_query, (job_id,))
-        
-        # Check if any row was deleted
-        if cursor.rowcount == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Job not found"
-            )
+        # Execute the deletion query; committed when the block succeeds
+        async with db_pool.transaction() as conn:
+            deleted = await conn.execute(delete_query, (job_id,))
+            if database_config.NORMALIZED_SCHEMA:
+                await repository.delete_child_rows(conn, [job_id])
 
-        # Commit the transaction to reflect changes
-        cursor.commit()
-
-        return {"detail": "Job deleted successfully"}
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
 
     except Exception as e:
-        # Rollback in case of error
-        cursor.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while deleting the candidate: {str(e)}"
         )
 
-    finally:
-        # Close cursor and connection to avoid leaks
-        cursor.close()
+    # Check if any row was deleted
+    if deleted == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return {"detail": "Job deleted successfully"}
@@ -1,5 +1,19 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
+
 class JobSchema(BaseModel):
     job_name: str
-    job_description: str
\ No newline at end of file
+    job_description: str
+
+class JobDescription(BaseModel):
+    # Every field is optional because ?fields= can project any subset
+    job_id: Optional[int] = None
+    job_name: Optional[str] = None
+    certificate: Optional[List[str]] = None
+    degree: Optional[List[str]] = None
+    experience: Optional[List[str]] = None
+    responsibility: Optional[List[str]] = None
+    soft_skill: Optional[List[str]] = None
+    technical_skill: Optional[List[str]] = None
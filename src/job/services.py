@@ -1,30 +1,53 @@
-import json
-
-import jsbeautifier
 from langchain.schema import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from src.cache.store import llm_cache, make_cache_key, prompt_fingerprint
 from src.job.config import job_config
 from src.job.prompts import fn_job_analysis, system_prompt_job
+from src.llm.routing import build_route
+from src.llm.streaming import field_event
 
+# Bumps automatically whenever the prompt or function schema is edited
+PROMPT_VERSION = prompt_fingerprint(system_prompt_job, fn_job_analysis)
 
-def output2json(output):
-    """GPT Output Object >>> json"""
-    opts = jsbeautifier.default_options()
-    return json.loads(jsbeautifier.beautify(output["function_call"]["arguments"], opts))
+ROUTE = build_route("job", job_config.JOB_MODEL_TIERS, job_config.MODEL_NAME, job_config.JOB_MIN_COMPLETENESS)
 
 
-def analyse_job(job_data):
+async def analyse_job(job_data):
+    # The job name is not sent to the model, so only the description is part of the key
+    cache_key = make_cache_key("job", ROUTE.cache_id, PROMPT_VERSION, job_data.job_description)
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    llm = ChatOpenAI(model=job_config.MODEL_NAME, temperature=0.5)
-    completion = llm.predict_messages(
-        [
+    json_output = await ROUTE.complete(
+        messages=[
             SystemMessage(content=system_prompt_job),
             HumanMessage(content=job_data.job_description),
         ],
         functions=fn_job_analysis,
     )
-    output_analysis = completion.additional_kwargs
+    await llm_cache.set(cache_key, json_output)
+
+    return json_output
 
-    json_output = output2json(output=output_analysis)
 
-    return json_output
\ No newline at end of file
+async def analyse_job_stream(job_data):
+    """analyse_job as ("field", {"name", "value"}) events while the model streams, then ("result", json_output)"""
+    cache_key = make_cache_key("job", ROUTE.cache_id, PROMPT_VERSION, job_data.job_description)
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        for name, value in cached.items():
+            yield field_event(name, value)
+        yield "result", cached
+        return
+
+    events = ROUTE.stream(
+        messages=[
+            SystemMessage(content=system_prompt_job),
+            HumanMessage(content=job_data.job_description),
+        ],
+        functions=fn_job_analysis,
+    )
+    async for event, data in events:
+        if event == "result":
+            await llm_cache.set(cache_key, data)
+        yield event, data
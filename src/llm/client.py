@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import random
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from src.llm.config import llm_config
+from src.llm.governor import llm_governor
+from src.telemetry.instrument import LLM_REQUESTS, current_endpoint, record_llm_usage, stage
+from src.telemetry.metrics import registry
+
+LOGGER = logging.getLogger(__name__)
+
+# Errors worth another attempt; anything else (bad request, auth) fails fast
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class LLMClient:
+    """Process-wide async chat client.
+
+    Every ChatOpenAI instance shares one pooled httpx.AsyncClient, calls wait
+    for the model's budget in llm_governor, completions in flight are capped
+    by a semaphore and transient failures are retried with exponential backoff
+    and full jitter. A 429 pauses the model in the governor instead, so the
+    retry queues behind everyone else rather than sleeping on its own.
+    """
+
+    def __init__(
+        self,
+        max_concurrency=llm_config.LLM_MAX_CONCURRENCY,
+        max_retries=llm_config.LLM_MAX_RETRIES,
+        backoff_base=llm_config.LLM_BACKOFF_BASE,
+        backoff_max=llm_config.LLM_BACKOFF_MAX,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._http = None
+        self._models = {}
+        self._embeddings = {}
+        self._semaphore = None
+        self.in_flight = 0
+
+    def _get_http(self):
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=llm_config.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=llm_config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(llm_config.LLM_TIMEOUT, connect=llm_config.LLM_CONNECT_TIMEOUT),
+            )
+            self._models = {}
+            self._embeddings = {}
+        return self._http
+
+    def get_model(self, model):
+        http = self._get_http()
+        if model not in self._models:
+            self._models[model] = ChatOpenAI(
+                model=model,
+                temperature=llm_config.TEMPERATURE,
+                openai_api_key=llm_config.OPENAI_API_KEY,
+                base_url=llm_config.OPENAI_BASE_URL,
+                http_async_client=http,
+                # Retries are handled here so they can share the jittered backoff
+                max_retries=0,
+                timeout=llm_config.LLM_TIMEOUT,
+                # Token usage on the last streamed chunk too, for the /metrics cost counters
+                stream_usage=True,
+                # x-ratelimit-* headers in response_metadata, for the governor
+                include_response_headers=True,
+            )
+        return self._models[model]
+
+    def get_embeddings(self, model):
+        http = self._get_http()
+        if model not in self._embeddings:
+            self._embeddings[model] = OpenAIEmbeddings(
+                model=model,
+                openai_api_key=llm_config.OPENAI_API_KEY,
+                base_url=llm_config.OPENAI_BASE_URL,
+                http_async_client=http,
+                max_retries=llm_config.LLM_MAX_RETRIES,
+                timeout=llm_config.LLM_TIMEOUT,
+            )
+        return self._embeddings[model]
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _refund(self, model, reserved, usage=None):
+        """Give a failed call's reservation back to the budget, keeping only what it was billed for"""
+        await llm_governor.settle(model, reserved, usage or {"total_tokens": 0})
+
+    async def _retry_delay(self, model, attempt, error, reserved, usage=None):
+        """Seconds to sleep before the next attempt; a rate-limited call leaves the waiting to the governor"""
+        delay = self._backoff(attempt, error)
+        if isinstance(error, openai.RateLimitError) and llm_governor.enabled:
+            response = getattr(error, "response", None)
+            await llm_governor.throttled(model, reserved, response.headers if response is not None else None, delay)
+            return 0.0
+        # The next attempt reserves again, so this one's estimate must not stay charged
+        await self._refund(model, reserved, usage)
+        return delay
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def complete(self, model, messages, functions=None):
+        """Run one chat completion and return the AIMessage"""
+        llm = self.get_model(model)
+        kwargs = {"functions": functions} if functions else {}
+
+        for attempt in range(self.max_retries + 1):
+            with stage("llm_queue", model=model):
+                reserved = await llm_governor.acquire(model, messages, functions)
+            try:
+                with stage("llm", model=model):
+                    async with self._get_semaphore():
+                        self.in_flight += 1
+                        try:
+                            message = await llm.ainvoke(messages, **kwargs)
+                        finally:
+                            self.in_flight -= 1
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self._record(model, "error")
+                    await self._refund(model, reserved)
+                    raise
+                self._record(model, "retry")
+                delay = await self._retry_delay(model, attempt, e, reserved)
+                LOGGER.warning(
+                    f"LLM call failed ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                # Sleep outside the semaphore so waiting retries don't hold a slot
+                await asyncio.sleep(delay)
+            except Exception:
+                self._record(model, "error")
+                await self._refund(model, reserved)
+                raise
+            except asyncio.CancelledError:
+                # The caller went away; the budget must not stay charged until the bucket refills
+                await self._refund(model, reserved)
+                raise
+            else:
+                # Outside the try, so a cancellation while settling can't refund a second time
+                self._record(model, "ok", message.usage_metadata)
+                await llm_governor.settle(model, reserved, message.usage_metadata, message.response_metadata.get("headers"))
+                return message
+
+    async def stream(self, model, messages, functions=None):
+        """Yield the function-call arguments (or the content, without functions) as the model streams them.
+
+        Failures before the first chunk are retried like complete(); once text
+        has been handed out a failure propagates, since it can't be taken back.
+        """
+        llm = self.get_model(model)
+        kwargs = {"functions": functions} if functions else {}
+
+        for attempt in range(self.max_retries + 1):
+            started = False
+            usage = None
+            headers = None
+            with stage("llm_queue", model=model):
+                reserved = await llm_governor.acquire(model, messages, functions)
+            try:
+                with stage("llm", model=model, stream=True):
+                    async with self._get_semaphore():
+                        self.in_flight += 1
+                        try:
+                            async for chunk in llm.astream(messages, **kwargs):
+                                usage = chunk.usage_metadata or usage
+                                headers = chunk.response_metadata.get("headers") or headers
+                                function_call = chunk.additional_kwargs.get("function_call")
+                                delta = function_call.get("arguments", "") if function_call else chunk.content
+                                if delta:
+                                    started = True
+                                    yield delta
+                        finally:
+                            self.in_flight -= 1
+            except RETRYABLE_ERRORS as e:
+                if started or attempt == self.max_retries:
+                    self._record(model, "error")
+                    await self._refund(model, reserved, usage)
+                    raise
+                self._record(model, "retry")
+                delay = await self._retry_delay(model, attempt, e, reserved, usage)
+                LOGGER.warning(
+                    f"LLM stream failed ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            except Exception:
+                self._record(model, "error")
+                await self._refund(model, reserved, usage)
+                raise
+            except (asyncio.CancelledError, GeneratorExit):
+                # The consumer stopped early (SSE client disconnected): settle with the usage seen so far
+                await self._refund(model, reserved, usage)
+                raise
+            else:
+                self._record(model, "ok", usage)
+                await llm_governor.settle(model, reserved, usage, headers)
+                return
+
+    def _record(self, model, outcome, usage=None):
+        LLM_REQUESTS.inc(model=model, endpoint=current_endpoint(), outcome=outcome)
+        record_llm_usage(model, usage)
+
+    async def aclose(self):
+        await llm_governor.aclose()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self._models = {}
+        self._embeddings = {}
+
+
+llm_client = LLMClient()
+registry.register_stats("cv_ranking_llm_client", "LLM client state", lambda: {"in_flight": llm_client.in_flight})
+registry.register_stats("cv_ranking_llm_governor", "LLM rate-limit governor: grants, 429s, queue wait", llm_governor.stats)
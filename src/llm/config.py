@@ -0,0 +1,68 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings
+
+
+class LLMConfig(BaseSettings):
+    OPENAI_API_KEY: Optional[str] = None
+    # Point at the fake server (e.g. http://localhost:8090/v1) for local load tests
+    OPENAI_BASE_URL: Optional[str] = None
+    TEMPERATURE: float = 0.5
+
+    # Shared HTTP connection pool
+    LLM_MAX_CONNECTIONS: int = 64
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 32
+    LLM_TIMEOUT: float = 120.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+
+    # Completions in flight at once across the whole process
+    LLM_MAX_CONCURRENCY: int = 16
+
+    # Request-rate budgets (e.g. RANK_REQUESTS_PER_MINUTE): "sqlite" keeps the token buckets
+    # in a file every worker process on the host draws from, "memory" counts per process
+    RATE_LIMIT_BACKEND: str = "sqlite"
+    RATE_LIMIT_PATH: str = "./cache/ratelimit.sqlite3"
+
+    # Per-model OpenAI quotas as {model: (requests per minute, tokens per minute)}, 0 for no limit.
+    # Calls wait in a fair queue until both budgets allow them; the x-ratelimit-* response headers
+    # can only tighten these. Shared between worker processes through RATE_LIMIT_BACKEND.
+    LLM_GOVERNOR_ENABLED: bool = True
+    LLM_RATE_LIMITS: dict = {
+        "gpt-3.5-turbo-16k": (3500, 90_000),
+        "gpt-3.5-turbo": (3500, 200_000),
+        "gpt-4o-mini": (5000, 2_000_000),
+        "gpt-4o": (5000, 800_000),
+    }
+    LLM_DEFAULT_RPM: int = 500
+    LLM_DEFAULT_TPM: int = 60_000
+    # Completion tokens reserved per call until the API reports the real usage
+    LLM_COMPLETION_TOKENS_ESTIMATE: int = 800
+
+    # Model routing: each task tries its *_MODEL_TIERS cheapest first and escalates on an invalid
+    # or mostly empty answer; false sends everything to the task's MODEL_NAME
+    LLM_ROUTING_ENABLED: bool = True
+    # Prompt + completion tokens each model accepts; tiers that can't fit the input are skipped
+    LLM_CONTEXT_WINDOWS: dict = {
+        "gpt-3.5-turbo-16k": 16_385,
+        "gpt-3.5-turbo": 16_385,
+        "gpt-4o-mini": 128_000,
+        "gpt-4o": 128_000,
+        "gpt-4-turbo": 128_000,
+    }
+
+    # Retry with exponential backoff and full jitter
+    LLM_MAX_RETRIES: int = 4
+    LLM_BACKOFF_BASE: float = 1.0
+    LLM_BACKOFF_MAX: float = 30.0
+
+    # Fake server behaviour
+    FAKE_LLM_LATENCY: float = 1.0
+    FAKE_LLM_LATENCY_JITTER: float = 0.2
+    # Quota per model enforced by the fake server with 429s, 0 for none
+    FAKE_LLM_RPM: int = 0
+    FAKE_LLM_TPM: int = 0
+    # Share of answers per model that come back with most fields empty, to exercise routing escalation
+    FAKE_LLM_SPARSE_RATES: dict = {}
+
+
+llm_config = LLMConfig()
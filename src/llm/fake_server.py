@@ -0,0 +1,217 @@
+"""OpenAI-compatible stand-in for local load tests.
+
+    uvicorn src.llm.fake_server:app --port 8090
+    OPENAI_BASE_URL=http://localhost:8090/v1 OPENAI_API_KEY=fake uvicorn main:app
+
+Every chat completion waits FAKE_LLM_LATENCY seconds (plus jitter) and answers
+with a function call whose arguments are generated from the requested schema,
+deterministically for the same input. Requests with "stream": true get the
+arguments back as SSE chunks. FAKE_LLM_RPM/FAKE_LLM_TPM enforce a per-model
+quota the way OpenAI does: x-ratelimit-* headers on every answer and a 429
+with retry-after once a bucket is empty. FAKE_LLM_SPARSE_RATES makes a share
+of a model's answers leave most fields empty, like a weak model would.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.llm.config import llm_config
+
+app = FastAPI(title="Fake LLM")
+
+# Characters of function-call arguments per streamed chunk
+STREAM_CHUNK_CHARS = 16
+
+
+def fake_value(schema, rng, name="value"):
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: fake_value(child, rng, name=key)
+            for key, child in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [fake_value(schema.get("items", {}), rng, name=name) for _ in range(rng.randint(1, 3))]
+    if kind == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 100)), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return f"Sample {name} {rng.randint(1, 999)}"
+
+
+def sparse(arguments, rng):
+    """Blank all but one top-level field"""
+    keep = rng.choice(list(arguments)) if arguments else None
+    return {key: value if key == keep else ([] if isinstance(value, list) else "") for key, value in arguments.items()}
+
+
+def seed_for(messages):
+    content = "".join(str(message.get("content", "")) for message in messages)
+    return int(hashlib.sha256(content.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def chunk_body(completion_id, model, delta, finish_reason=None):
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class FakeQuota:
+    """OpenAI-style buckets per model: full at the per-minute limit, refilled continuously"""
+
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._buckets = {}
+
+    def take(self, model, tokens):
+        """(headers, seconds to wait); the request is admitted when the wait is 0"""
+        now = time.monotonic()
+        requests, available, updated = self._buckets.get(model, (self.rpm, self.tpm, now))
+        requests = min(self.rpm, requests + (now - updated) * self.rpm / 60)
+        available = min(self.tpm, available + (now - updated) * self.tpm / 60)
+        wait = 0.0
+        if self.rpm and requests < 1:
+            wait = (1 - requests) * 60 / self.rpm
+        if self.tpm and available < tokens:
+            wait = max(wait, (tokens - available) * 60 / self.tpm)
+        if wait == 0:
+            requests -= 1
+            available -= tokens
+        self._buckets[model] = (requests, available, now)
+
+        headers = {}
+        if self.rpm:
+            headers["x-ratelimit-limit-requests"] = str(self.rpm)
+            headers["x-ratelimit-remaining-requests"] = str(max(0, int(requests)))
+            headers["x-ratelimit-reset-requests"] = f"{max(0.0, 1 - requests) * 60 / self.rpm:.3f}s"
+        if self.tpm:
+            headers["x-ratelimit-limit-tokens"] = str(self.tpm)
+            headers["x-ratelimit-remaining-tokens"] = str(max(0, int(available)))
+            headers["x-ratelimit-reset-tokens"] = f"{max(0.0, self.tpm - available) * 60 / self.tpm:.3f}s"
+        return headers, wait
+
+
+quota = FakeQuota(llm_config.FAKE_LLM_RPM, llm_config.FAKE_LLM_TPM)
+
+
+def usage_for(messages, message):
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+    completion_tokens = len(json.dumps(message)) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+async def stream_completion(completion_id, model, message, finish_reason, latency, usage=None):
+    """SSE chunks: the first after a fifth of the latency, the rest of the arguments spread over the remainder"""
+    await asyncio.sleep(latency * 0.2)
+    function_call = message.get("function_call")
+    text = function_call["arguments"] if function_call else message["content"]
+    pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+
+    first = {"role": "assistant", "content": None if function_call else ""}
+    if function_call:
+        first["function_call"] = {"name": function_call["name"], "arguments": ""}
+    yield f"data: {json.dumps(chunk_body(completion_id, model, first))}\n\n"
+
+    for piece in pieces:
+        await asyncio.sleep(latency * 0.8 / len(pieces))
+        delta = {"function_call": {"arguments": piece}} if function_call else {"content": piece}
+        yield f"data: {json.dumps(chunk_body(completion_id, model, delta))}\n\n"
+
+    yield f"data: {json.dumps(chunk_body(completion_id, model, {}, finish_reason))}\n\n"
+    if usage is not None:
+        # stream_options.include_usage: one last chunk without choices
+        yield f"data: {json.dumps({**chunk_body(completion_id, model, {}), 'choices': [], 'usage': usage})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    rng = random.Random(seed_for(messages))
+
+    headers = {}
+    if quota.rpm or quota.tpm:
+        # Charged up front like OpenAI: the prompt plus the completion allowance
+        tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4 + (body.get("max_tokens") or 500)
+        headers, wait = quota.take(body.get("model", "fake"), tokens)
+        if wait:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={**headers, "retry-after": f"{wait:.3f}"},
+            )
+    latency = max(0.0, llm_config.FAKE_LLM_LATENCY + random.uniform(-1, 1) * llm_config.FAKE_LLM_LATENCY_JITTER)
+
+    if not body.get("stream"):
+        await asyncio.sleep(latency)
+
+    message = {"role": "assistant", "content": None}
+    functions = body.get("functions") or []
+    if functions:
+        function = functions[0]
+        arguments = fake_value(function.get("parameters", {}), rng)
+        if rng.random() < llm_config.FAKE_LLM_SPARSE_RATES.get(body.get("model"), 0.0):
+            arguments = sparse(arguments, rng)
+        message["function_call"] = {"name": function["name"], "arguments": json.dumps(arguments)}
+        finish_reason = "function_call"
+    else:
+        message["content"] = "Sample answer"
+        finish_reason = "stop"
+
+    completion_id = f"chatcmpl-fake-{rng.randint(0, 10**9)}"
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_completion(
+                completion_id, body.get("model", "fake"), message, finish_reason, latency,
+                usage=usage_for(messages, message) if (body.get("stream_options") or {}).get("include_usage") else None,
+            ),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": usage_for(messages, message),
+    }, headers=headers)
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body.get("input", [])
+    if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    dimensions = body.get("dimensions") or 256
+
+    data = []
+    for index, item in enumerate(inputs):
+        rng = random.Random(seed_for([{"content": item}]))
+        data.append({"object": "embedding", "index": index, "embedding": [rng.uniform(-1, 1) for _ in range(dimensions)]})
+
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "fake"),
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
@@ -0,0 +1,320 @@
+"""Global request/token budgets for chat completions.
+
+Every call estimates its tokens (tiktoken over the messages and function
+schema, plus LLM_COMPLETION_TOKENS_ESTIMATE for the answer) and waits until
+the model's requests-per-minute and tokens-per-minute buckets both cover it.
+Waiting calls are queued per model and served round-robin across endpoints,
+so a bulk ranking cannot starve an interactive /candidate/analyse.
+
+The buckets live in a BudgetStore; with RATE_LIMIT_BACKEND=sqlite all worker
+processes on the host share them. After each call the reservation is settled
+against the reported usage, the x-ratelimit-* headers tighten the buckets
+when the real quota is lower than configured, and a 429 pauses the model for
+every caller instead of letting each one retry into the wall.
+"""
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+import orjson
+
+from src.llm.config import llm_config
+from src.llm.tokens import get_token_counter
+from src.telemetry.instrument import current_endpoint
+
+LOGGER = logging.getLogger(__name__)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+# Tokens of framing per chat message on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def parse_duration(value):
+    """OpenAI reset header ("1s", "6m0s", "20ms") in seconds, None if unparseable"""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def prompt_tokens(model, messages, functions=None):
+    counter = get_token_counter(model)
+    tokens = sum(counter.count(str(message.content)) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+    if functions:
+        tokens += counter.count(orjson.dumps(functions).decode("utf-8"))
+    return tokens
+
+
+def estimate_tokens(model, messages, functions=None):
+    return prompt_tokens(model, messages, functions) + llm_config.LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def configured_limits(model):
+    return llm_config.LLM_RATE_LIMITS.get(model, (llm_config.LLM_DEFAULT_RPM, llm_config.LLM_DEFAULT_TPM))
+
+
+def _effective(configured, learned):
+    """The tighter of the configured and the advertised limit, 0 when neither limits"""
+    limits = [limit for limit in (configured, learned) if limit]
+    return min(limits) if limits else 0
+
+
+class BudgetStore:
+    """Per-model bucket state; subclasses provide an atomic read-modify-write in _update"""
+
+    def _update(self, model, change):
+        raise NotImplementedError
+
+    @staticmethod
+    def _refill(state, now, rpm, tpm):
+        if state is None:
+            state = {"requests": rpm, "tokens": tpm, "updated_at": now, "paused_until": 0.0}
+        rpm = _effective(rpm, state.get("limit_requests"))
+        tpm = _effective(tpm, state.get("limit_tokens"))
+        elapsed = max(0.0, now - state["updated_at"])
+        if rpm:
+            state["requests"] = min(rpm, state["requests"] + elapsed * rpm / 60)
+        if tpm:
+            state["tokens"] = min(tpm, state["tokens"] + elapsed * tpm / 60)
+        state["updated_at"] = now
+        return state, rpm, tpm
+
+    def take(self, model, tokens, rpm, tpm):
+        """Reserve one request and `tokens` tokens; 0 on success, else seconds to wait before asking again"""
+
+        def change(state, now):
+            state, rpm_, tpm_ = self._refill(state, now, rpm, tpm)
+            # A call larger than the whole per-minute budget waits for a full bucket
+            need = min(tokens, tpm_) if tpm_ else 0
+            waits = [state["paused_until"] - now]
+            if rpm_ and state["requests"] < 1:
+                waits.append((1 - state["requests"]) * 60 / rpm_)
+            if tpm_ and state["tokens"] < need:
+                waits.append((need - state["tokens"]) * 60 / tpm_)
+            wait = max(waits)
+            if wait <= 0:
+                state["requests"] -= 1
+                state["tokens"] -= need
+                return state, 0.0
+            return state, wait
+
+        return self._update(model, change)
+
+    def settle(self, model, refund, rpm, tpm, headers=None, pause=None):
+        """Return unused reserved tokens (negative: charge the excess), apply rate-limit headers and pauses"""
+
+        def change(state, now):
+            state, _, tpm_ = self._refill(state, now, rpm, tpm)
+            state["tokens"] += refund
+            if tpm_:
+                state["tokens"] = min(tpm_, state["tokens"])
+            if headers:
+                for kind in ("requests", "tokens"):
+                    limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+                    if limit:
+                        state[f"limit_{kind}"] = limit
+                    remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+                    if remaining is not None:
+                        state[kind] = min(state[kind], remaining)
+                        reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                        if remaining < 1 and reset:
+                            state["paused_until"] = max(state["paused_until"], now + reset)
+            if pause:
+                state["paused_until"] = max(state["paused_until"], now + pause)
+            return state, None
+
+        self._update(model, change)
+
+
+class MemoryBudgetStore(BudgetStore):
+    """Buckets for this process only"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _update(self, model, change):
+        with self._lock:
+            state, result = change(self._states.get(model), time.time())
+            self._states[model] = state
+            return result
+
+
+class SQLiteBudgetStore(BudgetStore):
+    """Buckets in the RATE_LIMIT_PATH file, updated inside BEGIN IMMEDIATE by every worker on the host"""
+
+    def __init__(self, path=llm_config.RATE_LIMIT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+        # A SQLite connection must not be used on both sides of a fork (preloading launcher)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        # Autocommit mode; _update opens its own transaction
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS llm_budgets (model TEXT PRIMARY KEY, state BLOB NOT NULL)")
+
+    def _update(self, model, change):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            try:
+                row = self._conn.execute("SELECT state FROM llm_budgets WHERE model = ?", (model,)).fetchone()
+                state, result = change(orjson.loads(row[0]) if row else None, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_budgets (model, state) VALUES (?, ?)", (model, orjson.dumps(state))
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+
+class _ModelQueue:
+    """Waiting calls of one model, one FIFO lane per endpoint"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.lanes = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.dispatcher = None
+
+    def push(self, lane, item):
+        self.lanes.setdefault(lane, deque()).append(item)
+        self.wakeup.set()
+
+    def pop(self):
+        """Head of the next lane in round-robin order"""
+        if not self.lanes:
+            return None
+        lane, waiters = next(iter(self.lanes.items()))
+        item = waiters.popleft()
+        if waiters:
+            self.lanes.move_to_end(lane)
+        else:
+            del self.lanes[lane]
+        return item
+
+    def __len__(self):
+        return sum(len(waiters) for waiters in self.lanes.values())
+
+
+class LLMGovernor:
+    def __init__(self, store, enabled=llm_config.LLM_GOVERNOR_ENABLED):
+        self.store = store
+        self.enabled = enabled
+        self._queues = {}
+        self.counters = {"granted": 0, "throttled": 0, "wait_seconds": 0.0, "store_errors": 0}
+
+    def _queue(self, model):
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(model)
+        if queue is None or queue.loop is not loop or queue.dispatcher.done():
+            queue = self._queues[model] = _ModelQueue(loop)
+            queue.dispatcher = loop.create_task(self._dispatch(model, queue))
+        return queue
+
+    async def acquire(self, model, messages, functions=None):
+        """Wait for the model's budget; returns the reserved tokens to pass to settle()"""
+        if not self.enabled:
+            return 0
+        tokens = await asyncio.to_thread(estimate_tokens, model, messages, functions)
+        future = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        self._queue(model).push(current_endpoint(), (tokens, future))
+        # Cancelling the caller cancels the future too, the dispatcher then skips it
+        await future
+        self.counters["wait_seconds"] += time.perf_counter() - started
+        return tokens
+
+    async def _dispatch(self, model, queue):
+        while True:
+            item = queue.pop()
+            if item is None:
+                queue.wakeup.clear()
+                await queue.wakeup.wait()
+                continue
+            tokens, future = item
+            rpm, tpm = configured_limits(model)
+            while not future.done():
+                try:
+                    wait = await asyncio.to_thread(self.store.take, model, tokens, rpm, tpm)
+                except Exception as e:
+                    # Shared state unavailable: let calls through rather than stall every request
+                    self.counters["store_errors"] += 1
+                    LOGGER.warning(f"LLM budget store failed, not rate limiting: {e}")
+                    wait = 0.0
+                if wait <= 0:
+                    if future.done():
+                        await self._settle(model, tokens)
+                    else:
+                        self.counters["granted"] += 1
+                        future.set_result(None)
+                    break
+                # Re-check now and then so a cancelled head of the line doesn't hold up the rest
+                await asyncio.sleep(min(wait, 1.0))
+
+    async def _settle(self, model, refund, headers=None, pause=None):
+        rpm, tpm = configured_limits(model)
+        try:
+            await asyncio.to_thread(self.store.settle, model, refund, rpm, tpm, headers, pause)
+        except Exception as e:
+            self.counters["store_errors"] += 1
+            LOGGER.warning(f"LLM budget store failed: {e}")
+
+    async def settle(self, model, reserved, usage=None, headers=None):
+        """Correct the reservation with the reported usage and apply the x-ratelimit-* headers"""
+        if not self.enabled:
+            return
+        refund = reserved - (usage or {}).get("total_tokens", reserved)
+        if refund or headers:
+            await self._settle(model, refund, headers)
+
+    async def throttled(self, model, reserved, headers, delay):
+        """A 429: the call used nothing, and the model is paused for `delay` seconds for every caller"""
+        self.counters["throttled"] += 1
+        await self._settle(model, reserved, headers, pause=delay)
+
+    def stats(self):
+        return {**self.counters, "queued": sum(len(queue) for queue in self._queues.values())}
+
+    async def aclose(self):
+        for queue in self._queues.values():
+            queue.dispatcher.cancel()
+        self._queues = {}
+
+
+def build_budget_store():
+    if llm_config.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteBudgetStore()
+    if llm_config.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBudgetStore()
+    raise ValueError(f"Unknown rate limit backend: {llm_config.RATE_LIMIT_BACKEND}")
+
+
+llm_governor = LLMGovernor(build_budget_store())
@@ -0,0 +1,192 @@
+"""Function-call argument parsing shared by the candidate, job and matching services.
+
+Arguments are parsed straight with orjson. Only when that fails does
+repair_json patch the usual LLM glitches (code fences, trailing commas,
+unterminated strings, output cut off mid-array) before a second attempt.
+The parsed object is then checked against the fn_* parameter schema.
+"""
+import re
+
+import orjson
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class SchemaValidationError(ValueError):
+    pass
+
+
+def _close(text):
+    """Drop trailing commas, terminate an open string and close every open bracket"""
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            out.append(char)
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+        out.append(char)
+
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    if repaired.endswith(","):
+        repaired = repaired[:-1]
+    if repaired.endswith(":"):
+        repaired += " null"
+    return repaired + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def _member_boundaries(text):
+    """Offsets of the commas separating members/items, outside strings, last first"""
+    boundaries = []
+    in_string = False
+    escape = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            boundaries.append(index)
+    return reversed(boundaries)
+
+
+def repair_json(text):
+    """Best-effort valid JSON for a malformed or truncated LLM payload.
+
+    Closing what is open fixes most cut-off outputs; when the cut fell inside a
+    key or a literal, the incomplete trailing member is dropped instead.
+    """
+    text = _CODE_FENCE.sub("", text)
+    start = text.find("{")
+    if start > 0:
+        text = text[start:]
+
+    repaired = _close(text)
+    try:
+        orjson.loads(repaired)
+        return repaired
+    except orjson.JSONDecodeError:
+        pass
+
+    for boundary in _member_boundaries(text):
+        candidate = _close(text[:boundary])
+        try:
+            orjson.loads(candidate)
+            return candidate
+        except orjson.JSONDecodeError:
+            continue
+    return repaired
+
+
+def loads_tolerant(text):
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    try:
+        return orjson.loads(repair_json(text))
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Function call arguments are not valid JSON: {e}") from None
+
+
+def validate(value, schema, path="$"):
+    """Check value against a JSON-schema subset (type, properties, required, items).
+
+    Lossless coercions are applied on the way ("85" or 85.0 for an integer,
+    84912345678 for a string, null for an array); anything else raises
+    SchemaValidationError.
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        if not isinstance(value, dict):
+            raise SchemaValidationError(f"{path}: expected an object")
+        missing = [key for key in schema.get("required", []) if key not in value]
+        if missing:
+            raise SchemaValidationError(f"{path}: missing {', '.join(missing)}")
+        properties = schema.get("properties", {})
+        return {
+            key: validate(item, properties[key], f"{path}.{key}") if key in properties else item
+            for key, item in value.items()
+        }
+    if kind == "array":
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            raise SchemaValidationError(f"{path}: expected an array")
+        items = schema.get("items", {})
+        return [validate(item, items, f"{path}[{index}]") for index, item in enumerate(value)]
+    if kind == "integer":
+        if isinstance(value, bool):
+            raise SchemaValidationError(f"{path}: expected an integer")
+        if isinstance(value, int):
+            return value
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise SchemaValidationError(f"{path}: expected an integer") from None
+        if not number.is_integer():
+            raise SchemaValidationError(f"{path}: expected an integer")
+        return int(number)
+    if kind == "number":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise SchemaValidationError(f"{path}: expected a number") from None
+    if kind == "string":
+        # A phone number or year answered as a JSON number is kept as its text
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if value is not None and not isinstance(value, str):
+            raise SchemaValidationError(f"{path}: expected a string")
+        return value
+    return value
+
+
+def function_schema(functions, name=None):
+    """Parameter schema of the named function, or of the only one"""
+    for function in functions:
+        if name is None or function["name"] == name:
+            return function.get("parameters", {})
+    raise SchemaValidationError(f"Model called unknown function {name}")
+
+
+def parse_arguments(arguments, functions, name=None):
+    return validate(loads_tolerant(arguments), function_schema(functions, name))
+
+
+def parse_function_call(output, functions):
+    """GPT output additional_kwargs >>> validated dict"""
+    function_call = output.get("function_call")
+    if not function_call:
+        raise ValueError("The model answered without calling the function")
+    return parse_arguments(function_call["arguments"], functions, function_call.get("name") or None)
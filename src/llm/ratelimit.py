@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from src.llm.config import llm_config
+
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per `per` seconds, bursting up to `burst`"""
+
+    def __init__(self, rate, per=60.0, burst=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = burst if burst is not None else max(1, int(rate / 10))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.per)
+        self._updated = now
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """The same token bucket, stored in a SQLite file shared by every worker process on the host.
+
+    Each take refills and decrements the named bucket inside BEGIN IMMEDIATE,
+    so N workers together stay under `rate` instead of N times it. Wall-clock
+    time is used since monotonic clocks are not comparable across processes.
+    """
+
+    def __init__(self, name, rate, per=60.0, burst=None, path=llm_config.RATE_LIMIT_PATH):
+        super().__init__(rate, per, burst)
+        self.name = name
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+        # A SQLite connection must not be used on both sides of a fork (preloading launcher)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._db_lock = threading.Lock()
+        # Autocommit mode; _take opens its own transaction
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _take(self):
+        """Take a token if one is available; otherwise the seconds until one will be"""
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, updated_at = row if row is not None else (self.capacity, now)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate / self.per)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) * self.per / self.rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # FIFO within the process; across processes whoever commits first wins
+        async with self._lock:
+            while (wait := await asyncio.to_thread(self._take)) > 0:
+                await asyncio.sleep(wait)
+
+
+def build_rate_limiter(name, rate, per=60.0, burst=None):
+    if llm_config.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimiter(name, rate, per, burst)
+    if llm_config.RATE_LIMIT_BACKEND == "memory":
+        return RateLimiter(rate, per, burst)
+    raise ValueError(f"Unknown rate limit backend: {llm_config.RATE_LIMIT_BACKEND}")
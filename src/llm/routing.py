@@ -0,0 +1,157 @@
+"""Model routing: cheapest model first, escalate when its answer is not usable.
+
+Each task (candidate, job, matching) has tiers of (model, max_input_tokens),
+cheapest first. A call starts at the first tier whose max_input_tokens covers
+the prompt (0 covers anything) and whose context window fits it, so long CVs
+go straight to the larger model. When a tier's function call fails to parse
+or validate, or fills in less than the task's min_completeness share of the
+schema's top-level fields, the next tier is tried; the last tier's answer is
+returned as is.
+
+Every attempt is counted per (task, model, outcome) with its latency and
+estimated cost, see telemetry.instrument.ROUTE_*.
+"""
+import asyncio
+import logging
+import time
+
+from src.llm.client import llm_client
+from src.llm.config import llm_config
+from src.llm.governor import prompt_tokens
+from src.llm.parsing import parse_function_call
+from src.llm.streaming import stream_function_call
+from src.telemetry.instrument import ROUTE_COST, ROUTE_REQUESTS, ROUTE_SECONDS, llm_cost
+
+LOGGER = logging.getLogger(__name__)
+
+# Every Route by task, for warm-up and preloading
+ROUTES = {}
+
+
+def _filled(value):
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, (list, tuple)):
+        return any(_filled(item) for item in value)
+    if isinstance(value, dict):
+        return any(_filled(item) for item in value.values())
+    return True
+
+
+def completeness(output, functions):
+    """Share of the function schema's top-level fields the answer filled in"""
+    fields = functions[0]["parameters"].get("properties", {})
+    if not fields:
+        return 1.0
+    return sum(_filled(output.get(name)) for name in fields) / len(fields)
+
+
+class Route:
+    def __init__(self, task, tiers, min_completeness):
+        self.task = task
+        self.tiers = [(model, int(max_input_tokens)) for model, max_input_tokens in tiers]
+        self.min_completeness = min_completeness
+        ROUTES[task] = self
+
+    @property
+    def models(self):
+        return [model for model, _ in self.tiers]
+
+    @property
+    def cache_id(self):
+        """Part of the cache key: answers from a different set of tiers are not reused"""
+        return "+".join(self.models)
+
+    def models_for(self, input_tokens):
+        """Models to try in order for a prompt of `input_tokens`"""
+        start = next(
+            (index for index, (_, limit) in enumerate(self.tiers) if not limit or input_tokens <= limit),
+            len(self.tiers) - 1,
+        )
+        reserve = input_tokens + llm_config.LLM_COMPLETION_TOKENS_ESTIMATE
+        models = [
+            model
+            for model, _ in self.tiers[start:]
+            if reserve <= llm_config.LLM_CONTEXT_WINDOWS.get(model, float("inf"))
+        ]
+        # Nothing fits: let the largest tier try (and fail) rather than route nowhere
+        return models or [self.tiers[-1][0]]
+
+    async def plan(self, messages, functions):
+        if len(self.tiers) == 1:
+            return self.models
+        tokens = await asyncio.to_thread(prompt_tokens, self.tiers[0][0], messages, functions)
+        return self.models_for(tokens)
+
+    def record(self, model, outcome, elapsed, usage=None):
+        cost = llm_cost(model, usage)
+        ROUTE_REQUESTS.inc(task=self.task, model=model, outcome=outcome)
+        ROUTE_SECONDS.observe(elapsed, task=self.task, model=model)
+        ROUTE_COST.inc(cost, task=self.task, model=model)
+        tokens = (usage or {}).get("total_tokens", 0)
+        LOGGER.info(f"Route {self.task} -> {model}: {outcome} in {elapsed:.2f}s, {tokens} tokens, ${cost:.5f}")
+
+    def check(self, model, output, functions, last):
+        """Outcome of a parsed answer: "ok", or "low_confidence" when another tier should try"""
+        if last:
+            return "ok"
+        filled = completeness(output, functions)
+        if filled < self.min_completeness:
+            LOGGER.info(f"Route {self.task}: {model} filled {filled:.0%} of the fields, escalating")
+            return "low_confidence"
+        return "ok"
+
+    async def complete(self, messages, functions, models=None):
+        """Parsed function call from the first tier with a usable answer"""
+        models = models or await self.plan(messages, functions)
+        for index, model in enumerate(models):
+            last = index == len(models) - 1
+            started = time.perf_counter()
+            completion = await llm_client.complete(model=model, messages=messages, functions=functions)
+            elapsed = time.perf_counter() - started
+            usage = completion.usage_metadata
+            try:
+                output = parse_function_call(completion.additional_kwargs, functions)
+            except ValueError as e:
+                self.record(model, "invalid", elapsed, usage)
+                if last:
+                    raise
+                LOGGER.info(f"Route {self.task}: {model} answer rejected ({e}), escalating")
+                continue
+            outcome = self.check(model, output, functions, last)
+            self.record(model, outcome, elapsed, usage)
+            if outcome == "ok":
+                return output
+
+    async def stream(self, messages, functions):
+        """stream_function_call on the first tier; if its result is not usable the remaining tiers
+        answer non-streamed. Field events already sent may then differ, the "result" event is final."""
+        models = await self.plan(messages, functions)
+        model, rest = models[0], models[1:]
+        started = time.perf_counter()
+        try:
+            async for event, data in stream_function_call(model=model, messages=messages, functions=functions):
+                if event != "result":
+                    yield event, data
+                    continue
+                # The stream's usage stays inside the client, its cost is on the LLM_COST counters
+                outcome = self.check(model, data, functions, not rest)
+                self.record(model, outcome, time.perf_counter() - started)
+                if outcome == "ok":
+                    yield event, data
+                    return
+        except ValueError as e:
+            self.record(model, "invalid", time.perf_counter() - started)
+            if not rest:
+                raise
+            LOGGER.info(f"Route {self.task}: streamed {model} answer rejected ({e}), escalating")
+        yield "result", await self.complete(messages, functions, models=rest)
+
+
+def build_route(task, tiers, model_name, min_completeness):
+    """The task's tiers, or just its MODEL_NAME when LLM_ROUTING_ENABLED is off"""
+    if not llm_config.LLM_ROUTING_ENABLED or not tiers:
+        tiers = ((model_name, 0),)
+    return Route(task, tiers, min_completeness)
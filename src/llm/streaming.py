@@ -0,0 +1,113 @@
+import json
+import logging
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+from src.llm.client import llm_client
+from src.llm.parsing import parse_arguments
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PartialObjectParser:
+    """Incremental scanner over a JSON object arriving in chunks.
+
+    feed() returns the top-level members whose value has been fully received
+    since the last call, e.g. {"candidate_name": "A", "degree": [...  yields
+    candidate_name as soon as the comma after it arrives. Nested values are
+    only reported once complete, so every reported value is final.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._member_chunks = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._in_object = False
+        self._closed = False
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    def _member(self, tail):
+        member = ("".join(self._member_chunks) + tail).strip()
+        self._member_chunks = []
+        if not member:
+            return []
+        try:
+            return list(orjson.loads("{" + member + "}").items())
+        except orjson.JSONDecodeError:
+            # Not strict JSON (True, single quotes...): no field event, the final repair parse deals with it
+            return []
+
+    def feed(self, chunk):
+        # Chunks are kept in lists and only the current member is joined, so long streams stay linear
+        self._chunks.append(chunk)
+        completed = []
+        start = 0
+        for pos, char in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._in_object = True
+                    start = pos + 1
+            elif char in "}]":
+                if self._depth == 1:
+                    completed.extend(self._member(chunk[start:pos]))
+                    self._in_object = False
+                    self._closed = True
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                completed.extend(self._member(chunk[start:pos]))
+                start = pos + 1
+        if self._in_object:
+            self._member_chunks.append(chunk[start:])
+        return completed
+
+    @property
+    def complete(self):
+        return self._closed
+
+
+def field_event(name, value):
+    return "field", {"name": name, "value": value}
+
+
+async def stream_function_call(model, messages, functions):
+    """Yield ("field", {"name", "value"}) per completed top-level field, then ("result", full object)"""
+    parser = PartialObjectParser()
+    async for delta in llm_client.stream(model, messages, functions):
+        for name, value in parser.feed(delta):
+            yield field_event(name, value)
+    text = parser.text
+    if not parser.complete:
+        LOGGER.warning(f"Streamed function call for {model} ended early, repairing {len(text)} chars")
+    # The full text goes through the same tolerant parse and schema check as a non-streamed call
+    yield "result", parse_arguments(text, functions)
+
+
+def sse_event(event, data):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    """StreamingResponse for an async generator of sse_event strings"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Keep proxies (IIS/ARR, nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.llm import client as client_module
+from src.llm.client import LLMClient
+
+
+class FakeGovernor:
+    enabled = True
+
+    def __init__(self):
+        self.settled = []
+
+    async def acquire(self, model, messages, functions=None):
+        return 100
+
+    async def settle(self, model, reserved, usage=None, headers=None):
+        self.settled.append((reserved, usage))
+
+
+class FakeModel:
+    def __init__(self, deltas, error=None):
+        self.deltas = deltas
+        self.error = error
+
+    async def astream(self, messages, **kwargs):
+        for delta in self.deltas:
+            yield SimpleNamespace(usage_metadata=None, response_metadata={}, additional_kwargs={}, content=delta)
+        if self.error is not None:
+            raise self.error
+        yield SimpleNamespace(
+            usage_metadata={"total_tokens": 30}, response_metadata={}, additional_kwargs={}, content=""
+        )
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    governor = FakeGovernor()
+    monkeypatch.setattr(client_module, "llm_governor", governor)
+    return governor
+
+
+def stream(model):
+    client = LLMClient(max_retries=0)
+    client.get_model = lambda name: model
+    return client, client.stream("m", [])
+
+
+def test_stream_settles_with_usage(governor):
+    async def consume():
+        _, deltas = stream(FakeModel(["a", "b"]))
+        return [delta async for delta in deltas]
+
+    assert asyncio.run(consume()) == ["a", "b"]
+    assert governor.settled == [(100, {"total_tokens": 30})]
+
+
+def test_stream_refunds_when_the_consumer_stops(governor):
+    async def consume():
+        client, deltas = stream(FakeModel(["a", "b", "c"]))
+        assert await deltas.__anext__() == "a"
+        await deltas.aclose()
+        return client
+
+    client = asyncio.run(consume())
+    assert governor.settled == [(100, {"total_tokens": 0})]
+    assert client.in_flight == 0
+
+
+def test_stream_refunds_on_error(governor):
+    async def consume():
+        _, deltas = stream(FakeModel(["a"], error=ValueError("bad")))
+        return [delta async for delta in deltas]
+
+    with pytest.raises(ValueError):
+        asyncio.run(consume())
+    assert governor.settled == [(100, {"total_tokens": 0})]
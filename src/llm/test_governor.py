@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from src.llm.governor import LLMGovernor, MemoryBudgetStore, _effective, configured_limits, parse_duration
+
+
+class ClockStore(MemoryBudgetStore):
+    """MemoryBudgetStore on a clock the test moves"""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 1000.0
+
+    def _update(self, model, change):
+        state, result = change(self._states.get(model), self.now)
+        self._states[model] = state
+        return result
+
+    def tokens(self, model="m"):
+        return self._states[model]["tokens"]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1s", 1.0),
+    ("6m0s", 360.0),
+    ("20ms", 0.02),
+    ("1h2m", 3720.0),
+    ("2.5", 2.5),
+    ("", None),
+    ("soon", None),
+])
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+
+def test_effective_limit():
+    assert _effective(500, None) == 500
+    assert _effective(500, 200) == 200
+    assert _effective(0, 200) == 200
+    assert _effective(0, None) == 0
+
+
+def test_take_waits_for_requests_and_refills():
+    store = ClockStore()
+    assert store.take("m", 100, 2, 1000) == 0.0
+    assert store.take("m", 100, 2, 1000) == 0.0
+    # Request bucket empty: one request refills in 60 / rpm seconds
+    assert store.take("m", 100, 2, 1000) == pytest.approx(30.0)
+
+    store.now += 30
+    assert store.take("m", 100, 2, 1000) == 0.0
+
+
+def test_take_waits_for_tokens():
+    store = ClockStore()
+    assert store.take("m", 500, 0, 600) == 0.0
+    assert store.tokens() == 100
+    # 200 tokens short at 600 per minute
+    assert store.take("m", 300, 0, 600) == pytest.approx(20.0)
+    assert store.tokens() == 100
+
+    store.now += 20
+    assert store.take("m", 300, 0, 600) == 0.0
+    assert store.tokens() == pytest.approx(0.0)
+
+
+def test_oversized_call_takes_a_full_bucket():
+    store = ClockStore()
+    assert store.take("m", 5000, 0, 600) == 0.0
+    assert store.tokens() == 0
+
+
+def test_refill_is_capped_at_the_limit():
+    store = ClockStore()
+    store.take("m", 100, 0, 600)
+    store.now += 3600
+    store.take("m", 0, 0, 600)
+    assert store.tokens() == 600
+
+
+def test_settle_refunds_and_charges():
+    store = ClockStore()
+    store.take("m", 500, 0, 600)
+    store.settle("m", 200, 0, 600)
+    assert store.tokens() == 300
+    # Refunds never lift the bucket above the limit
+    store.settle("m", 800, 0, 600)
+    assert store.tokens() == 600
+    # Usage above the reservation is charged
+    store.settle("m", -700, 0, 600)
+    assert store.tokens() == -100
+    assert store.take("m", 100, 0, 600) == pytest.approx(20.0)
+
+
+def test_settle_applies_rate_limit_headers():
+    store = ClockStore()
+    store.take("m", 100, 0, 6000)
+    store.settle("m", 0, 0, 6000, headers={
+        "x-ratelimit-limit-tokens": "600",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "6m0s",
+    })
+    assert store.tokens() == 0
+    assert store.take("m", 100, 0, 6000) == pytest.approx(360.0)
+
+    # The advertised limit is lower than configured and keeps capping the bucket
+    store.now += 3600
+    assert store.take("m", 100, 0, 6000) == 0.0
+    assert store.tokens() == 500
+
+
+def test_settle_pause_blocks_every_caller():
+    store = ClockStore()
+    store.settle("m", 0, 500, 60000, pause=12)
+    assert store.take("m", 10, 500, 60000) == pytest.approx(12.0)
+    store.now += 12
+    assert store.take("m", 10, 500, 60000) == 0.0
+
+
+def test_governor_settle_refunds_unused_reservation():
+    store = ClockStore()
+    governor = LLMGovernor(store, enabled=True)
+    rpm, tpm = configured_limits("m")
+    store.take("m", 1000, rpm, tpm)
+
+    asyncio.run(governor.settle("m", 1000, {"total_tokens": 400}))
+    assert store.tokens() == tpm - 400
+    # A failed call reports no usage and gets its whole reservation back
+    store.take("m", 1000, rpm, tpm)
+    asyncio.run(governor.settle("m", 1000, {"total_tokens": 0}))
+    assert store.tokens() == tpm - 400
@@ -0,0 +1,83 @@
+import orjson
+import pytest
+
+from src.llm.parsing import SchemaValidationError, loads_tolerant, parse_function_call, repair_json, validate
+
+FUNCTIONS = [{
+    "name": "fn_candidate",
+    "parameters": {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"type": "string"},
+            "phone": {"type": "string"},
+            "years": {"type": "integer"},
+            "skills": {"type": "array", "items": {"type": "string"}},
+        },
+    },
+}]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"skills": ["python", "sql",]}', {"skills": ["python", "sql"]}),
+    ('{"a": 1,}', {"a": 1}),
+    ('{"skills": ["python", "sql"', {"skills": ["python", "sql"]}),
+    ('{"skills": ["python", "sq', {"skills": ["python", "sq"]}),
+    ('{"name": "Ada Lovel', {"name": "Ada Lovel"}),
+    ('{"name": "a \\"quoted\\', {"name": 'a "quoted'}),
+    ('{"jobs": [{"title": "dev", "years": 3}, {"title": "lead"', {"jobs": [{"title": "dev", "years": 3}, {"title": "lead"}]}),
+    ('```json\n{"a": [1, 2]}\n```', {"a": [1, 2]}),
+    ('Here you go: {"a": 1}', {"a": 1}),
+])
+def test_repair_json(text, expected):
+    assert orjson.loads(repair_json(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"name": "Ada", "ye', {"name": "Ada"}),
+    ('{"name": "Ada", "years":', {"name": "Ada", "years": None}),
+    ('{"name": "Ada", "done": tr', {"name": "Ada"}),
+])
+def test_repair_json_drops_incomplete_member(text, expected):
+    assert orjson.loads(repair_json(text)) == expected
+
+
+def test_loads_tolerant():
+    assert loads_tolerant('{"a": 1}') == {"a": 1}
+    assert loads_tolerant('{"a": [1, 2') == {"a": [1, 2]}
+    with pytest.raises(ValueError):
+        loads_tolerant("not json at all")
+
+
+@pytest.mark.parametrize("value, schema, expected", [
+    ("85", {"type": "integer"}, 85),
+    (85.0, {"type": "integer"}, 85),
+    ("2.5", {"type": "number"}, 2.5),
+    (84912345678, {"type": "string"}, "84912345678"),
+    (None, {"type": "string"}, None),
+    (None, {"type": "array"}, []),
+])
+def test_validate_coercions(value, schema, expected):
+    assert validate(value, schema) == expected
+
+
+@pytest.mark.parametrize("value, schema", [
+    ("85.5", {"type": "integer"}),
+    (True, {"type": "integer"}),
+    (True, {"type": "string"}),
+    ("many", {"type": "array"}),
+    ({"phone": "1"}, FUNCTIONS[0]["parameters"]),
+])
+def test_validate_rejects(value, schema):
+    with pytest.raises(SchemaValidationError):
+        validate(value, schema)
+
+
+def test_parse_function_call():
+    output = {"function_call": {"name": "fn_candidate", "arguments": '{"name": "Ada", "years": "3", "skills": ["c",'}}
+    assert parse_function_call(output, FUNCTIONS) == {"name": "Ada", "years": 3, "skills": ["c"]}
+
+    with pytest.raises(ValueError):
+        parse_function_call({}, FUNCTIONS)
+    with pytest.raises(SchemaValidationError):
+        parse_function_call({"function_call": {"name": "fn_other", "arguments": "{}"}}, FUNCTIONS)
@@ -0,0 +1,37 @@
+import pytest
+
+from src.llm.streaming import PartialObjectParser
+
+PAYLOAD = '{"candidate_name": "A, \\"B\\"", "degree": [{"name": "BSc", "year": 2020}], "score": 7}'
+
+
+def feed_all(parser, chunks):
+    return [field for chunk in chunks for field in parser.feed(chunk)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(PAYLOAD)])
+def test_fields_in_any_chunking(size):
+    parser = PartialObjectParser()
+    fields = feed_all(parser, [PAYLOAD[i:i + size] for i in range(0, len(PAYLOAD), size)])
+    assert fields == [
+        ("candidate_name", 'A, "B"'),
+        ("degree", [{"name": "BSc", "year": 2020}]),
+        ("score", 7),
+    ]
+    assert parser.complete
+    assert parser.text == PAYLOAD
+
+
+def test_field_reported_once_its_value_ends():
+    parser = PartialObjectParser()
+    assert parser.feed('{"a": 1') == []
+    assert parser.feed(', "b": [1, ') == [("a", 1)]
+    assert parser.feed("2]") == []
+    assert not parser.complete
+    assert parser.feed("}") == [("b", [1, 2])]
+
+
+def test_non_strict_member_is_skipped():
+    parser = PartialObjectParser()
+    assert parser.feed('{"a": 1, "b": True, \'c\': 2, "d": "x"}') == [("a", 1), ("d", "x")]
+    assert parser.complete
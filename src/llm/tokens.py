@@ -0,0 +1,52 @@
+import logging
+import threading
+from functools import lru_cache
+
+import tiktoken
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """tiktoken for the target model, or a ~4 chars/token estimate when the encoding can't be loaded"""
+
+    def __init__(self, model):
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads its BPE files on first use; offline hosts fall back
+            LOGGER.warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+            self.encoding = None
+
+    def count(self, text):
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def head(self, text, tokens):
+        if self.encoding is None:
+            return text[: tokens * 4]
+        return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:tokens])
+
+    def tail(self, text, tokens):
+        if tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[-tokens * 4:]
+        return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[-tokens:])
+
+
+@lru_cache(maxsize=None)
+def _token_counter(model):
+    return TokenCounter(model)
+
+
+_counter_lock = threading.Lock()
+
+
+def get_token_counter(model):
+    # Concurrent first calls (the governor estimates in threads) would each load the encoding
+    with _counter_lock:
+        return _token_counter(model)
@@ -3,6 +3,22 @@ from pydantic_settings import BaseSettings
 
 class MachingConfig(BaseSettings):
     MODEL_NAME: str = "gpt-3.5-turbo-16k"
+    # (model, largest prompt in tokens it is tried on; 0 for any), cheapest first. Short pairs
+    # start on the small model, the next tier takes over when an answer is invalid or below
+    # MATCHING_MIN_COMPLETENESS (share of top-level fields filled in)
+    MATCHING_MODEL_TIERS: tuple = (("gpt-4o-mini", 3000), ("gpt-4o", 0))
+    MATCHING_MIN_COMPLETENESS: float = 1.0
 
+    # Bulk ranking (/matching/rank/{job_id})
+    RANK_CONCURRENCY: int = 16  # matching calls in flight per ranking
+    RANK_REQUESTS_PER_MINUTE: int = 300  # ceiling on matching calls started per minute
 
-matching_config = MachingConfig()
\ No newline at end of file
+    # Combined analysis (/candidate/analyse_match): the CV is analysed and scored against
+    # COMBINED_JOBS_PER_CALL jobs per LLM call, at most COMBINED_MAX_JOBS jobs per CV
+    COMBINED_JOBS_PER_CALL: int = 5
+    COMBINED_MAX_JOBS: int = 50
+    COMBINED_MODEL_TIERS: tuple = (("gpt-4o-mini", 8000), ("gpt-4o", 0))
+    COMBINED_MIN_COMPLETENESS: float = 1.0
+
+
+matching_config = MachingConfig()
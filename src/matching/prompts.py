@@ -1,3 +1,5 @@
+from src.candidate.prompts import fn_candidate_analysis, system_prompt_candidate
+
 system_prompt_matching = """
 Scoring Guide:
 It's ok to say candidate does not match the requirement.
@@ -129,4 +131,40 @@ fn_matching_analysis = [
             ],
         },
     }
-]
\ No newline at end of file
+]
+
+
+system_prompt_combined = system_prompt_candidate + system_prompt_matching + """
+When the function has a candidate field, fill it in from the CV alone.
+Each job_<id> field holds the evaluation against that job's requirements only; score every job independently.
+"""
+
+
+def job_key(job_id):
+    return f"job_{job_id}"
+
+
+def fn_combined_analysis(job_ids, with_profile=True):
+    """AnalyzeCV as "candidate" (with_profile) plus one evaluate object per job, as a single function"""
+    properties = {}
+    if with_profile:
+        properties["candidate"] = {
+            **fn_candidate_analysis[0]["parameters"],
+            "description": "Information from the candidate resume.",
+        }
+    for job_id in job_ids:
+        properties[job_key(job_id)] = {
+            **fn_matching_analysis[0]["parameters"],
+            "description": f"Score the candidate against the requirements of job {job_id}.",
+        }
+    return [
+        {
+            "name": "AnalyzeCVAndMatch" if with_profile else "MatchJobs",
+            "description": "Analyze the candidate resume and evaluate the candidate against each job's requirements.",
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+            },
+        }
+    ]
@@ -0,0 +1,206 @@
+import json
+
+from src.database.config import database_config
+
+# Scored sections of a matching analysis
+SECTIONS = ["degree", "experience", "technical_skill", "responsibility", "certificate", "soft_skill"]
+
+# Numeric copies of each section score, present with the normalized schema
+SCORE_COLUMNS = [f"{section}_score" for section in SECTIONS]
+
+ANALYSIS_COLUMNS = [
+    "candidate_id",
+    "job_id",
+    "certificate",
+    "degree",
+    "experience",
+    "responsibility",
+    "technical_skill",
+    "soft_skill",
+    "summary_comment",
+    "score",
+]
+
+# Projection for ?summary=true, leaves out the per-section JSON
+SUMMARY_COLUMNS = ["candidate_id", "job_id", "summary_comment", "score"]
+
+# Per-section {score, comment} objects stored as JSON text
+ANALYSIS_JSON_COLUMNS = {
+    "certificate": dict,
+    "degree": dict,
+    "experience": dict,
+    "responsibility": dict,
+    "technical_skill": dict,
+    "soft_skill": dict,
+}
+
+INSERT_ANALYSIS_QUERY = '''
+    INSERT INTO candidate_job_analysis (
+        candidate_id, 
+        job_id, 
+        certificate, 
+        degree, 
+        experience, 
+        responsibility, 
+        technical_skill, 
+        soft_skill,
+        summary_comment,
+        score
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ANALYSIS_NORMALIZED_QUERY = f'''
+    INSERT INTO candidate_job_analysis (
+        candidate_id, 
+        job_id, 
+        certificate, 
+        degree, 
+        experience, 
+        responsibility, 
+        technical_skill, 
+        soft_skill,
+        summary_comment,
+        score,
+        {", ".join(SCORE_COLUMNS)}
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {", ".join("?" for _ in SCORE_COLUMNS)})
+'''
+
+DELETE_ANALYSIS_QUERY = '''
+    DELETE FROM candidate_job_analysis
+    WHERE job_id = ? AND candidate_id = ?
+'''
+
+
+def section_scores(result):
+    """Numeric score of every section, None when the section is missing"""
+    scores = []
+    for section in SECTIONS:
+        value = result.get(section)
+        scores.append(int(value["score"]) if isinstance(value, dict) and value.get("score") is not None else None)
+    return scores
+
+
+def get_insert_query():
+    return INSERT_ANALYSIS_NORMALIZED_QUERY if database_config.NORMALIZED_SCHEMA else INSERT_ANALYSIS_QUERY
+
+
+def analysis_to_params(candidate_id, job_id, result):
+    """Matching result >>> INSERT parameters, section objects are stored as JSON strings"""
+    params = (
+        int(candidate_id),
+        int(job_id),
+        json.dumps(result["certificate"]),
+        json.dumps(result["degree"]),
+        json.dumps(result["experience"]),
+        json.dumps(result["responsibility"]),
+        json.dumps(result["technical_skill"]),
+        json.dumps(result["soft_skill"]),
+        result["summary_comment"],
+        result["score"],
+    )
+    if database_config.NORMALIZED_SCHEMA:
+        params += tuple(section_scores(result))
+    return params
+
+
+async def insert_analysis(conn, candidate_id, job_id, result):
+    await conn.execute(get_insert_query(), analysis_to_params(candidate_id, job_id, result))
+
+
+async def replace_analyses(conn, job_id, results):
+    """Swap in fresh analyses for (candidate_id, result) pairs of one job; the caller owns the transaction"""
+    if not results:
+        return
+    await conn.executemany(
+        DELETE_ANALYSIS_QUERY, [(int(job_id), int(candidate_id)) for candidate_id, _ in results]
+    )
+    await conn.executemany(
+        get_insert_query(),
+        [analysis_to_params(candidate_id, job_id, result) for candidate_id, result in results],
+    )
+
+
+async def replace_candidate_analyses(conn, candidate_id, results):
+    """Swap in fresh analyses for (job_id, result) pairs of one candidate; the caller owns the transaction"""
+    if not results:
+        return
+    await conn.executemany(
+        DELETE_ANALYSIS_QUERY, [(int(job_id), int(candidate_id)) for job_id, _ in results]
+    )
+    await conn.executemany(
+        get_insert_query(),
+        [analysis_to_params(candidate_id, job_id, result) for job_id, result in results],
+    )
+
+
+async def fetch_section_scores(conn, job_id):
+    """(candidate_ids, section score rows) of every analysis of a job, read from the
+    numeric score columns when the normalized schema is enabled"""
+    if database_config.NORMALIZED_SCHEMA:
+        rows = await conn.fetchall(
+            f"SELECT candidate_id, {', '.join(SCORE_COLUMNS)} FROM candidate_job_analysis WHERE job_id = ?",
+            (job_id,),
+        )
+        return [int(row[0]) for row in rows], [list(row[1:]) for row in rows]
+
+    rows = await conn.fetchall(
+        f"SELECT candidate_id, {', '.join(SECTIONS)} FROM candidate_job_analysis WHERE job_id = ?",
+        (job_id,),
+    )
+    scores = [
+        section_scores({section: json.loads(value) if value else None for section, value in zip(SECTIONS, row[1:])})
+        for row in rows
+    ]
+    return [int(row[0]) for row in rows], scores
+
+
+async def update_scores(conn, job_id, candidate_ids, scores):
+    """Overwrite the overall score of analyses; the caller owns the transaction"""
+    await conn.executemany(
+        "UPDATE candidate_job_analysis SET score = ? WHERE job_id = ? AND candidate_id = ?",
+        [(float(score), int(job_id), int(candidate_id)) for candidate_id, score in zip(candidate_ids, scores)],
+    )
+
+
+# Weight profiles: scope is "job" (scope_key = job_id) or "tenant" (scope_key = tenant id).
+# The SQLite stand-in creates this table itself, see src/database/backends.py
+CREATE_WEIGHTS_TABLE_MSSQL = '''
+    IF OBJECT_ID('scoring_weights', 'U') IS NULL
+    CREATE TABLE scoring_weights (
+        scope NVARCHAR(20) NOT NULL,
+        scope_key NVARCHAR(200) NOT NULL,
+        weights NVARCHAR(MAX) NOT NULL,
+        PRIMARY KEY (scope, scope_key)
+    )
+'''
+
+_weights_schema_ready = False
+
+
+async def ensure_weights_schema(conn):
+    global _weights_schema_ready
+    if not _weights_schema_ready:
+        if conn.backend.name == "mssql":
+            await conn.execute(CREATE_WEIGHTS_TABLE_MSSQL)
+            await conn.commit()
+        _weights_schema_ready = True
+
+
+async def fetch_weight_profile(conn, scope, scope_key):
+    await ensure_weights_schema(conn)
+    row = await conn.fetchone(
+        "SELECT weights FROM scoring_weights WHERE scope = ? AND scope_key = ?", (scope, str(scope_key))
+    )
+    return json.loads(row[0]) if row is not None else None
+
+
+async def save_weight_profile(conn, scope, scope_key, weights):
+    """Replace a weight profile; the caller owns the transaction"""
+    await ensure_weights_schema(conn)
+    await conn.execute("DELETE FROM scoring_weights WHERE scope = ? AND scope_key = ?", (scope, str(scope_key)))
+    await conn.execute(
+        "INSERT INTO scoring_weights (scope, scope_key, weights) VALUES (?, ?, ?)",
+        (scope, str(scope_key), json.dumps(weights)),
+    )
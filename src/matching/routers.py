@@ -1,133 +1,290 @@
-from fastapi import APIRouter, HTTPException, status
-from src.matching import services
-from src.matching.schemas import MatchingSchema
-from db import connectToDB
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from src.candidate import repository as candidate_repository
+from src.job import repository as job_repository
+from src.matching import repository, services
+from src.matching.schemas import MatchingAnalysis, MatchingSchema, RankSchema, RescoreSchema, WeightProfile
+from src.matching.scoring import ScoreMatrix, resolve_weights
+from src.database.config import database_config
+from src.database.pagination import (
+    build_keyset_query,
+    build_ranked_query,
+    decode_score_cursor,
+    encode_score_cursor,
+    json_response,
+    parse_fields,
+    row_to_dict,
+    stream_ndjson,
+)
+from src.database.pool import db_pool, PoolError
+from src.llm.streaming import sse_event, sse_response
+from src.tasks.schemas import TaskOptions
+from src.tasks.services import submit_task, task_options
+from src.retrieval.config import retrieval_config
+from src.retrieval.services import candidate_index
 import json
 
 router = APIRouter()
 
 
 @router.post("/analyse")
-async def analyse_matching(matching_data: MatchingSchema):
-    cursor = connectToDB()
-    
-    if cursor is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
-        )
-        
-    insert_query = '''
-        INSERT INTO candidate_job_analysis (
-            candidate_id, 
-            job_id, 
-            certificate, 
-            degree, 
-            experience, 
-            responsibility, 
-            technical_skill, 
-            soft_skill,
-            summary_comment,
-            score
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    '''
-    
-    result = services.analyse_matching(matching_data=matching_data)
-    
+async def analyse_matching(
+    matching_data: MatchingSchema,
+    response: Response,
+    options: TaskOptions = Depends(task_options),
+):
+    # ?background=true answers 202 right away, poll /tasks/{task_id} for the analysis
+    if options.background:
+        payload = {**matching_data.model_dump(), "tenant": options.tenant}
+        return await submit_task(response, "matching.analyse", payload, options)
+
     candidate_id = int(matching_data.candidate["candidate_id"])  # Convert to integer
     job_id = int(matching_data.job["job_id"])  # Convert to integer
-    certificate = json.dumps(result["certificate"])  # Stringify the JSON object
-    degree = json.dumps(result["degree"])  # Stringify the JSON object
-    experience = json.dumps(result["experience"])  # Stringify the JSON object
-    responsibility = json.dumps(result["responsibility"])  # Stringify the JSON object
-    technical_skill = json.dumps(result["technical_skill"])  # Stringify the JSON object
-    soft_skill = json.dumps(result["soft_skill"])  # Stringify the JSON object
-    summary_comment = result["summary_comment"]  # Regular string
-    score = result["score"]  # Numeric value
-    
+
     try:
-        # Execute the query with the actual data
-        cursor.execute(insert_query, (
-            candidate_id,
-            job_id,
-            certificate,
-            degree,
-            experience,
-            responsibility,
-            technical_skill,
-            soft_skill,
-            summary_comment,
-            score
-        ))
-
-        # Commit the transaction
-        cursor.commit()
-        
-        return "View Candidate to see more detail"
-    
+        # The job's weight profile, else the tenant's, else the defaults
+        weights = await services.load_weights(job_id, options.tenant)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching data: {str(e)}"
+        )
+
+    result = await services.analyse_matching(matching_data=matching_data, weights=weights)
+
+    try:
+        # Execute the query with the actual data; committed when the block succeeds
+        async with db_pool.transaction() as conn:
+            await repository.insert_analysis(conn, candidate_id, job_id, result)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
     except Exception as e:
-        # Rollback the transaction in case of error
-        cursor.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while inserting data into the database: {str(e)}"
         )
-    
-    finally:
-        # Close the cursor and connection
-        cursor.close()
 
-@router.get("/get_matchings/{job_id}")
-async def get_matching_analysis_by_job_id(job_id: int):
-    # Connect to the database
-    cursor = connectToDB()
-    if cursor is None:
+    return "View Candidate to see more detail"
+
+
+async def analyse_stream_events(matching_data, tenant=None):
+    """SSE: one "field" per scored section, then "result" with the weighted score once persisted"""
+    try:
+        candidate_id = int(matching_data.candidate["candidate_id"])
+        job_id = int(matching_data.job["job_id"])
+
+        weights = await services.load_weights(job_id, tenant)
+        async for event, data in services.analyse_matching_stream(matching_data=matching_data, weights=weights):
+            if event == "result":
+                result = data
+            else:
+                yield sse_event(event, data)
+
+        async with db_pool.transaction() as conn:
+            await repository.insert_analysis(conn, candidate_id, job_id, result)
+        yield sse_event("result", {"candidate_id": candidate_id, "job_id": job_id, **result})
+
+    except Exception as e:
+        yield sse_event("error", {"detail": f"An error occurred while analysing the matching: {str(e)}"})
+
+
+@router.post("/analyse_stream")
+async def analyse_matching_stream(matching_data: MatchingSchema, x_tenant_id: Optional[str] = Header(None)):
+    # Same analysis as /analyse, but each section is pushed as soon as the model has written it
+    return sse_response(analyse_stream_events(matching_data, x_tenant_id))
+
+
+def ranking_entry(candidate, result):
+    return {
+        "candidate_id": candidate["candidate_id"],
+        "candidate_name": candidate["candidate_name"],
+        **result,
+    }
+
+
+async def store_ranking_entry(job_id, entry):
+    """Commit one score on its own, so an interrupted ranking keeps what was already paid for"""
+    try:
+        async with db_pool.transaction() as conn:
+            await repository.replace_analyses(conn, job_id, [(entry["candidate_id"], entry)])
+    except Exception as e:
+        return f"An error occurred while inserting data into the database: {str(e)}"
+    return None
+
+
+async def rank_events(job, candidates, weights=None):
+    """Yield NDJSON progress per candidate as its score is committed, then the ranked list"""
+    ranking = []
+    failed = []
+    async for candidate, result, error in services.rank_candidates(job=job, candidates=candidates, weights=weights):
+        if error is None:
+            entry = ranking_entry(candidate, result)
+            error = await store_ranking_entry(job["job_id"], entry)
+        event = {"candidate_id": candidate["candidate_id"], "done": len(ranking) + len(failed) + 1, "total": len(candidates)}
+        if error is None:
+            ranking.append(entry)
+            event.update(status="scored", score=result["score"])
+        else:
+            failed.append({"candidate_id": candidate["candidate_id"], "error": error})
+            event.update(status="failed", error=error)
+        yield event
+
+    ranking.sort(key=lambda entry: entry["score"], reverse=True)
+    yield {"status": "completed", "job_id": job["job_id"], "ranking": ranking, "failed": failed}
+
+
+@router.post("/rank/{job_id}")
+async def rank_candidates_for_job(
+    job_id: int,
+    rank_data: Optional[RankSchema] = None,
+    x_tenant_id: Optional[str] = Header(None),
+):
+    rank_data = rank_data or RankSchema()
+
+    try:
+        async with db_pool.connection() as conn:
+            job = await job_repository.fetch_job(conn, job_id)
+            candidate_ids = rank_data.candidate_ids
+            if job and rank_data.shortlist_k:
+                # Searched among the requested candidates only, so up to shortlist_k of them come back
+                shortlist = await candidate_index.shortlist(
+                    conn, db_pool.backend.name, job, rank_data.shortlist_k, candidate_ids or None
+                )
+                candidate_ids = [candidate_id for candidate_id, _ in shortlist]
+            candidates = await candidate_repository.fetch_candidates(conn, candidate_ids) if job else []
+            if rank_data.shortlist_k and not candidate_ids:
+                candidates = []
+        weights = await services.load_weights(job_id, x_tenant_id)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error connecting to the Database"
+            detail=f"An error occurred while fetching data: {str(e)}"
         )
 
-    # SQL query to fetch candidate job analysis by job_id
-    select_query = '''
-        SELECT candidate_id, job_id, certificate, degree, experience, responsibility, technical_skill, soft_skill, summary_comment, score
-        FROM candidate_job_analysis
-        WHERE job_id = ?
-    '''
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job description with id {job_id} not found"
+        )
+
+    if rank_data.stream:
+        async def ndjson():
+            try:
+                async for event in rank_events(job, candidates, weights):
+                    yield json.dumps(event) + "\n"
+            except Exception as e:
+                yield json.dumps({"status": "failed", "error": f"An error occurred while inserting data into the database: {str(e)}"}) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    try:
+        async for event in rank_events(job, candidates, weights):
+            final = event
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while inserting data into the database: {str(e)}"
+        )
+
+    return final
+
+
+@router.post("/rescore/{job_id}")
+async def rescore_candidates_for_job(
+    job_id: int,
+    rescore_data: Optional[RescoreSchema] = None,
+    x_tenant_id: Optional[str] = Header(None),
+):
+    # Re-weights the stored section scores in one vectorized pass, no LLM calls
+    rescore_data = rescore_data or RescoreSchema()
 
     try:
-        # Execute the query
-        cursor.execute(select_query, (job_id,))
-        
-        # Fetch all matching rows
-        analysis_data = cursor.fetchall()
-        
-        # If no data found, raise an error
-        if not analysis_data:
+        job_profile, tenant_profile = await services.load_weight_profiles(job_id, x_tenant_id)
+        overrides = rescore_data.weights.model_dump(exclude_none=True) if rescore_data.weights else {}
+        weights = resolve_weights(overrides, job_profile, tenant_profile)
+        if sum(weights.values()) <= 0:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No matching analysis found for job_id {job_id}"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At least one section weight must be positive"
             )
-        
-        # Prepare the response by looping over all the results and formatting them
-        analysis_list = []
-        for row in analysis_data:
-            analysis = {
-                "candidate_id": row[0],
-                "job_id": row[1],
-                "certificate": json.loads(row[2]) if row[2] else {},
-                "degree": json.loads(row[3]) if row[3] else {},
-                "experience": json.loads(row[4]) if row[4] else {},
-                "responsibility": json.loads(row[5]) if row[5] else {},
-                "technical_skill": json.loads(row[6]) if row[6] else {},
-                "soft_skill": json.loads(row[7]) if row[7] else {},
-                "summary_comment": row[8],
-                "score": row[9]
-            }
-            analysis_list.append(analysis)
-        
-        # Return the structured response as JSON
-        return analysis_list
+
+        async with db_pool.connection() as conn:
+            candidate_ids, rows = await repository.fetch_section_scores(conn, job_id)
+
+        matrix = ScoreMatrix.from_rows(candidate_ids, rows)
+        ranked_ids, ranked_scores = matrix.rank(weights, limit=rescore_data.limit)
+
+        if rescore_data.save and len(matrix):
+            async with db_pool.transaction() as conn:
+                # Only what was set for this job; the tenant profile and defaults keep applying to the rest
+                await repository.save_weight_profile(conn, "job", job_id, {**(job_profile or {}), **overrides})
+                await repository.update_scores(conn, job_id, matrix.candidate_ids, matrix.weighted(weights))
+
+    except HTTPException:
+        raise
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while rescoring: {str(e)}"
+        )
+
+    if not len(matrix):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No matching analysis found for job_id {job_id}"
+        )
+
+    return json_response({
+        "job_id": job_id,
+        "weights": weights,
+        "saved": rescore_data.save,
+        "ranking": [
+            {"candidate_id": int(candidate_id), "score": float(score)}
+            for candidate_id, score in zip(ranked_ids, ranked_scores)
+        ],
+    })
+
+
+@router.get("/weights/{job_id}")
+async def get_job_weights(job_id: int, x_tenant_id: Optional[str] = Header(None)):
+    # Effective weights for the job after falling back to the tenant profile and the defaults
+    try:
+        return await services.load_weights(job_id, x_tenant_id)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
 
     except Exception as e:
         raise HTTPException(
@@ -135,21 +292,152 @@ async def get_matching_analysis_by_job_id(job_id: int):
             detail=f"An error occurred while fetching data: {str(e)}"
         )
 
-    finally:
-        # Close cursor and connection
-        cursor.close()
 
-@router.delete("/delete_matching")
-async def delete_matching(job_id: int, candidate_id: int):
-    # Connect to the database
-    cursor = connectToDB()
-    
-    if cursor is None:
+@router.put("/weights/{job_id}")
+async def set_job_weights(job_id: int, weights: WeightProfile):
+    # Applies to new analyses; POST /rescore/{job_id} with save=true re-weights existing ones
+    return await save_weights("job", job_id, weights)
+
+
+@router.put("/weights/tenant/{tenant}")
+async def set_tenant_weights(tenant: str, weights: WeightProfile):
+    return await save_weights("tenant", tenant, weights)
+
+
+async def save_weights(scope, scope_key, weights):
+    profile = weights.model_dump(exclude_none=True)
+    try:
+        async with db_pool.transaction() as conn:
+            await repository.save_weight_profile(conn, scope, scope_key, profile)
+
+    except PoolError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error connecting to the Database"
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while saving the weights: {str(e)}"
+        )
+
+    return {"scope": scope, "scope_key": scope_key, "weights": profile}
+
+
+@router.get("/shortlist/{job_id}")
+async def shortlist_candidates_for_job(job_id: int, top_k: int = retrieval_config.SHORTLIST_K):
+    try:
+        async with db_pool.connection() as conn:
+            job = await job_repository.fetch_job(conn, job_id)
+            shortlist = await candidate_index.shortlist(conn, db_pool.backend.name, job, top_k) if job else None
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while building the shortlist: {str(e)}"
+        )
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job description with id {job_id} not found"
         )
 
+    return [{"candidate_id": candidate_id, "similarity": similarity} for candidate_id, similarity in shortlist]
+
+
+@router.get("/get_matchings/{job_id}", response_model=List[MatchingAnalysis], response_model_exclude_unset=True)
+async def get_matching_analysis_by_job_id(
+    job_id: int,
+    order: str = Query("candidate_id", pattern="^(candidate_id|score)$"),
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    min_score: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1, le=database_config.MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    summary: bool = False,
+    stream: bool = False,
+):
+    # order=candidate_id: keyset over candidate_id, pass X-Next-Cursor back as after_id.
+    # order=score: best first (e.g. ?order=score&limit=20 for the top 20), pass X-Next-Cursor back as cursor
+    if summary and fields:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either summary or fields, not both")
+
+    try:
+        columns = parse_fields(fields, repository.ANALYSIS_COLUMNS, "candidate_id")
+        if summary:
+            columns = list(repository.SUMMARY_COLUMNS)
+        if order == "score" and "score" not in columns:
+            columns.append("score")
+        after_score = decode_score_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e) or "Malformed cursor")
+
+    if order == "score":
+        select_query, params = build_ranked_query(
+            "candidate_job_analysis", columns, "score", "candidate_id",
+            filters=[("job_id", job_id)], min_score=min_score, after=after_score, limit=limit,
+        )
+    else:
+        select_query, params = build_keyset_query(
+            "candidate_job_analysis", columns, "candidate_id",
+            filters=[("job_id", job_id)], after=after_id, limit=limit,
+            lower_bounds=[("score", min_score)] if min_score is not None else (),
+        )
+
+    # NDJSON streamed in fetchmany batches, memory stays flat regardless of table size
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(select_query, params, columns, repository.ANALYSIS_JSON_COLUMNS),
+            media_type="application/x-ndjson",
+        )
+
+    try:
+        # Execute the query and fetch the matching rows
+        async with db_pool.connection() as conn:
+            analysis_data = await conn.fetchall(select_query, params)
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching data: {str(e)}"
+        )
+
+    # If no data found on the first page, raise an error
+    if not analysis_data and after_id is None and cursor is None and min_score is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No matching analysis found for job_id {job_id}"
+        )
+
+    # Format every row, JSON columns passed through unparsed
+    analysis_list = [row_to_dict(columns, row, repository.ANALYSIS_JSON_COLUMNS, raw=True) for row in analysis_data]
+
+    headers = {}
+    if limit is not None and len(analysis_list) == limit:
+        last = analysis_list[-1]
+        if order == "score":
+            headers["X-Next-Cursor"] = encode_score_cursor(last["score"], last["candidate_id"])
+        else:
+            headers["X-Next-Cursor"] = str(last["candidate_id"])
+
+    return json_response(analysis_list, headers=headers)
+
+@router.delete("/delete_matching")
+async def delete_matching(job_id: int, candidate_id: int):
     # SQL query to delete the candidate_job_analysis entry based on job_id and candidate_id
     delete_query = '''
         DELETE FROM candidate_job_analysis
@@ -157,30 +445,28 @@ async def delete_matching(job_id: int, candidate_id: int):
     '''
 
     try:
-        # Execute the delete query
-        cursor.execute(delete_query, (job_id, candidate_id))
-        
-        # Check if any row was affected
-        if cursor.rowcount == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No analysis found for job_id {job_id} and candidate_id {candidate_id}"
-            )
-        
-        # Commit the transaction
-        cursor.commit()
+        # Execute the delete query; committed when the block succeeds
+        async with db_pool.transaction() as conn:
+            deleted = await conn.execute(delete_query, (job_id, candidate_id))
+
+    except PoolError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error connecting to the Database {e}"
+        )
 
-        # Return success message
-        return {"detail": f"Analysis for job_id {job_id} and candidate_id {candidate_id} deleted successfully."}
-    
     except Exception as e:
-        # Rollback the transaction in case of error
-        cursor.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while deleting data from the database: {str(e)}"
         )
-    
-    finally:
-        # Close the cursor and connection
-        cursor.close()
\ No newline at end of file
+
+    # Check if any row was affected
+    if deleted == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No analysis found for job_id {job_id} and candidate_id {candidate_id}"
+        )
+
+    # Return success message
+    return {"detail": f"Analysis for job_id {job_id} and candidate_id {candidate_id} deleted successfully."}
\ No newline at end of file
@@ -1,6 +1,55 @@
-from pydantic import BaseModel
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
 
 
 class MatchingSchema(BaseModel):
     candidate: dict
-    job: dict
\ No newline at end of file
+    job: dict
+
+
+class RankSchema(BaseModel):
+    # Rank only these candidates; all profiles when omitted
+    candidate_ids: Optional[List[int]] = None
+    # Only send the top-K profiles by embedding similarity to the LLM scorer
+    shortlist_k: Optional[int] = None
+    # Stream NDJSON progress lines instead of waiting for the full ranking
+    stream: bool = False
+
+
+class SectionAnalysis(BaseModel):
+    score: int
+    comment: str
+
+
+class MatchingAnalysis(BaseModel):
+    # Every field is optional because ?fields= can project any subset
+    candidate_id: Optional[int] = None
+    job_id: Optional[int] = None
+    certificate: Optional[SectionAnalysis] = None
+    degree: Optional[SectionAnalysis] = None
+    experience: Optional[SectionAnalysis] = None
+    responsibility: Optional[SectionAnalysis] = None
+    technical_skill: Optional[SectionAnalysis] = None
+    soft_skill: Optional[SectionAnalysis] = None
+    summary_comment: Optional[str] = None
+    score: Optional[float] = None
+
+
+class WeightProfile(BaseModel):
+    # Sections left out fall back to the tenant profile, then the defaults
+    degree: Optional[float] = Field(None, ge=0)
+    experience: Optional[float] = Field(None, ge=0)
+    technical_skill: Optional[float] = Field(None, ge=0)
+    responsibility: Optional[float] = Field(None, ge=0)
+    certificate: Optional[float] = Field(None, ge=0)
+    soft_skill: Optional[float] = Field(None, ge=0)
+
+
+class RescoreSchema(BaseModel):
+    # Try these weights; the stored profile is used when omitted
+    weights: Optional[WeightProfile] = None
+    # Save the weights as the job's profile and write the new scores back
+    save: bool = False
+    # Only return the best `limit` candidates
+    limit: Optional[int] = Field(None, ge=1)
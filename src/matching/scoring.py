@@ -0,0 +1,73 @@
+import numpy as np
+
+from src.matching.repository import SECTIONS, section_scores
+
+DEFAULT_WEIGHTS = {
+    "degree": 0.1,  # The importance of the candidate's degree
+    "experience": 0.2,  # The weight given to the candidate's relevant work experience
+    "technical_skill": 0.3,  # Weight for technical skills and qualifications
+    "responsibility": 0.25,  # How well the candidate's past responsibilities align with the job
+    "certificate": 0.1,  # The significance of relevant certifications
+    "soft_skill": 0.05,  # Importance of soft skills like communication, teamwork, etc.
+}
+
+
+def resolve_weights(*profiles):
+    """Per section, the first profile that sets it wins (e.g. job, then tenant); defaults fill the rest"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for profile in reversed(profiles):
+        if profile:
+            weights.update({section: float(profile[section]) for section in SECTIONS if profile.get(section) is not None})
+    return weights
+
+
+def weight_vector(weights):
+    return np.array([weights.get(section, DEFAULT_WEIGHTS[section]) for section in SECTIONS], dtype=np.float64)
+
+
+class ScoreMatrix:
+    """Section scores of every analysed candidate of one job.
+
+    One row per candidate, one column per entry of SECTIONS, NaN where the
+    model left a section out. Re-weighting all rows is a single matrix-vector
+    product, so a new weight profile re-ranks thousands of candidates without
+    another LLM call.
+    """
+
+    def __init__(self, candidate_ids, scores):
+        self.candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(len(self.candidate_ids), len(SECTIONS))
+
+    @classmethod
+    def from_rows(cls, candidate_ids, rows):
+        """rows of section_scores() output, None for a missing section"""
+        return cls(candidate_ids, [[np.nan if score is None else score for score in row] for row in rows])
+
+    @classmethod
+    def from_results(cls, candidate_ids, results):
+        return cls.from_rows(candidate_ids, [section_scores(result) for result in results])
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    def weighted(self, weights):
+        """Weighted mean of the sections present in each row, as analyse_matching has always scored"""
+        vector = weight_vector(weights)
+        present = ~np.isnan(self.scores)
+        totals = present @ vector
+        sums = np.where(present, self.scores, 0.0) @ vector
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(totals > 0, sums / totals, 0.0)
+
+    def rank(self, weights, limit=None):
+        """(candidate_ids, scores) best first; ties keep candidate order"""
+        scores = self.weighted(weights)
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return self.candidate_ids[order], scores[order]
+
+
+def weighted_score(result, weights=None):
+    """Overall score of one matching analysis"""
+    return float(ScoreMatrix.from_results([0], [result]).weighted(weights or DEFAULT_WEIGHTS)[0])
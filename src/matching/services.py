@@ -1,16 +1,53 @@
-import json
+import asyncio
+import logging
 
-import jsbeautifier
+import orjson
 from langchain.schema import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from src.cache.store import llm_cache, make_cache_key, prompt_fingerprint
+from src.database.pool import db_pool
+from src.job import repository as job_repository
+from src.llm.streaming import field_event
+from src.llm.ratelimit import build_rate_limiter
+from src.llm.routing import build_route
+from src.matching import repository
 from src.matching.config import matching_config
-from src.matching.prompts import fn_matching_analysis, system_prompt_matching
+from src.matching.prompts import (
+    fn_candidate_analysis,
+    fn_combined_analysis,
+    fn_matching_analysis,
+    job_key,
+    system_prompt_combined,
+    system_prompt_matching,
+)
+from src.matching.schemas import MatchingSchema
+from src.matching.scoring import resolve_weights, weighted_score
 
+# Bumps automatically whenever the prompt or function schema is edited
+PROMPT_VERSION = prompt_fingerprint(system_prompt_matching, fn_matching_analysis)
 
-def output2json(output):
-    """GPT Output Object >>> json"""
-    opts = jsbeautifier.default_options()
-    return json.loads(jsbeautifier.beautify(output["function_call"]["arguments"], opts))
+ROUTE = build_route(
+    "matching",
+    matching_config.MATCHING_MODEL_TIERS,
+    matching_config.MODEL_NAME,
+    matching_config.MATCHING_MIN_COMPLETENESS,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+COMBINED_PROMPT_VERSION = prompt_fingerprint(system_prompt_combined, [fn_candidate_analysis, fn_matching_analysis])
+
+COMBINED_ROUTE = build_route(
+    "candidate_match",
+    matching_config.COMBINED_MODEL_TIERS,
+    matching_config.MODEL_NAME,
+    matching_config.COMBINED_MIN_COMPLETENESS,
+)
+
+# Job fields the model scores against
+REQUIREMENT_FIELDS = ["degree", "experience", "technical_skill", "responsibility", "certificate", "soft_skill"]
+
+# Shared by every ranking, in every worker process, so parallel rankings can't exceed the ceiling together
+rank_rate_limiter = build_rate_limiter("rank", rate=matching_config.RANK_REQUESTS_PER_MINUTE, per=60.0)
 
 
 def generate_content(job, candidate):
@@ -18,40 +55,180 @@ def generate_content(job, candidate):
     return content
 
 
-def analyse_matching(matching_data):
+async def load_weight_profiles(job_id, tenant=None):
+    """(job profile, tenant profile) as stored, None where there is none"""
+    async with db_pool.connection() as conn:
+        job_profile = await repository.fetch_weight_profile(conn, "job", job_id)
+        tenant_profile = await repository.fetch_weight_profile(conn, "tenant", tenant) if tenant else None
+    return job_profile, tenant_profile
+
+
+async def load_weights(job_id, tenant=None):
+    """Weights for a job: its own profile, then the tenant's, then DEFAULT_WEIGHTS"""
+    return resolve_weights(*await load_weight_profiles(job_id, tenant))
+
+
+async def load_weights_for_jobs(job_ids, tenant=None):
+    """load_weights of several jobs over one connection, {job_id: weights}"""
+    async with db_pool.connection() as conn:
+        tenant_profile = await repository.fetch_weight_profile(conn, "tenant", tenant) if tenant else None
+        return {
+            job_id: resolve_weights(await repository.fetch_weight_profile(conn, "job", job_id), tenant_profile)
+            for job_id in job_ids
+        }
+
+
+async def load_jobs(job_ids=None):
+    """The given jobs, or the newest COMBINED_MAX_JOBS when none are given"""
+    async with db_pool.connection() as conn:
+        return await job_repository.fetch_jobs(conn, job_ids, limit=None if job_ids else matching_config.COMBINED_MAX_JOBS)
+
+
+async def analyse_matching(matching_data, weights=None):
     content = generate_content(job=matching_data.job, candidate=matching_data.candidate)
 
-    llm = ChatOpenAI(model=matching_config.MODEL_NAME, temperature=0.5)
-    completion = llm.predict_messages(
-        [
-            SystemMessage(content=system_prompt_matching),
-            HumanMessage(content=content),
-        ],
-        functions=fn_matching_analysis,
-    )
-    output_analysis = completion.additional_kwargs
+    # Only the raw section scores are cached, the weighted score is recomputed below
+    cache_key = make_cache_key("matching", ROUTE.cache_id, PROMPT_VERSION, content)
+    json_output = await llm_cache.get(cache_key)
 
-    json_output = output2json(output=output_analysis)
+    if json_output is None:
+        json_output = await ROUTE.complete(
+            messages=[
+                SystemMessage(content=system_prompt_matching),
+                HumanMessage(content=content),
+            ],
+            functions=fn_matching_analysis,
+        )
+        await llm_cache.set(cache_key, json_output)
 
-    # Extract scores and store them in a list
-    weights = {
-        "degree": 0.1,  # The importance of the candidate's degree
-        "experience": 0.2,  # The weight given to the candidate's relevant work experience
-        "technical_skill": 0.3,  # Weight for technical skills and qualifications
-        "responsibility": 0.25,  # How well the candidate's past responsibilities align with the job
-        "certificate": 0.1,  # The significance of relevant certifications
-        "soft_skill": 0.05,  # Importance of soft skills like communication, teamwork, etc.
-    }
-    total_weight = 0
-    weighted_score = 0
+    json_output["score"] = weighted_score(json_output, weights)
+
+    return json_output
+
+
+async def analyse_matching_stream(matching_data, weights=None):
+    """analyse_matching as ("field", {"name", "value"}) events per section while the model streams,
+    then ("result", json_output) with the weighted score added"""
+    content = generate_content(job=matching_data.job, candidate=matching_data.candidate)
+    cache_key = make_cache_key("matching", ROUTE.cache_id, PROMPT_VERSION, content)
+    json_output = await llm_cache.get(cache_key)
 
-    for section in json_output:
-        if section != "summary_comment":
-            weighted_score += int(json_output[section]["score"]) * weights[section]
-            total_weight += weights[section]
+    if json_output is not None:
+        for name, value in json_output.items():
+            yield field_event(name, value)
+    else:
+        events = ROUTE.stream(
+            messages=[
+                SystemMessage(content=system_prompt_matching),
+                HumanMessage(content=content),
+            ],
+            functions=fn_matching_analysis,
+        )
+        async for event, data in events:
+            if event == "result":
+                json_output = data
+                await llm_cache.set(cache_key, json_output)
+            else:
+                yield event, data
+
+    json_output["score"] = weighted_score(json_output, weights)
+    yield "result", json_output
+
+
+async def rank_candidates(job, candidates, weights=None):
+    """Score every candidate against one job concurrently.
+
+    Yields (candidate, result, error) in completion order; exactly one of
+    result/error is None.
+    """
+    semaphore = asyncio.Semaphore(matching_config.RANK_CONCURRENCY)
+
+    async def score(candidate):
+        try:
+            async with semaphore:
+                await rank_rate_limiter.acquire()
+                result = await analyse_matching(MatchingSchema(candidate=candidate, job=job), weights=weights)
+            return candidate, result, None
+        except Exception as e:
+            return candidate, None, str(e)
+
+    tasks = [asyncio.create_task(score(candidate)) for candidate in candidates]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def generate_combined_content(cv_content, jobs):
+    """The CV once, then each job's requirements under the key its evaluation is returned in"""
+    parts = ["CV:", cv_content]
+    for job in jobs:
+        requirements = {field: job.get(field) for field in REQUIREMENT_FIELDS}
+        parts.append(f"\n{job_key(job['job_id'])} ({job.get('job_name')}) requirements:")
+        parts.append(orjson.dumps(requirements).decode("utf-8"))
+    return "\n".join(parts)
+
+
+async def analyse_combined(cv_content, jobs, with_profile):
+    """One call: the profile (with_profile) and the raw section scores for every job in `jobs`"""
+    content = generate_combined_content(cv_content, jobs)
+    namespace = "candidate_match" if with_profile else "job_match"
+    cache_key = make_cache_key(namespace, COMBINED_ROUTE.cache_id, COMBINED_PROMPT_VERSION, content)
+    json_output = await llm_cache.get(cache_key)
+
+    if json_output is None:
+        json_output = await COMBINED_ROUTE.complete(
+            messages=[
+                SystemMessage(content=system_prompt_combined),
+                HumanMessage(content=content),
+            ],
+            functions=fn_combined_analysis([job["job_id"] for job in jobs], with_profile),
+        )
+        await llm_cache.set(cache_key, json_output)
+
+    return json_output
+
+
+async def analyse_candidate_jobs(cv_content, jobs, weights=None):
+    """Candidate profile and its matching against every job in about one LLM round trip.
+
+    Jobs are packed COMBINED_JOBS_PER_CALL per prompt; the first call also
+    extracts the profile and the others run alongside it. Jobs of a call that
+    failed are scored one by one with analyse_matching against the extracted
+    profile. Returns (profile, [(job_id, matching result)]) with weighted scores.
+    """
+    weights = weights or {}
+    size = max(1, matching_config.COMBINED_JOBS_PER_CALL)
+    chunks = [jobs[start:start + size] for start in range(0, len(jobs), size)] or [[]]
+
+    outputs = await asyncio.gather(
+        *(analyse_combined(cv_content, chunk, with_profile=index == 0) for index, chunk in enumerate(chunks)),
+        return_exceptions=True,
+    )
+    # Without the profile there is nothing to store
+    if isinstance(outputs[0], BaseException):
+        raise outputs[0]
+    profile = outputs[0]["candidate"]
 
-    final_score = weighted_score / total_weight
+    matches = []
+    missed = []
+    for chunk, output in zip(chunks, outputs):
+        if isinstance(output, BaseException):
+            LOGGER.warning(f"Combined matching of {len(chunk)} jobs failed, scoring them one by one: {output}")
+            missed.extend(chunk)
+            continue
+        for job in chunk:
+            result = dict(output[job_key(job["job_id"])])
+            result["score"] = weighted_score(result, weights.get(job["job_id"]))
+            matches.append((job["job_id"], result))
 
-    json_output["score"] = final_score
+    if missed:
+        results = await asyncio.gather(*(
+            analyse_matching(MatchingSchema(candidate=profile, job=job), weights=weights.get(job["job_id"]))
+            for job in missed
+        ))
+        matches.extend((job["job_id"], result) for job, result in zip(missed, results))
 
-    return json_output
\ No newline at end of file
+    return profile, matches
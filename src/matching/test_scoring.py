@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+from src.matching.scoring import DEFAULT_WEIGHTS, ScoreMatrix, resolve_weights, weighted_score
+
+
+def result(**scores):
+    return {section: {"score": score, "comment": ""} for section, score in scores.items()}
+
+
+def test_resolve_weights_prefers_the_first_profile():
+    weights = resolve_weights({"degree": 0.9, "experience": None}, {"degree": 0.1, "experience": 0.4}, None)
+    assert weights["degree"] == 0.9
+    assert weights["experience"] == 0.4
+    assert weights["soft_skill"] == DEFAULT_WEIGHTS["soft_skill"]
+    assert resolve_weights() == DEFAULT_WEIGHTS
+
+
+def test_weighted_mean_skips_missing_sections():
+    weights = dict.fromkeys(DEFAULT_WEIGHTS, 0.0) | {"degree": 1.0, "experience": 3.0}
+    matrix = ScoreMatrix.from_results([1, 2, 3], [result(degree=40, experience=80), result(degree=40), result()])
+    assert matrix.weighted(weights).tolist() == [70.0, 40.0, 0.0]
+
+
+def test_weighted_score_matches_the_matrix():
+    analysis = result(degree=50, experience=70, technical_skill=90, certificate=None)
+    present = {"degree": 50, "experience": 70, "technical_skill": 90}
+    expected = sum(DEFAULT_WEIGHTS[s] * v for s, v in present.items()) / sum(DEFAULT_WEIGHTS[s] for s in present)
+    assert weighted_score(analysis) == pytest.approx(expected)
+    assert not math.isnan(weighted_score({}))
+
+
+def test_rank_is_best_first_and_stable():
+    matrix = ScoreMatrix.from_results(
+        [10, 11, 12, 13], [result(degree=50), result(degree=90), result(degree=50), result(degree=70)]
+    )
+    ids, scores = matrix.rank(DEFAULT_WEIGHTS)
+    assert ids.tolist() == [11, 13, 10, 12]
+    assert scores.tolist() == [90.0, 70.0, 50.0, 50.0]
+
+    ids, _ = matrix.rank(DEFAULT_WEIGHTS, limit=2)
+    assert ids.tolist() == [11, 13]
+
+
+def test_reweighting_changes_the_order():
+    matrix = ScoreMatrix.from_results([1, 2], [result(degree=100, experience=0), result(degree=0, experience=100)])
+    assert matrix.rank(resolve_weights({"degree": 1.0, "experience": 0.0}))[0].tolist() == [1, 2]
+    assert matrix.rank(resolve_weights({"degree": 0.0, "experience": 1.0}))[0].tolist() == [2, 1]
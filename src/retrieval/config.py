@@ -0,0 +1,24 @@
+from pydantic_settings import BaseSettings
+
+
+class RetrievalConfig(BaseSettings):
+    # "openai" calls the embeddings API, "local" is an offline hashing stand-in
+    EMBEDDING_BACKEND: str = "openai"
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    LOCAL_EMBEDDING_DIM: int = 512
+    EMBEDDING_BATCH_SIZE: int = 256
+
+    # "flat" is an exact matrix multiply, "ivf" probes the nearest k-means cells only
+    INDEX_MODE: str = "flat"
+    IVF_NLIST: int = 64
+    IVF_NPROBE: int = 8
+
+    # Searches only embed profiles added since the last one; every this many seconds the whole
+    # table is reconciled instead, which also drops vectors of deleted profiles
+    INDEX_FULL_SYNC_INTERVAL: float = 300.0
+
+    # Candidates handed to the LLM scorer when a ranking asks for a shortlist
+    SHORTLIST_K: int = 50
+
+
+retrieval_config = RetrievalConfig()
@@ -0,0 +1,81 @@
+import hashlib
+import re
+
+import numpy as np
+
+from src.llm.client import llm_client
+from src.retrieval.config import retrieval_config
+
+_TOKEN = re.compile(r"[a-z0-9+#.]+")
+
+# Profile and job fields that describe what the person does / the job needs
+CANDIDATE_FIELDS = ("technical_skill", "experience", "responsibility")
+JOB_FIELDS = ("technical_skill", "experience", "responsibility")
+
+
+def _join_fields(record, fields):
+    parts = []
+    for field in fields:
+        value = record.get(field) or []
+        parts.append(" ".join(value) if isinstance(value, list) else str(value))
+    return "\n".join(parts)
+
+
+def candidate_text(candidate):
+    return _join_fields(candidate, CANDIDATE_FIELDS)
+
+
+def job_text(job):
+    return _join_fields(job, JOB_FIELDS)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class LocalHashingEmbedder:
+    """Deterministic offline embeddings: signed feature hashing of word unigrams and bigrams"""
+
+    def __init__(self, dim=retrieval_config.LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+        self.model = f"local-hashing-{dim}"
+
+    def _embed_one(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if (digest >> 63) else -1.0
+        return vector
+
+    async def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize(np.stack([self._embed_one(text) for text in texts]))
+
+
+class OpenAIEmbedder:
+    """Embeddings API through the shared LLM HTTP pool"""
+
+    def __init__(self, model=retrieval_config.EMBEDDING_MODEL):
+        self.model = model
+
+    async def embed(self, texts):
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = llm_client.get_embeddings(self.model)
+        vectors = []
+        for start in range(0, len(texts), retrieval_config.EMBEDDING_BATCH_SIZE):
+            vectors.extend(await embeddings.aembed_documents(texts[start:start + retrieval_config.EMBEDDING_BATCH_SIZE]))
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+
+def get_embedder(name=None):
+    name = name or retrieval_config.EMBEDDING_BACKEND
+    if name == "local":
+        return LocalHashingEmbedder()
+    if name == "openai":
+        return OpenAIEmbedder()
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,99 @@
+import numpy as np
+
+from src.retrieval.config import retrieval_config
+
+
+class VectorIndex:
+    """In-memory cosine-similarity index over L2-normalized float32 vectors.
+
+    "flat" scores every vector with one matrix multiply. "ivf" clusters the
+    vectors with k-means and only scores the cells closest to the query; the
+    clustering is rebuilt lazily after the index changes.
+    """
+
+    def __init__(self, mode=retrieval_config.INDEX_MODE, nlist=retrieval_config.IVF_NLIST, nprobe=retrieval_config.IVF_NPROBE):
+        if mode not in ("flat", "ivf"):
+            raise ValueError(f"Unknown index mode: {mode}")
+        self.mode = mode
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = None
+        self._positions = {}
+        self._centroids = None
+        self._lists = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ids(self):
+        return set(self._positions)
+
+    def add(self, ids, vectors):
+        """Insert or replace vectors for the given ids"""
+        if len(ids) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.remove([i for i in ids if i in self._positions])
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        self._matrix = vectors if self._matrix is None or len(self._matrix) == 0 else np.vstack([self._matrix, vectors])
+        self._reindex()
+
+    def remove(self, ids):
+        if not ids:
+            return
+        keep = ~np.isin(self._ids, np.asarray(list(ids), dtype=np.int64))
+        self._ids = self._ids[keep]
+        self._matrix = self._matrix[keep]
+        self._reindex()
+
+    def _reindex(self):
+        self._positions = {int(i): position for position, i in enumerate(self._ids)}
+        self._centroids = None
+        self._lists = None
+
+    def _train(self):
+        """A few rounds of spherical k-means to split the vectors into nlist cells"""
+        count = len(self._ids)
+        nlist = max(1, min(self.nlist, int(np.sqrt(count))))
+        rng = np.random.default_rng(0)
+        centroids = self._matrix[rng.choice(count, nlist, replace=False)]
+        for _ in range(10):
+            assignment = np.argmax(self._matrix @ centroids.T, axis=1)
+            for cell in range(nlist):
+                members = self._matrix[assignment == cell]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[cell] = centroid / norm if norm else centroid
+        assignment = np.argmax(self._matrix @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assignment == cell) for cell in range(nlist)]
+
+    def search(self, query, k, ids=None):
+        """Return [(id, similarity)] for the k most similar vectors, best first.
+
+        With `ids` only those vectors are candidates; they are scored exactly,
+        without going through the IVF cells.
+        """
+        if len(self._ids) == 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+
+        if ids is not None:
+            rows = np.asarray(sorted({self._positions[i] for i in ids if i in self._positions}), dtype=np.int64)
+            if len(rows) == 0:
+                return []
+        elif self.mode == "ivf":
+            if self._centroids is None:
+                self._train()
+            cells = np.argsort(self._centroids @ query)[::-1][: self.nprobe]
+            rows = np.concatenate([self._lists[cell] for cell in cells])
+        else:
+            rows = np.arange(len(self._ids))
+
+        scores = self._matrix[rows] @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._ids[rows[i]]), float(scores[i])) for i in top]
@@ -0,0 +1,70 @@
+import numpy as np
+
+# The SQLite stand-in creates this table itself, see src/database/backends.py
+CREATE_EMBEDDINGS_TABLE_MSSQL = '''
+    IF OBJECT_ID('candidate_embeddings', 'U') IS NULL
+    CREATE TABLE candidate_embeddings (
+        candidate_id INT NOT NULL,
+        model NVARCHAR(100) NOT NULL,
+        vector VARBINARY(MAX) NOT NULL,
+        PRIMARY KEY (candidate_id, model)
+    )
+'''
+
+
+async def ensure_schema(conn, backend_name):
+    if backend_name == "mssql":
+        await conn.execute(CREATE_EMBEDDINGS_TABLE_MSSQL)
+        await conn.commit()
+
+
+async def fetch_candidate_ids(conn, after_id=0):
+    rows = await conn.fetchall("SELECT candidate_id FROM candidate_profiles WHERE candidate_id > ?", (after_id,))
+    return {int(row[0]) for row in rows}
+
+
+async def load_embeddings(conn, model, candidate_ids=None):
+    """(ids, vectors) stored for the model, all of them or only those of candidate_ids"""
+    query = "SELECT candidate_id, vector FROM candidate_embeddings WHERE model = ?"
+    if candidate_ids is None:
+        rows = await conn.fetchall(query, (model,))
+    else:
+        # SQL Server caps a statement at 2100 parameters
+        candidate_ids = list(candidate_ids)
+        rows = []
+        for start in range(0, len(candidate_ids), 1000):
+            chunk = tuple(candidate_ids[start:start + 1000])
+            placeholders = ", ".join("?" for _ in chunk)
+            rows.extend(await conn.fetchall(query + f" AND candidate_id IN ({placeholders})", (model, *chunk)))
+    ids = [int(row[0]) for row in rows]
+    vectors = [np.frombuffer(row[1], dtype=np.float32) for row in rows]
+    return ids, vectors
+
+
+UPSERT_EMBEDDING_MSSQL = '''
+    MERGE candidate_embeddings WITH (HOLDLOCK) AS t
+    USING (SELECT ? AS candidate_id, ? AS model, ? AS vector) AS s
+    ON t.candidate_id = s.candidate_id AND t.model = s.model
+    WHEN MATCHED THEN UPDATE SET vector = s.vector
+    WHEN NOT MATCHED THEN INSERT (candidate_id, model, vector) VALUES (s.candidate_id, s.model, s.vector);
+'''
+
+UPSERT_EMBEDDING_SQLITE = '''
+    INSERT OR REPLACE INTO candidate_embeddings (candidate_id, model, vector) VALUES (?, ?, ?)
+'''
+
+
+async def save_embeddings(conn, model, ids, vectors):
+    """Insert or replace stored vectors for ids in one statement each, so two workers
+    embedding the same candidate don't collide on the key; the caller owns the transaction"""
+    query = UPSERT_EMBEDDING_MSSQL if conn.backend.name == "mssql" else UPSERT_EMBEDDING_SQLITE
+    await conn.executemany(
+        query,
+        [(int(i), model, np.asarray(vector, dtype=np.float32).tobytes()) for i, vector in zip(ids, vectors)],
+    )
+
+
+async def delete_embeddings(conn, ids):
+    await conn.executemany(
+        "DELETE FROM candidate_embeddings WHERE candidate_id = ?", [(int(i),) for i in ids]
+    )
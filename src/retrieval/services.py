@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import time
+
+from src.candidate import repository as candidate_repository
+from src.retrieval import repository
+from src.retrieval.config import retrieval_config
+from src.retrieval.embeddings import candidate_text, get_embedder, job_text
+from src.retrieval.index import VectorIndex
+
+
+class CandidateIndex:
+    """Embedding index over candidate_profiles, kept in step with the table.
+
+    Vectors are persisted in candidate_embeddings so a restart only reloads
+    them. Before each search, profiles added since the last one are embedded
+    (or loaded, when another worker already stored them); every
+    INDEX_FULL_SYNC_INTERVAL seconds the whole table is compared instead, which
+    also drops the vectors of deleted profiles.
+    """
+
+    def __init__(self, embedder=None, index=None, full_sync_interval=retrieval_config.INDEX_FULL_SYNC_INTERVAL):
+        self.embedder = embedder or get_embedder()
+        self.index = index or VectorIndex()
+        self.full_sync_interval = full_sync_interval
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._job_vectors = {}
+        self._last_id = 0
+        self._full_synced_at = None
+
+    async def _load(self, conn, backend_name):
+        if not self._loaded:
+            await repository.ensure_schema(conn, backend_name)
+            ids, vectors = await repository.load_embeddings(conn, self.embedder.model)
+            self.index.add(ids, vectors)
+            self._loaded = True
+
+    async def load(self, conn, backend_name):
+        """Read the persisted vectors without embedding anything new (preloading before fork)"""
+        async with self._lock:
+            await self._load(conn, backend_name)
+            await conn.commit()
+
+    async def _add_missing(self, conn, missing):
+        stored_ids, stored_vectors = await repository.load_embeddings(conn, self.embedder.model, missing)
+        self.index.add(stored_ids, stored_vectors)
+        missing = sorted(set(missing) - set(stored_ids))
+        if missing:
+            candidates = await candidate_repository.fetch_candidates(conn, missing)
+            ids = [candidate["candidate_id"] for candidate in candidates]
+            vectors = await self.embedder.embed([candidate_text(candidate) for candidate in candidates])
+            await repository.save_embeddings(conn, self.embedder.model, ids, vectors)
+            self.index.add(ids, vectors)
+
+    async def sync(self, conn, backend_name):
+        async with self._lock:
+            await self._load(conn, backend_name)
+
+            full = (
+                self._full_synced_at is None
+                or time.monotonic() - self._full_synced_at >= self.full_sync_interval
+            )
+            current = await repository.fetch_candidate_ids(conn, 0 if full else self._last_id)
+            indexed = self.index.ids()
+
+            if full:
+                stale = indexed - current
+                if stale:
+                    self.index.remove(stale)
+                    await repository.delete_embeddings(conn, stale)
+
+            missing = current - indexed
+            if missing:
+                await self._add_missing(conn, missing)
+
+            await conn.commit()
+            if current:
+                self._last_id = max(self._last_id, max(current))
+            if full:
+                self._full_synced_at = time.monotonic()
+
+    async def embed_job(self, job):
+        text = job_text(job)
+        key = (job.get("job_id"), hashlib.sha256(text.encode("utf-8")).hexdigest())
+        if key not in self._job_vectors:
+            # Small bounded memo; job texts rarely change
+            if len(self._job_vectors) >= 1024:
+                self._job_vectors.clear()
+            self._job_vectors[key] = (await self.embedder.embed([text]))[0]
+        return self._job_vectors[key]
+
+    async def shortlist(self, conn, backend_name, job, top_k, candidate_ids=None):
+        """[(candidate_id, similarity)] of the top_k profiles closest to the job, among candidate_ids if given"""
+        await self.sync(conn, backend_name)
+        return self.index.search(await self.embed_job(job), top_k, ids=candidate_ids)
+
+
+candidate_index = CandidateIndex()
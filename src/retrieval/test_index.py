@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.retrieval.index import VectorIndex
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture(params=["flat", "ivf"])
+def index(request):
+    index = VectorIndex(mode=request.param, nlist=2, nprobe=1)
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(40, 3)).astype(np.float32)
+    index.add(list(range(100, 140)), vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    index.add([1, 2, 3], [unit(1, 0, 0), unit(0.9, 0.1, 0), unit(0, 1, 0)])
+    return index
+
+
+def test_search_best_first(index):
+    assert [i for i, _ in index.search(unit(1, 0, 0), 2)] == [1, 2]
+
+
+def test_search_within_ids(index):
+    # The global top results are not among the ids, yet k of the ids come back
+    found = index.search(unit(1, 0, 0), 2, ids=[3, 120, 999])
+    assert sorted(i for i, _ in found) == [3, 120]
+    assert found[0][1] >= found[1][1]
+    assert index.search(unit(1, 0, 0), 2, ids=[999]) == []
+
+
+def test_add_replaces_and_remove(index):
+    index.add([1], [unit(0, 0, 1)])
+    assert len(index) == 43
+    assert index.search(unit(0, 0, 1), 1, ids=[1, 2])[0][0] == 1
+    index.remove([1])
+    assert 1 not in index.ids()
@@ -0,0 +1,104 @@
+import asyncio
+
+from src.candidate import repository as candidate_repository
+from src.database.backends import SQLiteBackend
+from src.database.pool import ConnectionPool
+from src.retrieval import repository
+from src.retrieval.embeddings import LocalHashingEmbedder
+from src.retrieval.services import CandidateIndex
+
+
+def profile(name, skills):
+    return {
+        "candidate_name": name,
+        "phone_number": None,
+        "email": None,
+        "degree": [],
+        "experience": [],
+        "technical_skill": skills,
+        "responsibility": [],
+        "certificate": [],
+        "soft_skill": [],
+        "comment": "",
+        "job_recommended": [],
+    }
+
+
+class CountingEmbedder(LocalHashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = 0
+
+    async def embed(self, texts):
+        self.embedded += len(texts)
+        return await super().embed(texts)
+
+
+def run(tmp_path, scenario):
+    async def main():
+        pool = ConnectionPool(backend=SQLiteBackend(str(tmp_path / "db.sqlite3")), min_size=0)
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+async def insert(pool, *profiles):
+    async with pool.transaction() as conn:
+        return [await candidate_repository.insert_candidate(conn, p) for p in profiles]
+
+
+def test_sync_embeds_only_new_profiles(tmp_path):
+    async def scenario(pool):
+        index = CandidateIndex(embedder=CountingEmbedder(), full_sync_interval=3600)
+        first = await insert(pool, profile("a", ["python"]), profile("b", ["java"]))
+        async with pool.connection() as conn:
+            await index.sync(conn, "sqlite")
+            assert index.embedder.embedded == 2
+
+            await conn.execute("DELETE FROM candidate_profiles WHERE candidate_id = ?", (first[0],))
+            await conn.commit()
+            [added] = await insert(pool, profile("c", ["go"]))
+            await index.sync(conn, "sqlite")
+            # Incremental: only the new profile; the deleted one waits for the next full sync
+            assert index.embedder.embedded == 3
+            assert index.index.ids() == {*first, added}
+
+            index.full_sync_interval = 0
+            await index.sync(conn, "sqlite")
+            assert index.embedder.embedded == 3
+            assert index.index.ids() == {first[1], added}
+            stored, _ = await repository.load_embeddings(conn, index.embedder.model)
+            assert sorted(stored) == sorted([first[1], added])
+
+    run(tmp_path, scenario)
+
+
+def test_vectors_stored_by_another_worker_are_loaded(tmp_path):
+    async def scenario(pool):
+        other = CandidateIndex(embedder=CountingEmbedder())
+        index = CandidateIndex(embedder=CountingEmbedder())
+        await insert(pool, profile("a", ["python"]))
+        async with pool.connection() as conn:
+            await other.sync(conn, "sqlite")
+            await index.sync(conn, "sqlite")
+        assert other.embedder.embedded == 1
+        assert index.embedder.embedded == 0
+        assert len(index.index) == 1
+
+    run(tmp_path, scenario)
+
+
+def test_save_embeddings_upserts(tmp_path):
+    async def scenario(pool):
+        async with pool.transaction() as conn:
+            await repository.save_embeddings(conn, "m", [1], [[1.0, 0.0]])
+            await repository.save_embeddings(conn, "m", [1], [[0.0, 1.0]])
+        async with pool.connection() as conn:
+            ids, vectors = await repository.load_embeddings(conn, "m", [1, 2])
+        assert ids == [1]
+        assert list(vectors[0]) == [0.0, 1.0]
+
+    run(tmp_path, scenario)
@@ -0,0 +1,23 @@
+from pydantic_settings import BaseSettings
+
+
+class ServerConfig(BaseSettings):
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_BACKLOG: int = 2048
+
+    # Worker processes started by `python -m src.server.launcher`; 0 means one per CPU core
+    WEB_WORKERS: int = 0
+    # Load prompt schemas, tokenizers and the embedding index once before forking,
+    # so the workers share them copy-on-write instead of each building its own
+    SERVER_PRELOAD: bool = True
+    # Open DB connections and the LLM HTTP client before a worker accepts requests
+    SERVER_WARMUP: bool = True
+
+    # On shutdown: seconds for in-flight requests, then for running background tasks
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+    # Pause before replacing a worker that died, so a crash loop can't spin
+    SERVER_RESTART_DELAY: float = 1.0
+
+
+server_config = ServerConfig()
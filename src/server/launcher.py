@@ -0,0 +1,179 @@
+"""Pre-forking production launcher.
+
+    python -m src.server.launcher                       # one worker per CPU core on :8000
+    python -m src.server.launcher --workers 8 --port 8080
+
+The parent binds the listening socket, imports the app and runs preload(),
+then forks the workers; each runs its own event loop, DB pool and LLM client
+over the shared socket, so a worker stuck in a blocking call only stalls its
+own requests. Workers that die are replaced. SIGTERM/SIGINT stop the workers
+gracefully (in-flight requests, then background tasks, see lifecycle.drain)
+and kill whatever is left after twice SERVER_GRACEFUL_TIMEOUT.
+
+Without os.fork (Windows) this falls back to uvicorn's own multi-process
+mode, which re-imports the app in every worker and skips the preload.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from src.server.config import server_config
+from src.tasks.config import task_config
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds past the graceful timeout before remaining workers are killed
+KILL_MARGIN = 10
+
+
+def worker_count(requested):
+    return requested or server_config.WEB_WORKERS or os.cpu_count() or 1
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def exit_on_signal(signum, frame):
+    raise SystemExit(0)
+
+
+def run_worker(app, sock, log_level):
+    """Body of a forked worker; never returns"""
+    # uvicorn handles SIGTERM/SIGINT while serving and re-raises them once it has shut
+    # down gracefully, which lands here as SystemExit
+    signal.signal(signal.SIGTERM, exit_on_signal)
+    signal.signal(signal.SIGINT, exit_on_signal)
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    # Processes this worker forks (the parse pool) must not keep the port open after it dies;
+    # the fd is closed outright since asyncio's references defer sock.close()
+    os.register_at_fork(after_in_child=lambda: os.close(sock.detach()))
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        log_level=log_level,
+        timeout_graceful_shutdown=server_config.SERVER_GRACEFUL_TIMEOUT,
+    )
+    server = uvicorn.Server(config)
+    # Same exit status as uvicorn when the lifespan startup fails
+    status = 3
+    try:
+        server.run(sockets=[sock])
+        if server.started:
+            status = 0
+    except SystemExit:
+        pass
+    except Exception:
+        LOGGER.exception(f"Worker {os.getpid()} crashed")
+        status = 1
+    finally:
+        logging.shutdown()
+        os._exit(status)
+
+
+def serve(workers, host, port, log_level):
+    sock = bind_socket(host, port, server_config.SERVER_BACKLOG)
+
+    # Importing the app loads every prompt and function schema
+    from main import app
+    from src.server.lifecycle import preload
+
+    if server_config.SERVER_PRELOAD:
+        preload()
+    if workers > 1 and task_config.TASK_QUEUE_BACKEND == "memory":
+        LOGGER.warning("TASK_QUEUE_BACKEND=memory gives every worker its own queue, /tasks only sees the local one")
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(app, sock, log_level)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        LOGGER.info(f"Stopping {len(children)} workers")
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        signal.alarm(int(server_config.SERVER_GRACEFUL_TIMEOUT) * 2 + KILL_MARGIN)
+
+    def kill(signum, frame):
+        for pid in children:
+            LOGGER.warning(f"Worker {pid} did not stop in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGALRM, kill)
+
+    for _ in range(workers):
+        spawn()
+    LOGGER.info(f"Serving on {host}:{port} with {workers} workers (launcher pid {os.getpid()})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+        children.discard(pid)
+        if not stopping:
+            LOGGER.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, replacing it")
+            time.sleep(server_config.SERVER_RESTART_DELAY)
+            if not stopping:
+                spawn()
+
+    sock.close()
+    LOGGER.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API in several pre-forked worker processes")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: WEB_WORKERS or one per core)")
+    parser.add_argument("--host", default=server_config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=server_config.SERVER_PORT)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    workers = worker_count(args.workers)
+
+    if not hasattr(os, "fork"):
+        LOGGER.warning("os.fork is unavailable, starting uvicorn workers without preloading")
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            log_level=args.log_level,
+            timeout_graceful_shutdown=server_config.SERVER_GRACEFUL_TIMEOUT,
+        )
+        return
+
+    serve(workers, args.host, args.port, args.log_level)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
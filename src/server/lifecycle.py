@@ -0,0 +1,72 @@
+"""Process lifecycle: preload before fork, warm-up on startup, drain on shutdown.
+
+preload() runs once in the launcher before it forks the workers. Whatever it
+builds (prompt schemas and their fingerprints, tiktoken encodings, the
+candidate embedding index) is inherited copy-on-write by every worker. It
+leaves no open connections, threads or event loop behind, which would not
+survive the fork.
+
+warm_up() and drain() run in each worker's lifespan: the worker only starts
+accepting once its pool and LLM client are ready, and on shutdown uvicorn
+first lets in-flight requests finish, then drain() gives running background
+tasks the same grace period before closing the pools.
+"""
+import asyncio
+import logging
+
+from src.candidate.extraction import shutdown_parse_executor
+from src.database.pool import db_pool
+from src.llm.client import llm_client
+from src.llm.routing import ROUTES
+from src.llm.tokens import get_token_counter
+from src.retrieval.services import candidate_index
+from src.server.config import server_config
+from src.tasks.worker import task_workers
+
+LOGGER = logging.getLogger(__name__)
+
+
+def chat_models():
+    """Every model a route may call; the routes register as main imports the services"""
+    return sorted({model for route in ROUTES.values() for model in route.models})
+
+
+async def _load_index():
+    try:
+        async with db_pool.connection() as conn:
+            await candidate_index.load(conn, db_pool.backend.name)
+    except Exception as e:
+        # Workers load it on the first ranking instead
+        LOGGER.warning(f"Could not preload the candidate index: {e}")
+    finally:
+        await db_pool.close()
+
+
+def preload():
+    """Build shared read-only state in the launcher process (prompt schemas are loaded by importing main)"""
+    for model in chat_models():
+        get_token_counter(model)
+    asyncio.run(_load_index())
+    LOGGER.info(f"Preloaded tokenizers for {', '.join(chat_models())} and {len(candidate_index.index)} candidate vectors")
+
+
+async def warm_up():
+    await db_pool.open()
+    if server_config.SERVER_WARMUP:
+        try:
+            async with db_pool.connection() as conn:
+                await conn.fetchone("SELECT 1")
+        except Exception as e:
+            LOGGER.warning(f"Database warm-up failed: {e}")
+        for model in chat_models():
+            llm_client.get_model(model)
+            get_token_counter(model)
+    # Background analyses; TASK_WORKERS=0 leaves them to `python -m src.tasks.worker`
+    await task_workers.start()
+
+
+async def drain():
+    await task_workers.stop(timeout=server_config.SERVER_GRACEFUL_TIMEOUT)
+    await llm_client.aclose()
+    shutdown_parse_executor()
+    await db_pool.close()
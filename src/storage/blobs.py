@@ -0,0 +1,242 @@
+"""Blob storage for uploaded CVs.
+
+Blobs are addressed by key: "<sha256><extension>" for every CV stored since
+uploads are content hashed, the original file name for older ones. The local
+backend shards hashed keys into ab/cd/ directories, the S3 backend writes
+them under STORAGE_S3_PREFIX. Either can gzip blobs at rest; the stored name
+then ends in ".gz" and reads decompress transparently, so the setting can be
+changed without rewriting existing blobs.
+"""
+import gzip
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from src.candidate.config import candidate_config
+from src.storage.config import storage_config
+
+CONTENT_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+GZIP_SUFFIX = ".gz"
+
+
+def content_hash(key):
+    """SHA-256 in a content-addressed key, None for keys that are plain file names"""
+    stem = os.path.splitext(key)[0]
+    return stem if CONTENT_HASH_PATTERN.fullmatch(stem) else None
+
+
+def gzip_file(source_path, target_path, chunk_size=storage_config.STORAGE_CHUNK_SIZE):
+    with open(source_path, "rb") as source, gzip.open(target_path, "wb") as target:
+        shutil.copyfileobj(source, target, chunk_size)
+
+
+class BlobStore:
+    """Backend interface; every method blocks, async callers go through a thread"""
+
+    compression = ""
+    chunk_size = storage_config.STORAGE_CHUNK_SIZE
+
+    @property
+    def staging_dir(self):
+        """Where uploads are assembled before put_file"""
+        return tempfile.gettempdir()
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def put_file(self, key, path):
+        """Store the complete file at path under key; the file is consumed (moved or deleted)"""
+        raise NotImplementedError
+
+    def open(self, key):
+        """Readable binary stream of the original bytes; FileNotFoundError when missing"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def iter_chunks(self, key):
+        with self.open(key) as stream:
+            for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                yield chunk
+
+    @contextmanager
+    def local_path(self, key):
+        """A local file with the blob's bytes, for parsers that need a seekable file"""
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as target, self.open(key) as stream:
+                shutil.copyfileobj(stream, target, self.chunk_size)
+            yield path
+        finally:
+            os.unlink(path)
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root, shard_depth=2, compression=""):
+        self.root = root
+        self.shard_depth = shard_depth
+        self.compression = compression
+
+    @property
+    def staging_dir(self):
+        # Same filesystem as the blobs, so put_file is an atomic rename
+        path = os.path.join(self.root, ".staging")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def path(self, key):
+        sha256 = content_hash(key)
+        if sha256 is None:
+            # Uploads from before content hashing stay flat in the root
+            return os.path.join(self.root, key)
+        shards = [sha256[level * 2:level * 2 + 2] for level in range(self.shard_depth)]
+        return os.path.join(self.root, *shards, key)
+
+    def _stored_path(self, key):
+        path = self.path(key)
+        for candidate in (path + GZIP_SUFFIX, path):
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def exists(self, key):
+        return self._stored_path(key) is not None
+
+    def put_file(self, key, path):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if self.compression != "gzip":
+            os.replace(path, target)
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".part")
+        os.close(fd)
+        try:
+            gzip_file(path, tmp_path, self.chunk_size)
+            os.replace(tmp_path, target + GZIP_SUFFIX)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            os.unlink(path)
+
+    def open(self, key):
+        path = self._stored_path(key)
+        if path is None:
+            raise FileNotFoundError(f"No stored CV {key}")
+        return gzip.open(path, "rb") if path.endswith(GZIP_SUFFIX) else open(path, "rb")
+
+    def delete(self, key):
+        path = self._stored_path(key)
+        if path is not None:
+            os.unlink(path)
+
+    @contextmanager
+    def local_path(self, key):
+        path = self._stored_path(key)
+        if path is not None and not path.endswith(GZIP_SUFFIX):
+            # Already a plain local file, no copy needed
+            yield path
+            return
+        with super().local_path(key) as path:
+            yield path
+
+
+class S3BlobStore(BlobStore):
+    """Any S3-compatible store (AWS, MinIO, Ceph...) through boto3, imported on first use"""
+
+    def __init__(self, bucket, prefix="", endpoint_url="", compression="", client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.compression = compression
+        self._client = client
+
+    @property
+    def client(self):
+        # Created lazily so every parser process builds its own (boto3 clients don't survive fork)
+        if self._client is None:
+            if self.endpoint_url.startswith("file://"):
+                from src.storage.fake_s3 import FakeS3Client
+
+                self._client = FakeS3Client(self.endpoint_url[len("file://"):])
+            else:
+                import boto3
+
+                self._client = boto3.client("s3", endpoint_url=self.endpoint_url or None)
+        return self._client
+
+    def _object_keys(self, key):
+        """Object names a blob may be stored under, the configured form first"""
+        plain = self.prefix + key
+        if self.compression == "gzip":
+            return [plain + GZIP_SUFFIX, plain]
+        return [plain, plain + GZIP_SUFFIX]
+
+    @staticmethod
+    def _is_missing(error):
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _stored_key(self, key):
+        for object_key in self._object_keys(key):
+            try:
+                self.client.head_object(Bucket=self.bucket, Key=object_key)
+                return object_key
+            except Exception as e:
+                if not self._is_missing(e):
+                    raise
+        return None
+
+    def exists(self, key):
+        return self._stored_key(key) is not None
+
+    def put_file(self, key, path):
+        # upload_file switches to multipart for large files, nothing is read into memory
+        try:
+            if self.compression != "gzip":
+                self.client.upload_file(path, self.bucket, self.prefix + key)
+                return
+            fd, gz_path = tempfile.mkstemp(suffix=GZIP_SUFFIX)
+            os.close(fd)
+            try:
+                gzip_file(path, gz_path, self.chunk_size)
+                self.client.upload_file(gz_path, self.bucket, self.prefix + key + GZIP_SUFFIX)
+            finally:
+                os.unlink(gz_path)
+        finally:
+            os.unlink(path)
+
+    def open(self, key):
+        object_key = self._stored_key(key)
+        if object_key is None:
+            raise FileNotFoundError(f"No stored CV {key}")
+        body = self.client.get_object(Bucket=self.bucket, Key=object_key)["Body"]
+        return gzip.GzipFile(fileobj=body, mode="rb") if object_key.endswith(GZIP_SUFFIX) else body
+
+    def delete(self, key):
+        for object_key in self._object_keys(key):
+            self.client.delete_object(Bucket=self.bucket, Key=object_key)
+
+
+def build_blob_store():
+    if storage_config.STORAGE_BACKEND == "local":
+        return LocalBlobStore(
+            root=storage_config.STORAGE_LOCAL_ROOT or candidate_config.CV_UPLOAD_DIR,
+            shard_depth=storage_config.STORAGE_SHARD_DEPTH,
+            compression=storage_config.STORAGE_COMPRESSION,
+        )
+    if storage_config.STORAGE_BACKEND == "s3":
+        return S3BlobStore(
+            bucket=storage_config.STORAGE_S3_BUCKET,
+            prefix=storage_config.STORAGE_S3_PREFIX,
+            endpoint_url=storage_config.STORAGE_S3_ENDPOINT_URL,
+            compression=storage_config.STORAGE_COMPRESSION,
+        )
+    raise ValueError(f"Unknown storage backend: {storage_config.STORAGE_BACKEND}")
+
+
+blob_store = build_blob_store()
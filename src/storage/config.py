@@ -0,0 +1,24 @@
+from pydantic_settings import BaseSettings
+
+
+class StorageConfig(BaseSettings):
+    # "local": hash-sharded directory tree, "s3": any S3-compatible object store
+    STORAGE_BACKEND: str = "local"
+    # Local root; empty means CV_UPLOAD_DIR, where CVs have always been written
+    STORAGE_LOCAL_ROOT: str = ""
+    # Directory levels of 2 hex characters each: ab/cd/abcd...pdf keeps every directory small
+    STORAGE_SHARD_DEPTH: int = 2
+
+    # S3: credentials and region come from the usual AWS_* variables / config files.
+    # STORAGE_S3_ENDPOINT_URL=file:///some/dir uses the local stand-in in src/storage/fake_s3.py
+    STORAGE_S3_BUCKET: str = "cv-ranking"
+    STORAGE_S3_PREFIX: str = "cv/"
+    STORAGE_S3_ENDPOINT_URL: str = ""
+
+    # "gzip" compresses new blobs at rest. PDFs and DOCX are often compressed internally,
+    # so this mostly pays off for text-heavy PDFs; reads handle both forms either way
+    STORAGE_COMPRESSION: str = ""
+    STORAGE_CHUNK_SIZE: int = 1024 * 1024
+
+
+storage_config = StorageConfig()
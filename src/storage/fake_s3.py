@@ -0,0 +1,55 @@
+"""Local stand-in for the boto3 S3 client, backed by a directory.
+
+Implements only the calls S3BlobStore makes, with the same argument names
+and "404"/"NoSuchKey" errors, so the S3 code path can run without a bucket:
+
+    STORAGE_BACKEND=s3 STORAGE_S3_ENDPOINT_URL=file:///tmp/fake-s3 uvicorn main:app
+"""
+import os
+import shutil
+import tempfile
+
+
+class FakeS3Error(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class FakeS3Client:
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, bucket, key):
+        path = os.path.normpath(os.path.join(self.root, bucket, key))
+        if not path.startswith(os.path.normpath(os.path.join(self.root, bucket)) + os.sep):
+            raise FakeS3Error("InvalidArgument", f"Invalid key {key}")
+        return path
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise FakeS3Error("404", "Not Found")
+        return {"ContentLength": os.path.getsize(path)}
+
+    def upload_file(self, Filename, Bucket, Key):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Objects appear whole or not at all, as on S3
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as target, open(Filename, "rb") as source:
+            shutil.copyfileobj(source, target)
+        os.replace(tmp_path, path)
+
+    def get_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise FakeS3Error("NoSuchKey", "The specified key does not exist.")
+        return {"Body": open(path, "rb"), "ContentLength": os.path.getsize(path)}
+
+    def delete_object(self, Bucket, Key):
+        # Deleting a missing key succeeds on S3 too
+        path = self._path(Bucket, Key)
+        if os.path.exists(path):
+            os.unlink(path)
+        return {}
@@ -0,0 +1,34 @@
+from pydantic_settings import BaseSettings
+
+
+class TaskConfig(BaseSettings):
+    # "sqlite" persists tasks in a local file shared with `python -m src.tasks.worker`,
+    # "memory" keeps them in process (tests, single worker)
+    TASK_QUEUE_BACKEND: str = "sqlite"
+    TASK_QUEUE_PATH: str = "./cache/tasks.sqlite3"
+
+    # Workers started inside the API process; 0 leaves the queue to the worker process
+    TASK_WORKERS: int = 4
+    # Idle workers re-check the queue this often when nothing wakes them up
+    TASK_POLL_INTERVAL: float = 1.0
+    # A running task whose worker stops renewing within this window is claimed again
+    TASK_LEASE_SECONDS: float = 600.0
+
+    # Attempts before a task moves to the dead-letter state
+    TASK_MAX_ATTEMPTS: int = 3
+    TASK_RETRY_BACKOFF_BASE: float = 5.0
+    TASK_RETRY_BACKOFF_MAX: float = 300.0
+
+    # Tasks submitted without an X-Tenant-ID header share this tenant
+    TASK_DEFAULT_TENANT: str = "default"
+
+    # Completion callbacks
+    TASK_WEBHOOK_TIMEOUT: float = 10.0
+    TASK_WEBHOOK_RETRIES: int = 3
+    # Hosts (and their subdomains) webhooks may target; empty allows any public host
+    TASK_WEBHOOK_ALLOWED_HOSTS: tuple = ()
+    # Allow loopback/private/link-local targets, e.g. for a callback receiver on the same network
+    TASK_WEBHOOK_ALLOW_PRIVATE: bool = False
+
+
+task_config = TaskConfig()
@@ -0,0 +1,76 @@
+from src.candidate import repository as candidate_repository
+from src.candidate import services as candidate_services
+from src.database.pool import db_pool
+from src.job import repository as job_repository
+from src.job import services as job_services
+from src.job.schemas import JobSchema
+from src.matching import repository as matching_repository
+from src.matching import services as matching_services
+from src.matching.schemas import MatchingSchema
+
+# Task kind >>> coroutine taking the task payload and returning a JSON-serializable result
+TASK_HANDLERS = {}
+
+
+def task_handler(kind):
+    def register(fn):
+        TASK_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+@task_handler("candidate.analyse")
+async def analyse_candidate_task(payload):
+    # The CV was saved at submit time, workers read it from the shared upload directory
+    file_name = payload["file_name"]
+    cv_content, token_stats = await candidate_services.prepare_cv_candidate_async(file_name=file_name)
+    result = await candidate_services.analyse_candidate(cv_content=cv_content)
+    async with db_pool.transaction() as conn:
+        candidate_id, existing, near_duplicates = await candidate_repository.store_candidate(
+            conn, result, candidate_services.fingerprint_cv(file_name, cv_content, result)
+        )
+    if existing is not None:
+        return {"duplicate_of": candidate_id, **existing}
+    return {"candidate_id": candidate_id, "tokens_saved": token_stats["tokens_saved"], "near_duplicates": near_duplicates, **result}
+
+
+@task_handler("candidate.analyse_match")
+async def analyse_match_task(payload):
+    file_name = payload["file_name"]
+    jobs = await matching_services.load_jobs(payload["job_ids"]) if payload["job_ids"] else []
+    weights = await matching_services.load_weights_for_jobs([job["job_id"] for job in jobs], payload.get("tenant"))
+    cv_content, token_stats = await candidate_services.prepare_cv_candidate_async(file_name=file_name)
+    result, matches = await matching_services.analyse_candidate_jobs(cv_content, jobs, weights)
+    async with db_pool.transaction() as conn:
+        candidate_id, existing, near_duplicates = await candidate_repository.store_candidate(
+            conn, result, candidate_services.fingerprint_cv(file_name, cv_content, result)
+        )
+        await matching_repository.replace_candidate_analyses(conn, candidate_id, matches)
+    return {
+        "candidate_id": candidate_id,
+        "tokens_saved": token_stats["tokens_saved"],
+        "near_duplicates": near_duplicates,
+        **(existing if existing is not None else result),
+        "matches": [{"job_id": job_id, **analysis} for job_id, analysis in matches],
+    }
+
+
+@task_handler("job.analyse")
+async def analyse_job_task(payload):
+    job_data = JobSchema(**payload)
+    result = await job_services.analyse_job(job_data=job_data)
+    async with db_pool.transaction() as conn:
+        job_id = await job_repository.insert_job(conn, job_data.job_name, result)
+    return {"job_id": job_id, **result}
+
+
+@task_handler("matching.analyse")
+async def analyse_matching_task(payload):
+    matching_data = MatchingSchema(candidate=payload["candidate"], job=payload["job"])
+    candidate_id = int(matching_data.candidate["candidate_id"])
+    job_id = int(matching_data.job["job_id"])
+    weights = await matching_services.load_weights(job_id, payload.get("tenant"))
+    result = await matching_services.analyse_matching(matching_data=matching_data, weights=weights)
+    async with db_pool.transaction() as conn:
+        await matching_repository.insert_analysis(conn, candidate_id, job_id, result)
+    return {"candidate_id": candidate_id, "job_id": job_id, **result}
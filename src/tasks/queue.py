@@ -0,0 +1,460 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import orjson
+
+from src.tasks.config import task_config
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+DEAD = "dead"
+
+STATUSES = (QUEUED, RUNNING, SUCCEEDED, DEAD)
+
+LEASE_EXPIRED_ERROR = "Worker stopped before the task finished"
+
+TASK_COLUMNS = [
+    "task_id",
+    "kind",
+    "tenant",
+    "priority",
+    "status",
+    "attempts",
+    "max_attempts",
+    "payload",
+    "result",
+    "error",
+    "webhook_url",
+    "worker",
+    "created_at",
+    "updated_at",
+    "available_at",
+    "lease_expires_at",
+]
+
+
+def new_task(kind, payload, tenant, priority, max_attempts, webhook_url):
+    now = time.time()
+    return {
+        "task_id": uuid.uuid4().hex,
+        "kind": kind,
+        "tenant": tenant,
+        "priority": priority,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "payload": payload,
+        "result": None,
+        "error": None,
+        "webhook_url": webhook_url,
+        "worker": None,
+        "created_at": now,
+        "updated_at": now,
+        "available_at": now,
+        "lease_expires_at": None,
+    }
+
+
+def task_view(task):
+    """The fields returned by /tasks/{task_id} and posted to webhooks"""
+    return {
+        key: task[key]
+        for key in ("task_id", "kind", "tenant", "priority", "status", "attempts",
+                    "max_attempts", "result", "error", "created_at", "updated_at")
+    }
+
+
+class TaskQueue:
+    """Priority queue of analysis tasks with per-tenant fairness, retries and a dead-letter state.
+
+    Claims go to the highest priority first; within a priority the tenant
+    served longest ago wins, so one tenant's bulk upload can't starve the
+    others. A claimed task holds a lease; if its worker dies the lease runs
+    out and the task is claimed again. Failed tasks are retried with
+    exponential backoff until max_attempts, then parked as "dead".
+
+    Subclasses implement the blocking _methods; the async API runs them
+    through _run.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Called with the task after every submit, used to wake idle workers"""
+        self._listeners.append(callback)
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+    async def submit(self, kind, payload, tenant=None, priority=0, webhook_url=None, max_attempts=None):
+        task = new_task(
+            kind,
+            payload,
+            tenant or task_config.TASK_DEFAULT_TENANT,
+            priority,
+            max_attempts or task_config.TASK_MAX_ATTEMPTS,
+            webhook_url,
+        )
+        await self._run(self._insert, task)
+        for callback in self._listeners:
+            callback(task)
+        return task
+
+    async def claim(self, worker, lease_seconds=task_config.TASK_LEASE_SECONDS):
+        """Lease the next task to run, or None when nothing is due"""
+        return await self._run(self._claim, worker, lease_seconds)
+
+    # A claim is identified by (worker, attempt): the attempt count goes up on every claim, so a
+    # worker whose lease ran out can't renew or record over the claim that replaced it. Passing
+    # lease=None skips the check (tests, admin tools).
+
+    async def renew(self, task_id, lease_seconds=task_config.TASK_LEASE_SECONDS, lease=None):
+        await self._run(self._renew, task_id, lease_seconds, lease)
+
+    async def complete(self, task_id, result, lease=None):
+        """Record the result; None, and nothing written, when `lease` no longer holds the task"""
+        return await self._run(self._complete, task_id, result, lease)
+
+    async def fail(self, task_id, error, retry_delay, lease=None):
+        """Schedule a retry after retry_delay seconds, or dead-letter when attempts are used up.
+
+        None, and nothing written, when `lease` no longer holds the task.
+        """
+        return await self._run(self._fail, task_id, error, retry_delay, lease)
+
+    async def get(self, task_id):
+        return await self._run(self._get, task_id)
+
+    async def list(self, status=None, tenant=None, limit=100):
+        return await self._run(self._list, status, tenant, limit)
+
+    async def requeue(self, task_id):
+        """Move a dead task back to the queue with a fresh attempt budget"""
+        return await self._run(self._requeue, task_id)
+
+    async def stats(self):
+        counts = await self._run(self._counts)
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def close(self):
+        pass
+
+
+class MemoryTaskQueue(TaskQueue):
+    """In-process queue for tests and single-process deployments; lost on restart"""
+
+    def __init__(self):
+        super().__init__()
+        self._tasks = {}
+        self._last_claimed = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, task):
+        with self._lock:
+            self._tasks[task["task_id"]] = dict(task)
+
+    def _claim(self, worker, lease_seconds):
+        now = time.time()
+        with self._lock:
+            for task in self._tasks.values():
+                if task["status"] == RUNNING and task["lease_expires_at"] < now and task["attempts"] >= task["max_attempts"]:
+                    task.update(status=DEAD, error=LEASE_EXPIRED_ERROR, updated_at=now, lease_expires_at=None)
+            due = [
+                task for task in self._tasks.values()
+                if (task["status"] == QUEUED and task["available_at"] <= now)
+                or (task["status"] == RUNNING and task["lease_expires_at"] < now)
+            ]
+            if not due:
+                return None
+            task = min(
+                due,
+                key=lambda t: (-t["priority"], self._last_claimed.get(t["tenant"], 0), t["created_at"]),
+            )
+            task.update(
+                status=RUNNING,
+                attempts=task["attempts"] + 1,
+                worker=worker,
+                updated_at=now,
+                lease_expires_at=now + lease_seconds,
+            )
+            self._last_claimed[task["tenant"]] = now
+            return dict(task)
+
+    @staticmethod
+    def _holds(task, lease):
+        if lease is None:
+            return True
+        worker, attempt = lease
+        return task["status"] == RUNNING and task["worker"] == worker and task["attempts"] == attempt
+
+    def _renew(self, task_id, lease_seconds, lease=None):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is not None and task["status"] == RUNNING and self._holds(task, lease):
+                task["lease_expires_at"] = time.time() + lease_seconds
+
+    def _complete(self, task_id, result, lease=None):
+        with self._lock:
+            task = self._tasks[task_id]
+            if not self._holds(task, lease):
+                return None
+            task.update(status=SUCCEEDED, result=result, error=None, updated_at=time.time(), lease_expires_at=None)
+            return dict(task)
+
+    def _fail(self, task_id, error, retry_delay, lease=None):
+        now = time.time()
+        with self._lock:
+            task = self._tasks[task_id]
+            if not self._holds(task, lease):
+                return None
+            if task["attempts"] >= task["max_attempts"]:
+                task.update(status=DEAD, error=error, updated_at=now, lease_expires_at=None)
+            else:
+                task.update(status=QUEUED, error=error, updated_at=now, available_at=now + retry_delay, lease_expires_at=None)
+            return dict(task)
+
+    def _get(self, task_id):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return dict(task) if task is not None else None
+
+    def _list(self, status, tenant, limit):
+        with self._lock:
+            tasks = [
+                dict(task) for task in self._tasks.values()
+                if (status is None or task["status"] == status) and (tenant is None or task["tenant"] == tenant)
+            ]
+        tasks.sort(key=lambda t: t["created_at"], reverse=True)
+        return tasks[:limit]
+
+    def _requeue(self, task_id):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None or task["status"] != DEAD:
+                return None
+            now = time.time()
+            task.update(status=QUEUED, attempts=0, updated_at=now, available_at=now)
+            return dict(task)
+
+    def _counts(self):
+        with self._lock:
+            counts = {}
+            for task in self._tasks.values():
+                counts[task["status"]] = counts.get(task["status"], 0) + 1
+            return counts
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """Persistent queue in a local SQLite file.
+
+    Survives restarts and is shared with worker processes on the same host;
+    claims run inside BEGIN IMMEDIATE so two processes never lease the same task.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect()
+        # A SQLite connection must not be used on both sides of a fork (preloading launcher)
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        # Autocommit mode; multi-statement updates open their own transaction
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                tenant TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                max_attempts INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                result BLOB,
+                error TEXT,
+                webhook_url TEXT,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                lease_expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_tasks_due ON tasks (status, priority DESC, available_at);
+            CREATE INDEX IF NOT EXISTS ix_tasks_tenant ON tasks (tenant, created_at);
+            CREATE TABLE IF NOT EXISTS task_tenants (
+                tenant TEXT PRIMARY KEY,
+                last_claimed_at REAL NOT NULL
+            );
+            """
+        )
+
+    async def _run(self, fn, *args):
+        # SQLite calls block, keep them off the event loop
+        return await asyncio.to_thread(fn, *args)
+
+    def _row_to_task(self, row):
+        task = dict(zip(TASK_COLUMNS, row))
+        task["payload"] = orjson.loads(task["payload"])
+        task["result"] = orjson.loads(task["result"]) if task["result"] is not None else None
+        return task
+
+    def _fetch(self, task_id):
+        row = self._conn.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return self._row_to_task(row) if row is not None else None
+
+    def _insert(self, task):
+        row = dict(task, payload=orjson.dumps(task["payload"]))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})",
+                [row[column] for column in TASK_COLUMNS],
+            )
+
+    def _claim(self, worker, lease_seconds):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A task that keeps killing its worker ends up dead-lettered too
+                self._conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, updated_at = ?, lease_expires_at = NULL "
+                    "WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                    (DEAD, LEASE_EXPIRED_ERROR, now, RUNNING, now),
+                )
+                row = self._conn.execute(
+                    """
+                    SELECT t.task_id, t.tenant FROM tasks t
+                    LEFT JOIN task_tenants s ON s.tenant = t.tenant
+                    WHERE (t.status = ? AND t.available_at <= ?)
+                       OR (t.status = ? AND t.lease_expires_at < ?)
+                    ORDER BY t.priority DESC, COALESCE(s.last_claimed_at, 0), t.created_at
+                    LIMIT 1
+                    """,
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                task_id, tenant = row
+                self._conn.execute(
+                    "UPDATE tasks SET status = ?, attempts = attempts + 1, worker = ?, "
+                    "updated_at = ?, lease_expires_at = ? WHERE task_id = ?",
+                    (RUNNING, worker, now, now + lease_seconds, task_id),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO task_tenants (tenant, last_claimed_at) VALUES (?, ?)",
+                    (tenant, now),
+                )
+                task = self._fetch(task_id)
+                self._conn.execute("COMMIT")
+                return task
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _lease_clause(lease):
+        """Extra WHERE condition and parameters that hold only while `lease` owns the task"""
+        if lease is None:
+            return "", ()
+        worker, attempt = lease
+        return " AND status = ? AND worker = ? AND attempts = ?", (RUNNING, worker, attempt)
+
+    def _renew(self, task_id, lease_seconds, lease=None):
+        clause, params = self._lease_clause(lease)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET lease_expires_at = ? WHERE task_id = ? AND status = ?" + clause,
+                (time.time() + lease_seconds, task_id, RUNNING, *params),
+            )
+
+    def _complete(self, task_id, result, lease=None):
+        clause, params = self._lease_clause(lease)
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = NULL, updated_at = ?, "
+                "lease_expires_at = NULL WHERE task_id = ?" + clause,
+                (SUCCEEDED, orjson.dumps(result), time.time(), task_id, *params),
+            )
+            return self._fetch(task_id) if cursor.rowcount else None
+
+    def _fail(self, task_id, error, retry_delay, lease=None):
+        clause, params = self._lease_clause(lease)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE tasks SET
+                    status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END,
+                    available_at = CASE WHEN attempts >= max_attempts THEN available_at ELSE ? END,
+                    error = ?, updated_at = ?, lease_expires_at = NULL
+                WHERE task_id = ?
+                """ + clause,
+                (DEAD, QUEUED, now + retry_delay, error, now, task_id, *params),
+            )
+            return self._fetch(task_id) if cursor.rowcount else None
+
+    def _get(self, task_id):
+        with self._lock:
+            return self._fetch(task_id)
+
+    def _list(self, status, tenant, limit):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if tenant is not None:
+            clauses.append("tenant = ?")
+            params.append(tenant)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks{where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def _requeue(self, task_id):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET status = ?, attempts = 0, updated_at = ?, available_at = ? "
+                "WHERE task_id = ? AND status = ?",
+                (QUEUED, now, now, task_id, DEAD),
+            )
+            return self._fetch(task_id) if cursor.rowcount else None
+
+    def _counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def build_task_queue():
+    if task_config.TASK_QUEUE_BACKEND == "memory":
+        return MemoryTaskQueue()
+    if task_config.TASK_QUEUE_BACKEND == "sqlite":
+        return SQLiteTaskQueue(task_config.TASK_QUEUE_PATH)
+    raise ValueError(f"Unknown task queue backend: {task_config.TASK_QUEUE_BACKEND}")
+
+
+task_queue = build_task_queue()
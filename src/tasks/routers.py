@@ -0,0 +1,50 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+from src.tasks.queue import STATUSES, task_queue, task_view
+from src.tasks.worker import task_workers
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_task_stats():
+    return {"tasks": await task_queue.stats(), "workers": task_workers.metrics()}
+
+
+@router.get("")
+async def list_tasks(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    tenant: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    # /tasks?status=dead lists the dead-letter queue
+    if status_filter is not None and status_filter not in STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown status {status_filter}, expected one of {', '.join(STATUSES)}"
+        )
+    return [task_view(task) for task in await task_queue.list(status=status_filter, tenant=tenant, limit=limit)]
+
+
+@router.get("/{task_id}")
+async def get_task(task_id: str):
+    task = await task_queue.get(task_id)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {task_id} not found"
+        )
+    return task_view(task)
+
+
+@router.post("/{task_id}/retry")
+async def retry_task(task_id: str):
+    task = await task_queue.requeue(task_id)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No dead-lettered task with id {task_id}"
+        )
+    task_workers.notify()
+    return task_view(task)
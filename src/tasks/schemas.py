@@ -0,0 +1,13 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TaskOptions(BaseModel):
+    # Queue the analysis and answer 202 with a task id instead of waiting for the LLM
+    background: bool = False
+    # Higher runs first
+    priority: int = 0
+    # POSTed the task status once it succeeds or is dead-lettered
+    webhook_url: Optional[str] = None
+    tenant: Optional[str] = None
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, Query, Response, status
+
+from src.tasks.queue import task_queue
+from src.tasks.schemas import TaskOptions
+from src.tasks.webhooks import WebhookRejected, check_webhook_url
+
+
+def task_options(
+    background: bool = False,
+    priority: int = Query(0, ge=-100, le=100),
+    webhook_url: Optional[str] = None,
+    x_tenant_id: Optional[str] = Header(None),
+):
+    """Query parameters shared by every endpoint that can run as a background task"""
+    # A sync dependency runs in the threadpool, so resolving the webhook host doesn't block the loop
+    if webhook_url is not None:
+        try:
+            check_webhook_url(webhook_url)
+        except WebhookRejected as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return TaskOptions(background=background, priority=priority, webhook_url=webhook_url, tenant=x_tenant_id)
+
+
+async def submit_task(response: Response, kind, payload, options: TaskOptions):
+    """Queue the task and build the 202 body pointing at its status URL"""
+    task = await task_queue.submit(
+        kind,
+        payload,
+        tenant=options.tenant,
+        priority=options.priority,
+        webhook_url=options.webhook_url,
+    )
+    response.status_code = status.HTTP_202_ACCEPTED
+    response.headers["Location"] = f"/tasks/{task['task_id']}"
+    return {"task_id": task["task_id"], "status": task["status"], "status_url": f"/tasks/{task['task_id']}"}
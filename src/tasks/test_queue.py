@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from src.tasks.queue import DEAD, LEASE_EXPIRED_ERROR, QUEUED, RUNNING, SUCCEEDED, MemoryTaskQueue, SQLiteTaskQueue
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    queue = MemoryTaskQueue() if request.param == "memory" else SQLiteTaskQueue(str(tmp_path / "tasks.sqlite3"))
+    yield queue
+    queue.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_claim_leases_and_completes(queue):
+    task = run(queue.submit("candidate", {"cv": 1}, max_attempts=3))
+    assert task["status"] == QUEUED
+
+    claimed = run(queue.claim("w1", 60))
+    assert claimed["task_id"] == task["task_id"]
+    assert claimed["status"] == RUNNING
+    assert claimed["attempts"] == 1
+    assert claimed["payload"] == {"cv": 1}
+    # Leased: nobody else gets it
+    assert run(queue.claim("w2", 60)) is None
+
+    done = run(queue.complete(task["task_id"], {"score": 80}))
+    assert done["status"] == SUCCEEDED
+    assert done["result"] == {"score": 80}
+    assert run(queue.claim("w2", 60)) is None
+
+
+def test_priority_then_tenant_fairness(queue):
+    run(queue.submit("job", {}, tenant="a"))
+    run(queue.submit("job", {}, tenant="a"))
+    urgent = run(queue.submit("job", {}, tenant="a", priority=5))
+    other = run(queue.submit("job", {}, tenant="b"))
+
+    assert run(queue.claim("w", 60))["task_id"] == urgent["task_id"]
+    # Tenant a was just served, b goes next despite submitting later
+    assert run(queue.claim("w", 60))["task_id"] == other["task_id"]
+
+
+def test_failure_is_retried_after_delay(queue):
+    task = run(queue.submit("job", {}, max_attempts=3))
+    run(queue.claim("w", 60))
+
+    failed = run(queue.fail(task["task_id"], "boom", 60))
+    assert failed["status"] == QUEUED
+    assert failed["error"] == "boom"
+    # Backing off: not due yet
+    assert run(queue.claim("w", 60)) is None
+
+
+def test_failure_with_no_delay_is_claimed_again(queue):
+    task = run(queue.submit("job", {}, max_attempts=3))
+    run(queue.claim("w", 60))
+    run(queue.fail(task["task_id"], "boom", 0))
+
+    retried = run(queue.claim("w", 60))
+    assert retried["task_id"] == task["task_id"]
+    assert retried["attempts"] == 2
+
+
+def test_dead_after_max_attempts_and_requeue(queue):
+    task = run(queue.submit("job", {}, max_attempts=2))
+    for attempt in (1, 2):
+        claimed = run(queue.claim("w", 60))
+        assert claimed["attempts"] == attempt
+        failed = run(queue.fail(task["task_id"], f"boom {attempt}", 0))
+
+    assert failed["status"] == DEAD
+    assert failed["error"] == "boom 2"
+    assert run(queue.claim("w", 60)) is None
+    assert run(queue.stats())[DEAD] == 1
+
+    requeued = run(queue.requeue(task["task_id"]))
+    assert requeued["status"] == QUEUED
+    assert requeued["attempts"] == 0
+    assert run(queue.claim("w", 60))["attempts"] == 1
+    # Only dead tasks can be requeued
+    assert run(queue.requeue(task["task_id"])) is None
+
+
+def test_expired_lease_is_reclaimed(queue):
+    task = run(queue.submit("job", {}, max_attempts=3))
+    run(queue.claim("w1", -1))
+
+    reclaimed = run(queue.claim("w2", 60))
+    assert reclaimed["task_id"] == task["task_id"]
+    assert reclaimed["worker"] == "w2"
+    assert reclaimed["attempts"] == 2
+
+
+def test_stale_worker_cannot_record_over_a_reclaimed_task(queue):
+    task = run(queue.submit("job", {}, max_attempts=3))
+    stale = run(queue.claim("w1", -1))
+    current = run(queue.claim("w2", 60))
+    stale_lease = (stale["worker"], stale["attempts"])
+    current_lease = (current["worker"], current["attempts"])
+
+    assert run(queue.complete(task["task_id"], {"from": "w1"}, lease=stale_lease)) is None
+    assert run(queue.fail(task["task_id"], "boom", 0, lease=stale_lease)) is None
+    run(queue.renew(task["task_id"], -1, lease=stale_lease))
+    unchanged = run(queue.get(task["task_id"]))
+    assert unchanged["status"] == RUNNING
+    assert unchanged["worker"] == "w2"
+    assert unchanged["result"] is None
+    assert run(queue.claim("w3", 60)) is None
+
+    done = run(queue.complete(task["task_id"], {"from": "w2"}, lease=current_lease))
+    assert done["status"] == SUCCEEDED
+    assert done["result"] == {"from": "w2"}
+
+
+def test_renew_keeps_the_lease(queue):
+    task = run(queue.submit("job", {}, max_attempts=3))
+    run(queue.claim("w1", -1))
+    run(queue.renew(task["task_id"], 60))
+    assert run(queue.claim("w2", 60)) is None
+
+
+def test_expired_lease_on_last_attempt_is_dead(queue):
+    task = run(queue.submit("job", {}, max_attempts=1))
+    run(queue.claim("w1", -1))
+
+    assert run(queue.claim("w2", 60)) is None
+    dead = run(queue.get(task["task_id"]))
+    assert dead["status"] == DEAD
+    assert dead["error"] == LEASE_EXPIRED_ERROR
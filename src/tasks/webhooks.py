@@ -0,0 +1,49 @@
+"""Validation of client-supplied completion webhook URLs.
+
+The worker POSTs to whatever URL a client submitted, so without a check a
+task could make the server call internal services. Only http(s) URLs are
+accepted; with TASK_WEBHOOK_ALLOWED_HOSTS set the host must be one of them
+(or a subdomain), and unless TASK_WEBHOOK_ALLOW_PRIVATE every address the
+host resolves to must be public. The check runs at submit time and again
+before each delivery, since DNS answers can change in between.
+"""
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from src.tasks.config import task_config
+
+
+class WebhookRejected(ValueError):
+    pass
+
+
+def _allowed_host(host):
+    allowed = [entry.lower().strip(".") for entry in task_config.TASK_WEBHOOK_ALLOWED_HOSTS]
+    return not allowed or any(host == entry or host.endswith("." + entry) for entry in allowed)
+
+
+def _public(address):
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    # IPv4-mapped IPv6 (::ffff:10.0.0.1) is judged by the IPv4 address
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_webhook_url(url):
+    """Raise WebhookRejected unless the URL may be called; blocking (resolves the host)"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookRejected("The webhook URL must be an absolute http(s) URL")
+    host = parts.hostname.lower().strip(".")
+    if not _allowed_host(host):
+        raise WebhookRejected(f"Webhook host {host} is not in TASK_WEBHOOK_ALLOWED_HOSTS")
+    if task_config.TASK_WEBHOOK_ALLOW_PRIVATE:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise WebhookRejected(f"Webhook host {host} does not resolve") from None
+    if not all(_public(address) for address in addresses):
+        raise WebhookRejected(f"Webhook host {host} resolves to a private or reserved address")
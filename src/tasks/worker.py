@@ -0,0 +1,221 @@
+"""Workers that drain the task queue.
+
+The API process starts TASK_WORKERS of them in its lifespan. To run the
+analyses in a separate process instead (TASK_WORKERS=0 for the API):
+
+    TASK_QUEUE_BACKEND=sqlite python -m src.tasks.worker --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import signal
+import socket
+
+import httpx
+
+from src.candidate.extraction import shutdown_parse_executor
+from src.database.pool import db_pool
+from src.llm.client import llm_client
+from src.tasks.config import task_config
+from src.tasks.handlers import TASK_HANDLERS
+from src.tasks.queue import DEAD, SUCCEEDED, task_queue, task_view
+from src.tasks.webhooks import WebhookRejected, check_webhook_url
+from src.telemetry.instrument import task_context
+from src.telemetry.metrics import registry
+
+LOGGER = logging.getLogger(__name__)
+
+
+def retry_delay(attempt):
+    """Exponential backoff, jittered so retries of a failed batch spread out"""
+    ceiling = min(task_config.TASK_RETRY_BACKOFF_MAX, task_config.TASK_RETRY_BACKOFF_BASE * 2 ** (attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class WorkerPool:
+    """A fixed number of asyncio workers claiming tasks from one queue"""
+
+    def __init__(self, queue, handlers=TASK_HANDLERS, concurrency=task_config.TASK_WORKERS,
+                 poll_interval=task_config.TASK_POLL_INTERVAL, lease_seconds=task_config.TASK_LEASE_SECONDS):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.name = None
+        self.running = 0
+        self._workers = []
+        self._wakeup = None
+        self._stopping = False
+        self._http = None
+        self._deliveries = set()
+        queue.add_listener(self.notify)
+
+    def notify(self, task=None):
+        """Wake an idle worker right away instead of at its next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._workers or self.concurrency <= 0:
+            return
+        self._stopping = False
+        # Named at start, not import: forked API workers share the launcher's module state
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._http = httpx.AsyncClient(timeout=task_config.TASK_WEBHOOK_TIMEOUT)
+        self._workers = [
+            asyncio.create_task(self._work(f"{self.name}/{i}")) for i in range(self.concurrency)
+        ]
+        LOGGER.info(f"Started {self.concurrency} task workers")
+
+    async def stop(self, timeout=30.0):
+        """Stop claiming, give running tasks `timeout` seconds to finish, then cancel them.
+
+        Cancelled tasks keep their lease and are picked up again once it expires.
+        """
+        if not self._workers:
+            return
+        self._stopping = True
+        self.notify()
+        _, pending = await asyncio.wait(self._workers, timeout=timeout)
+        for worker in pending:
+            worker.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._workers = []
+        # Webhooks still retrying get what is left of the grace period
+        if self._deliveries:
+            _, undelivered = await asyncio.wait(self._deliveries, timeout=max(timeout / 2, 1.0))
+            for delivery in undelivered:
+                delivery.cancel()
+            await asyncio.gather(*undelivered, return_exceptions=True)
+        await self._http.aclose()
+        self._http = None
+
+    async def _work(self, worker_name):
+        while not self._stopping:
+            try:
+                task = await self.queue.claim(worker_name, self.lease_seconds)
+            except Exception as e:
+                LOGGER.error(f"Task claim failed: {e}")
+                task = None
+
+            if task is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.running += 1
+            try:
+                await self._execute(task)
+            except Exception as e:
+                # Recording the outcome failed (e.g. database is locked): the task keeps its lease
+                # and runs again once it expires, this worker carries on with the next one
+                LOGGER.exception(f"Task {task['task_id']} ({task['kind']}) could not be recorded: {e}")
+            finally:
+                self.running -= 1
+
+    async def _execute(self, task):
+        handler = self.handlers.get(task["kind"])
+        claimed = task
+        lease = (task["worker"], task["attempts"])
+        heartbeat = asyncio.create_task(self._heartbeat(task["task_id"], lease))
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for task kind {task['kind']}")
+            with task_context(task["kind"]):
+                result = await handler(task["payload"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            delay = retry_delay(task["attempts"])
+            task = await self.queue.fail(task["task_id"], f"{type(e).__name__}: {e}", delay, lease=lease)
+            if task is None:
+                LOGGER.warning(f"Task {claimed['task_id']} ({claimed['kind']}) lease lost, failure not recorded: {e}")
+                return
+            if task["status"] == DEAD:
+                LOGGER.error(f"Task {task['task_id']} ({task['kind']}) dead-lettered after {task['attempts']} attempts: {e}")
+            else:
+                LOGGER.warning(f"Task {task['task_id']} ({task['kind']}) failed, retry in {delay:.1f}s: {e}")
+                return
+        else:
+            task = await self.queue.complete(task["task_id"], result, lease=lease)
+            if task is None:
+                # The lease ran out and another worker claimed the task; its attempt owns the outcome
+                LOGGER.warning(f"Task {claimed['task_id']} ({claimed['kind']}) lease lost, result dropped")
+                return
+        finally:
+            heartbeat.cancel()
+
+        if task["status"] in (SUCCEEDED, DEAD) and task["webhook_url"]:
+            # Delivered in its own task so a dead endpoint's retries don't hold this worker slot
+            delivery = asyncio.create_task(self._deliver_webhook(task))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+    async def _heartbeat(self, task_id, lease):
+        """Keep extending the lease while the handler runs, so only dead workers lose their task"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.queue.renew(task_id, self.lease_seconds, lease=lease)
+            except Exception as e:
+                LOGGER.warning(f"Lease renewal for task {task_id} failed: {e}")
+
+    async def _deliver_webhook(self, task):
+        for attempt in range(1, task_config.TASK_WEBHOOK_RETRIES + 1):
+            try:
+                # Re-checked on every attempt: the host may resolve elsewhere than at submit time
+                await asyncio.to_thread(check_webhook_url, task["webhook_url"])
+                response = await self._http.post(task["webhook_url"], json=task_view(task))
+                response.raise_for_status()
+                return
+            except WebhookRejected as e:
+                LOGGER.warning(f"Webhook for task {task['task_id']} not sent: {e}")
+                return
+            except Exception as e:
+                LOGGER.warning(f"Webhook for task {task['task_id']} failed (attempt {attempt}): {e}")
+                if attempt < task_config.TASK_WEBHOOK_RETRIES:
+                    await asyncio.sleep(retry_delay(attempt))
+
+    def metrics(self):
+        return {"workers": len(self._workers), "running": self.running}
+
+
+task_workers = WorkerPool(task_queue)
+registry.register_stats("cv_ranking_task_workers", "In-process task workers", task_workers.metrics)
+
+
+async def run_worker_process(concurrency):
+    """Entry point of the standalone worker: drain the queue until SIGINT/SIGTERM"""
+    if task_config.TASK_QUEUE_BACKEND == "memory":
+        raise SystemExit("The worker process needs a shared queue, set TASK_QUEUE_BACKEND=sqlite")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    pool = WorkerPool(task_queue, concurrency=concurrency)
+    await db_pool.open()
+    try:
+        await pool.start()
+        await stop.wait()
+        await pool.stop()
+    finally:
+        await llm_client.aclose()
+        shutdown_parse_executor()
+        await db_pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run task workers outside the API process")
+    parser.add_argument("--concurrency", type=int, default=max(task_config.TASK_WORKERS, 1))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker_process(args.concurrency))
@@ -0,0 +1,24 @@
+from pydantic_settings import BaseSettings
+
+
+class TelemetryConfig(BaseSettings):
+    # Prometheus text format at GET /metrics
+    METRICS_ENABLED: bool = True
+    # Spans through OpenTelemetry when the SDK is installed and configured (OTEL_* variables)
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "cv-ranking"
+
+    # Requests slower than this are logged with their per-stage breakdown
+    SLOW_REQUEST_SECONDS: float = 10.0
+
+    # USD per 1K tokens as (prompt, completion); models not listed are counted at 0
+    LLM_PRICES: dict = {
+        "gpt-3.5-turbo-16k": (0.003, 0.004),
+        "gpt-3.5-turbo": (0.0005, 0.0015),
+        "gpt-4o-mini": (0.00015, 0.0006),
+        "gpt-4o": (0.0025, 0.01),
+        "gpt-4-turbo": (0.01, 0.03),
+    }
+
+
+telemetry_config = TelemetryConfig()
@@ -0,0 +1,190 @@
+"""Request metrics, per-stage timings and LLM usage accounting.
+
+MetricsMiddleware gives every HTTP request a RequestContext; stage() blocks
+anywhere below it (upload, parse, llm, db_connect, query, serialize) add
+their duration to the stage histogram under the request's route, to the
+request's Server-Timing header and, when tracing is on, to a span. Task
+workers open a context per task with task_context(), so background work is
+labelled "task:<kind>".
+"""
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from fastapi.responses import ORJSONResponse
+
+from src.telemetry.config import telemetry_config
+from src.telemetry.metrics import registry
+from src.telemetry.tracing import span
+
+LOGGER = logging.getLogger(__name__)
+
+HTTP_REQUESTS = registry.counter(
+    "cv_ranking_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+HTTP_SECONDS = registry.histogram(
+    "cv_ranking_http_request_duration_seconds", "HTTP request latency, until the last body byte", ("method", "route")
+)
+STAGE_SECONDS = registry.histogram(
+    "cv_ranking_stage_duration_seconds", "Latency of one processing stage", ("stage", "endpoint")
+)
+LLM_REQUESTS = registry.counter(
+    "cv_ranking_llm_requests_total", "LLM calls by outcome (ok, retry, error)", ("model", "endpoint", "outcome")
+)
+LLM_TOKENS = registry.counter(
+    "cv_ranking_llm_tokens_total", "Tokens reported by the LLM API", ("model", "endpoint", "type")
+)
+LLM_COST = registry.counter(
+    "cv_ranking_llm_cost_usd_total", "Estimated LLM spend from LLM_PRICES", ("model", "endpoint")
+)
+ROUTE_REQUESTS = registry.counter(
+    "cv_ranking_llm_route_requests_total",
+    "Routed LLM attempts by tier outcome (ok, invalid, low_confidence)", ("task", "model", "outcome")
+)
+ROUTE_SECONDS = registry.histogram(
+    "cv_ranking_llm_route_duration_seconds", "Latency of one routed attempt, queueing included", ("task", "model")
+)
+ROUTE_COST = registry.counter(
+    "cv_ranking_llm_route_cost_usd_total", "Estimated LLM spend per routing task and tier", ("task", "model")
+)
+CACHE_REQUESTS = registry.counter(
+    "cv_ranking_cache_requests_total", "Cache lookups by result (hit, miss)", ("cache", "result")
+)
+
+_context = contextvars.ContextVar("telemetry_request", default=None)
+
+
+class RequestContext:
+    def __init__(self, scope=None, endpoint=None):
+        self.scope = scope
+        self._endpoint = endpoint
+        self.stages = {}
+
+    @property
+    def endpoint(self):
+        """Route template (bounded label cardinality); known once routing has run"""
+        if self._endpoint is not None:
+            return self._endpoint
+        route = self.scope.get("route") if self.scope is not None else None
+        return getattr(route, "path", None) or "unmatched"
+
+
+def current_endpoint():
+    context = _context.get()
+    return context.endpoint if context is not None else "none"
+
+
+@contextmanager
+def stage(name, **attributes):
+    """Time a block as one stage of the current request or task"""
+    started = time.perf_counter()
+    with span(name, **attributes):
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            STAGE_SECONDS.observe(elapsed, stage=name, endpoint=current_endpoint())
+            context = _context.get()
+            if context is not None:
+                context.stages[name] = context.stages.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def task_context(kind):
+    token = _context.set(RequestContext(endpoint=f"task:{kind}"))
+    try:
+        with span("task", kind=kind):
+            yield
+    finally:
+        _context.reset(token)
+
+
+def llm_cost(model, usage):
+    """USD for one call from its usage_metadata and LLM_PRICES"""
+    if not usage:
+        return 0.0
+    prompt_price, completion_price = telemetry_config.LLM_PRICES.get(model, (0.0, 0.0))
+    return (usage.get("input_tokens", 0) * prompt_price + usage.get("output_tokens", 0) * completion_price) / 1000
+
+
+def record_llm_usage(model, usage):
+    """Token counters and cost from an AIMessage.usage_metadata (None when the API sent none)"""
+    if not usage:
+        return
+    endpoint = current_endpoint()
+    LLM_TOKENS.inc(usage.get("input_tokens", 0), model=model, endpoint=endpoint, type="prompt")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0), model=model, endpoint=endpoint, type="completion")
+    LLM_COST.inc(llm_cost(model, usage), model=model, endpoint=endpoint)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def server_timing(stages):
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items())
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware, so streamed responses are timed to their last byte and never buffered"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(scope)
+        token = _context.set(context)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if context.stages:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(context.stages).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            with span("http.request", method=scope["method"], path=scope["path"]):
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = context.endpoint
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status_code)
+            HTTP_SECONDS.observe(elapsed, method=scope["method"], route=route)
+            if elapsed > telemetry_config.SLOW_REQUEST_SECONDS:
+                LOGGER.warning(
+                    f"Slow request {scope['method']} {route}: {elapsed:.2f}s ({server_timing(context.stages) or 'no stages'})"
+                )
+            _context.reset(token)
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse whose rendering is recorded as the "serialize" stage"""
+
+    def render(self, content):
+        with stage("serialize"):
+            return super().render(content)
+
+
+def configure_logging(log_file, date_fmt):
+    """Application logs to settings.LOG_DIR (rotated) as well as the console"""
+    root = logging.getLogger()
+    if any(getattr(handler, "baseFilename", None) == os.path.abspath(log_file) for handler in root.handlers):
+        return
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s", datefmt=date_fmt))
+    root.addHandler(handler)
+    if root.level > logging.INFO:
+        root.setLevel(logging.INFO)
@@ -0,0 +1,37 @@
+"""Optional OpenTelemetry spans.
+
+With TRACING_ENABLED and the opentelemetry API installed, span() opens a
+real span on the globally configured tracer provider (set it up with the
+OTEL_* variables and opentelemetry-instrument, or in code). Otherwise it
+costs a no-op context manager.
+"""
+import logging
+from contextlib import nullcontext
+
+from src.telemetry.config import telemetry_config
+
+LOGGER = logging.getLogger(__name__)
+
+_tracer = None
+_tracer_loaded = False
+
+
+def get_tracer():
+    global _tracer, _tracer_loaded
+    if not _tracer_loaded:
+        _tracer_loaded = True
+        if telemetry_config.TRACING_ENABLED:
+            try:
+                from opentelemetry import trace
+
+                _tracer = trace.get_tracer(telemetry_config.TRACING_SERVICE_NAME)
+            except ImportError:
+                LOGGER.warning("TRACING_ENABLED is set but opentelemetry is not installed, spans are disabled")
+    return _tracer
+
+
+def span(name, **attributes):
+    tracer = get_tracer()
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None})